@@ -0,0 +1,43 @@
+"""007_add_reporting_indexes
+
+Revision ID: 3f1c9a2b7d40
+Revises: 7855cfb0370c
+Create Date: 2026-10-16 09:12:04.518230
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision: str = '3f1c9a2b7d40'
+down_revision: Union[str, None] = '7855cfb0370c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Reporting filters: company + posted status + date range
+    op.create_index(
+        'idx_journal_entries_company_status_date',
+        'journal_entries',
+        ['company_id', 'status', 'date'],
+    )
+    
+    # Join columns for journal lines, covering the summed amounts
+    op.create_index(
+        'idx_journal_lines_entry_account',
+        'journal_lines',
+        ['journal_entry_id', 'account_id'],
+        postgresql_include=['debit', 'credit'],
+    )
+    op.create_index(
+        'idx_journal_lines_account_entry',
+        'journal_lines',
+        ['account_id', 'journal_entry_id'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_journal_lines_account_entry', table_name='journal_lines')
+    op.drop_index('idx_journal_lines_entry_account', table_name='journal_lines')
+    op.drop_index('idx_journal_entries_company_status_date', table_name='journal_entries')
@@ -0,0 +1,24 @@
+"""008_add_document_storage_hash_index
+
+Revision ID: 8d2e4b6f1a93
+Revises: 3f1c9a2b7d40
+Create Date: 2026-10-16 14:27:51.304118
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision: str = '8d2e4b6f1a93'
+down_revision: Union[str, None] = '3f1c9a2b7d40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Content-hash lookups for duplicate attachments
+    op.create_index('ix_documents_storage_hash', 'documents', ['storage_hash'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_documents_storage_hash', table_name='documents')
@@ -0,0 +1,29 @@
+"""009_add_dismissed_notifications_index
+
+Revision ID: b7e3c5a91f2d
+Revises: 8d2e4b6f1a93
+Create Date: 2026-10-16 16:05:42.871390
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision: str = 'b7e3c5a91f2d'
+down_revision: Union[str, None] = '8d2e4b6f1a93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Retention cleanup: old dismissed notifications only
+    op.create_index(
+        'ix_notifications_dismissed_created_at',
+        'notifications',
+        ['created_at'],
+        postgresql_where=sa.text('is_dismissed'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_notifications_dismissed_created_at', table_name='notifications')
@@ -0,0 +1,41 @@
+"""010_email_addresses_jsonb
+
+Revision ID: e41a7c2d9b58
+Revises: b7e3c5a91f2d
+Create Date: 2026-10-16 16:48:19.204573
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers
+revision: str = 'e41a7c2d9b58'
+down_revision: Union[str, None] = 'b7e3c5a91f2d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Recipient lists were stored as JSON-encoded text
+    for column in ('to_addresses', 'cc_addresses'):
+        op.alter_column(
+            'email_messages',
+            column,
+            type_=postgresql.JSONB(),
+            existing_type=sa.Text(),
+            existing_nullable=True,
+            postgresql_using=f'{column}::jsonb',
+        )
+
+
+def downgrade() -> None:
+    for column in ('to_addresses', 'cc_addresses'):
+        op.alter_column(
+            'email_messages',
+            column,
+            type_=sa.Text(),
+            existing_type=postgresql.JSONB(),
+            existing_nullable=True,
+            postgresql_using=f'{column}::text',
+        )
@@ -83,9 +83,11 @@ def get_dashboard_summary(
             granularity="monthly",
         )
         
-        total_revenue = Decimal(str(pnl_data.get("totals", {}).get("revenue", 0)))
-        total_expenses = Decimal(str(pnl_data.get("totals", {}).get("expenses", 0)))
-        net_profit = Decimal(str(pnl_data.get("totals", {}).get("net_profit", 0)))
+        # P&L totals are already Decimal
+        pnl_totals = pnl_data["totals"]
+        total_revenue = pnl_totals["revenue"]
+        total_expenses = pnl_totals["expenses"]
+        net_profit = pnl_totals["net_profit"]
     except Exception as e:
         logger.warning(f"Failed to get P&L data: {e}")
         total_revenue = Decimal("0.00")
@@ -19,8 +19,8 @@ from app.tasks.email_tasks import reprocess_document
 from app.services.storage import get_storage_service
 from app.services.extraction import AttachmentExtractor, ContentExtractor
 from app.services.ocr import get_ocr_provider
-from app.services.classification import DocumentClassifier
-from app.services.security import VirusScanner, FileValidator
+from app.services.classification import get_document_classifier
+from app.services.security import screen_upload
 from app.core.config import get_settings
 from app.services.accounting.document_to_accounting_service import (
     create_ar_invoice_from_document,
@@ -239,7 +239,6 @@ async def _upload_document(
 ) -> DocumentUploadResponse:
     """Internal helper to upload and process a document."""
     import logging
-    import hashlib
     from datetime import datetime
     
     logger = logging.getLogger(__name__)
@@ -250,16 +249,16 @@ async def _upload_document(
     filename = file.filename or "upload.pdf"
     content_type = file.content_type or "application/pdf"
     
-    # Validate file
-    file_validator = FileValidator()
-    if not file_validator.is_allowed_file(filename, content_type):
-        raise HTTPException(status_code=400, detail=f"File type not allowed: {content_type}")
-    
-    # Virus scan
-    virus_scanner = VirusScanner()
-    is_clean = await virus_scanner.scan_file(content, filename)
-    if not is_clean:
+    # Validate, virus scan and hash
+    screening = await screen_upload(content, filename, content_type)
+    if not screening.validation.is_valid:
+        raise HTTPException(
+            status_code=400,
+            detail=f"File not allowed: {'; '.join(screening.validation.errors)}",
+        )
+    if not screening.scan.is_clean:
         raise HTTPException(status_code=400, detail="File failed virus scan")
+    content_hash = screening.content_hash
     
     # Extract content
     content_extractor = ContentExtractor()
@@ -280,7 +279,7 @@ async def _upload_document(
             extracted_content.confidence = ocr_result.confidence
     
     # Classify
-    classifier = DocumentClassifier(settings.classification_confidence_threshold)
+    classifier = get_document_classifier(settings.classification_confidence_threshold)
     classification = classifier.classify(
         extracted_content.text or "",
         source_email=None,
@@ -310,16 +309,15 @@ async def _upload_document(
                     "upload_type": "manual",
                     "document_type": classification.document_type.value,
                 },
+                content_hash=content_hash,
             )
             stored_file_key = stored_file.key
             stored_file_hash = stored_file.content_hash
         except Exception as e:
             logger.warning(f"Storage upload failed, using local path: {e}")
-            content_hash = hashlib.sha256(content).hexdigest()
             stored_file_key = f"local://documents/{content_hash[:16]}_{filename}"
             stored_file_hash = content_hash
     else:
-        content_hash = hashlib.sha256(content).hexdigest()
         stored_file_key = f"local://documents/{content_hash[:16]}_{filename}"
         stored_file_hash = content_hash
     
@@ -551,11 +549,14 @@ async def download_document(document_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="File stored locally, cannot download")
     
     try:
-        content = await storage.download_file(document.storage_path)
-        return StreamingResponse(
-            io.BytesIO(content),
-            media_type=document.content_type or "application/octet-stream",
-            headers={"Content-Disposition": f'attachment; filename="{document.original_filename}"'},
-        )
+        content = await storage.try_download_file(document.storage_path)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to download file: {str(e)}")
+    if content is None:
+        raise HTTPException(status_code=404, detail="File not found in storage")
+
+    return StreamingResponse(
+        io.BytesIO(content),
+        media_type=document.content_type or "application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="{document.original_filename}"'},
+    )
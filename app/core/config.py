@@ -13,6 +13,7 @@ class Settings(BaseSettings):
     
     # OpenAI
     openai_api_key: str | None = None
+    openai_classify_concurrency: int = 8  # OpenAI requests in flight per bank-file classification
 
     # ============================================
     # EMAIL INGESTION
@@ -37,11 +38,18 @@ class Settings(BaseSettings):
     email_poll_interval_seconds: int = 30
     email_whitelist_domains: str = ""  # Comma-separated
     email_whitelist_addresses: str = ""  # Comma-separated
+    attachment_concurrency: int = 4  # Attachments OCR'd/uploaded at once per email
 
     # ============================================
     # OCR
     # ============================================
     ocr_provider: Literal["tesseract", "google_vision", "aws_textract"] = "tesseract"
+    tesseract_cmd: str = ""  # Path to tesseract executable (if not in PATH)
+    ocr_dpi: int = 240  # Rasterization DPI for scanned PDFs
+    ocr_grayscale: bool = True  # Feed Tesseract single-channel images
+    ocr_preprocess: bool = True  # Autocontrast + binarize images before OCR
+    ocr_psm: int = 6  # Tesseract page segmentation mode (7 = single line, 11 = sparse text)
+    ocr_cache_size: int = 128  # In-process extraction results kept by content hash (0 disables)
     google_cloud_credentials_json: str = ""
     aws_access_key_id: str = ""
     aws_secret_access_key: str = ""
@@ -78,6 +86,7 @@ class Settings(BaseSettings):
     virus_scanner: Literal["clamav", "none"] = "clamav"
     clamav_host: str = "localhost"
     clamav_port: int = 3310
+    clamav_stream_max_length: int = 25 * 1024 * 1024  # clamd StreamMaxLength
 
     # ============================================
     # CLASSIFICATION
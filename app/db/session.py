@@ -1,3 +1,4 @@
+import orjson
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
@@ -5,11 +6,19 @@ from app.core.config import get_settings
 
 settings = get_settings()
 
+
+def _json_serializer(value) -> str:
+    """orjson for JSON/JSONB binds; non-str keys are stringified like json.dumps."""
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
 engine = create_engine(
     settings.database_url,
     pool_pre_ping=True,
     pool_size=10,
     max_overflow=20,
+    json_serializer=_json_serializer,
+    json_deserializer=orjson.loads,
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
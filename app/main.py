@@ -76,8 +76,20 @@ async def startup_event():
         finally:
             db.close()
 
+        # Create the storage container once, off the upload path
+        try:
+            from app.services.storage import get_storage_service
+            await get_storage_service().ensure_bucket_exists()
+        except Exception as e:
+            logging.warning(f"Storage not ready at startup: {e}")
+
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown."""
-    pass
+    from app.services.storage import AzureBlobStorageService, get_storage_service
+
+    if get_storage_service.cache_info().currsize:
+        storage = get_storage_service()
+        if isinstance(storage, AzureBlobStorageService):
+            await storage.close()
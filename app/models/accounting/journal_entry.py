@@ -2,7 +2,7 @@
 
 from datetime import datetime, date
 from uuid import uuid4, UUID
-from sqlalchemy import String, Date, DateTime, Enum, ForeignKey, Numeric, CheckConstraint
+from sqlalchemy import String, Date, DateTime, Enum, ForeignKey, Numeric, CheckConstraint, Index
 from sqlalchemy.orm import mapped_column, Mapped, relationship
 from sqlalchemy.dialects.postgresql import UUID as PGUUID
 
@@ -46,6 +46,11 @@ class JournalEntry(Base):
         onupdate=datetime.utcnow, 
         nullable=False
     )
+    
+    __table_args__ = (
+        # Reporting filters: company + posted status + date range
+        Index("idx_journal_entries_company_status_date", "company_id", "status", "date"),
+    )
 
 
 class JournalLine(Base):
@@ -85,4 +90,13 @@ class JournalLine(Base):
     __table_args__ = (
         CheckConstraint("debit >= 0", name="check_debit_non_negative"),
         CheckConstraint("credit >= 0", name="check_credit_non_negative"),
+        # Entry -> lines join in reports, covering the amounts they sum
+        Index(
+            "idx_journal_lines_entry_account",
+            "journal_entry_id",
+            "account_id",
+            postgresql_include=["debit", "credit"],
+        ),
+        # Account -> lines join (P&L / balance sheet group by account)
+        Index("idx_journal_lines_account_entry", "account_id", "journal_entry_id"),
     )
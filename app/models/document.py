@@ -92,7 +92,7 @@ class Document(Base, TimestampMixin):
     # File information
     original_filename = Column(String(500), nullable=False)
     storage_path = Column(String(1000), nullable=False)  # S3 path
-    storage_hash = Column(String(64), nullable=True)  # SHA-256 hash
+    storage_hash = Column(String(64), nullable=True, index=True)  # SHA-256 hash
     content_type = Column(String(100), nullable=True)
     file_size = Column(Integer, nullable=True)  # In bytes
     
@@ -2,8 +2,9 @@ from datetime import datetime
 from typing import Optional
 from sqlalchemy import (
     Column, Integer, String, Text, Float, Boolean, DateTime, 
-    ForeignKey, Enum, JSON, Index
+    ForeignKey, Enum, JSON, Index, text
 )
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 import enum
 
@@ -44,8 +45,8 @@ class EmailMessage(Base, TimestampMixin):
     
     # Email metadata
     from_address = Column(String(320), nullable=False)
-    to_addresses = Column(Text, nullable=True)  # JSON array
-    cc_addresses = Column(Text, nullable=True)  # JSON array
+    to_addresses = Column(JSONB, nullable=True)  # List of addresses
+    cc_addresses = Column(JSONB, nullable=True)  # List of addresses
     subject = Column(Text, nullable=True)
     received_date = Column(DateTime, nullable=False)
     
@@ -280,5 +281,10 @@ class Notification(Base, TimestampMixin):
         Index('ix_notifications_user_id', 'user_id'),
         Index('ix_notifications_is_read', 'is_read'),
         Index('ix_notifications_created_at', 'created_at'),
+        Index(
+            'ix_notifications_dismissed_created_at',
+            'created_at',
+            postgresql_where=text('is_dismissed'),
+        ),
     )
 
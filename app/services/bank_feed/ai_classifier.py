@@ -3,6 +3,7 @@
 import logging
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List
 from uuid import UUID
 
@@ -261,12 +262,36 @@ def classify_transactions_batch(
     total = len(transaction_ids)
     logger.info(f"Classifying {total} transactions (use_ai={use_ai})")
     
-    for i in range(0, total, chunk_size):
-        chunk = transaction_ids[i:i + chunk_size]
-        
-        for txn_id in chunk:
-            try:
-                txn = db.query(BankTransaction).filter(BankTransaction.id == txn_id).first()
+    classify = classify_transaction_ai if use_ai else classify_transaction_rule_based
+    
+    def classify_safely(txn: BankTransaction):
+        try:
+            return classify(txn), None
+        except Exception as e:
+            return None, e
+    
+    # OpenAI calls are network-bound; run a chunk's calls concurrently.
+    # This is the only place classification fans out, so the setting caps
+    # requests in flight per batch. Workers only read already-loaded column
+    # attributes, all session work stays on this thread.
+    executor = (
+        ThreadPoolExecutor(max_workers=settings.openai_classify_concurrency)
+        if use_ai else None
+    )
+    
+    try:
+        for i in range(0, total, chunk_size):
+            chunk = transaction_ids[i:i + chunk_size]
+            
+            # Load the whole chunk in one query
+            txns = {
+                txn.id: txn
+                for txn in db.query(BankTransaction).filter(BankTransaction.id.in_(chunk))
+            }
+            
+            pending = []
+            for txn_id in chunk:
+                txn = txns.get(txn_id)
                 if not txn:
                     logger.warning(f"Transaction {txn_id} not found")
                     continue
@@ -275,14 +300,19 @@ def classify_transactions_batch(
                 if txn.classification_status == ClassificationStatus.DONE:
                     continue
                 
-                # Update status to IN_PROGRESS
                 txn.classification_status = ClassificationStatus.IN_PROGRESS
-                
-                # Classify
-                if use_ai:
-                    result = classify_transaction_ai(txn)
-                else:
-                    result = classify_transaction_rule_based(txn)
+                pending.append(txn)
+            
+            if executor:
+                outcomes = executor.map(classify_safely, pending)
+            else:
+                outcomes = map(classify_safely, pending)
+            
+            for txn, (result, error) in zip(pending, outcomes):
+                if error is not None:
+                    logger.error(f"Error classifying transaction {txn.id}: {str(error)}")
+                    txn.classification_status = ClassificationStatus.FAILED
+                    continue
                 
                 # Update transaction
                 txn.ai_category = result["ai_category"]
@@ -290,21 +320,18 @@ def classify_transactions_batch(
                 txn.ai_confidence = result.get("ai_confidence")
                 txn.ai_ledger_hint = result.get("ai_ledger_hint")
                 txn.classification_status = ClassificationStatus.DONE
-                
+            
+            # Commit chunk
+            try:
+                db.commit()
+                logger.info(f"Classified {min(i + chunk_size, total)}/{total} transactions")
             except Exception as e:
-                logger.error(f"Error classifying transaction {txn_id}: {str(e)}")
-                txn = db.query(BankTransaction).filter(BankTransaction.id == txn_id).first()
-                if txn:
-                    txn.classification_status = ClassificationStatus.FAILED
-        
-        # Commit chunk
-        try:
-            db.commit()
-            logger.info(f"Classified {min(i + chunk_size, total)}/{total} transactions")
-        except Exception as e:
-            db.rollback()
-            logger.error(f"Error committing classification chunk: {str(e)}")
-            raise
+                db.rollback()
+                logger.error(f"Error committing classification chunk: {str(e)}")
+                raise
+    finally:
+        if executor:
+            executor.shutdown()
     
     logger.info(f"Completed classification of {total} transactions")
 
@@ -1,5 +1,7 @@
 """Bank Feed service for managing transactions and matches."""
 
+import asyncio
+import hashlib
 import logging
 from datetime import datetime
 from typing import List, Optional, Dict, Any
@@ -23,6 +25,10 @@ from .csv_parser import get_parser_for_content, ParseResult, ParsedTransaction
 logger = logging.getLogger(__name__)
 
 
+def _sha256_hexdigest(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
 class BankFeedService:
     """Service for bank feed operations."""
 
@@ -66,6 +72,10 @@ class BankFeedService:
         self.db.flush()
 
         try:
+            # Hash once (off the event loop); storage reuses it for the key
+            content_hash = await asyncio.to_thread(_sha256_hexdigest, content)
+            bank_file.file_hash = content_hash
+
             # Upload to storage (Azure Blob or S3)
             if self.storage:
                 try:
@@ -76,24 +86,18 @@ class BankFeedService:
                         content_type=content_type,
                         folder="bank-feeds",
                         metadata={"bank_file_id": str(bank_file.id)},
+                        content_hash=content_hash,
                     )
                     
                     bank_file.storage_path = stored.key
-                    bank_file.file_hash = stored.content_hash
                 except Exception as e:
                     # Storage error - use local path for development
                     logger.warning(f"Storage upload failed, using local path: {e}")
-                    import hashlib
-                    content_hash = hashlib.sha256(content).hexdigest()
                     bank_file.storage_path = f"local://bank-feeds/{content_hash[:16]}_{filename}"
-                    bank_file.file_hash = content_hash
             else:
                 # Storage not configured - use local path for development
                 logger.warning("Storage not configured, using local path")
-                import hashlib
-                content_hash = hashlib.sha256(content).hexdigest()
                 bank_file.storage_path = f"local://bank-feeds/{content_hash[:16]}_{filename}"
-                bank_file.file_hash = content_hash
             
             bank_file.status = FileStatus.PROCESSING
             self.db.commit()
@@ -114,8 +118,9 @@ class BankFeedService:
             if result.errors:
                 bank_file.error_message = "; ".join(result.errors[:5])
 
-            # Create transactions
-            transaction_ids = []
+            # Create transactions; one flush inserts them all (batched
+            # multi-row INSERT ... RETURNING) instead of a round trip per row
+            bank_txns = []
             for txn in result.transactions:
                 bank_txn = BankTransaction(
                     bank_file_id=bank_file.id,
@@ -133,9 +138,10 @@ class BankFeedService:
                     row_number=txn.row_number,
                     status=TransactionStatus.PENDING,
                 )
-                self.db.add(bank_txn)
-                self.db.flush()
-                transaction_ids.append(bank_txn.id)
+                bank_txns.append(bank_txn)
+            self.db.add_all(bank_txns)
+            self.db.flush()
+            transaction_ids = [bank_txn.id for bank_txn in bank_txns]
 
             # Create audit log
             audit = BankFeedAuditLog(
@@ -451,8 +457,8 @@ class BankFeedService:
         bank_file.parsed_rows = result.parsed_rows
         bank_file.skipped_rows = result.skipped_rows
 
-        # Create new transactions
-        transaction_ids = []
+        # Create new transactions (one flush for all rows)
+        bank_txns = []
         for txn in result.transactions:
             bank_txn = BankTransaction(
                 bank_file_id=bank_file.id,
@@ -465,9 +471,10 @@ class BankFeedService:
                 row_number=txn.row_number,
                 status=TransactionStatus.PENDING,
             )
-            self.db.add(bank_txn)
-            self.db.flush()
-            transaction_ids.append(bank_txn.id)
+            bank_txns.append(bank_txn)
+        self.db.add_all(bank_txns)
+        self.db.flush()
+        transaction_ids = [bank_txn.id for bank_txn in bank_txns]
 
         # Audit log
         audit = BankFeedAuditLog(
@@ -8,10 +8,44 @@ import zipfile
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 from datetime import datetime
+from functools import lru_cache
 from typing import Optional, List, Dict, Any, Union
 
 logger = logging.getLogger(__name__)
 
+# Anything but digits, sign, decimal point and parentheses in an amount
+AMOUNT_JUNK_RE = re.compile(r"[^\d.\-\(\)]")
+
+DATE_FORMATS = [
+    "%m/%d/%Y",
+    "%m/%d/%y",
+    "%Y-%m-%d",
+    "%d/%m/%Y",
+    "%m-%d-%Y",
+    "%Y/%m/%d",
+    "%b %d, %Y",
+    "%B %d, %Y",
+]
+
+
+@lru_cache(maxsize=4096)
+def _parse_date_str(date_str: str) -> Optional[datetime]:
+    """
+    Parse a date string, trying DATE_FORMATS in order.
+    
+    Cached: statements repeat the same few dates across many rows, and a
+    miss can cost several failed strptime calls.
+    """
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(date_str, fmt)
+        except ValueError:
+            continue
+    
+    logger.warning(f"Could not parse date: {date_str}")
+    return None
+
+
 # Try to import openpyxl for Excel support
 try:
     import openpyxl
@@ -22,9 +56,9 @@ except ImportError:
     logger.warning("openpyxl not installed, Excel support disabled")
 
 
-@dataclass
+@dataclass(slots=True)
 class ParsedTransaction:
-    """Represents a parsed bank transaction."""
+    """Represents a parsed bank transaction (one per row, hence slots)."""
     date: datetime
     description: str
     amount: float
@@ -82,26 +116,7 @@ class BankCsvParser(ABC):
         if not date_str:
             return None
         
-        date_str = date_str.strip()
-        formats = [
-            "%m/%d/%Y",
-            "%m/%d/%y",
-            "%Y-%m-%d",
-            "%d/%m/%Y",
-            "%m-%d-%Y",
-            "%Y/%m/%d",
-            "%b %d, %Y",
-            "%B %d, %Y",
-        ]
-        
-        for fmt in formats:
-            try:
-                return datetime.strptime(date_str, fmt)
-            except ValueError:
-                continue
-        
-        logger.warning(f"Could not parse date: {date_str}")
-        return None
+        return _parse_date_str(date_str.strip())
 
     def _parse_amount(self, amount_str: str) -> Optional[float]:
         """Parse amount string to float."""
@@ -109,7 +124,7 @@ class BankCsvParser(ABC):
             return None
         
         # Remove currency symbols and whitespace
-        cleaned = re.sub(r"[^\d.\-\(\)]", "", amount_str.strip())
+        cleaned = AMOUNT_JUNK_RE.sub("", amount_str.strip())
         
         # Handle parentheses as negative
         if cleaned.startswith("(") and cleaned.endswith(")"):
@@ -132,8 +147,8 @@ class ChaseCsvParser(BankCsvParser):
     def detect(self, content: bytes) -> bool:
         """Detect if content is a Chase CSV."""
         try:
-            text = self._decode_content(content)
-            first_line = text.split("\n")[0].strip()
+            # Only the header line matters; don't decode/split the whole file
+            first_line = self._decode_content(content.split(b"\n", 1)[0]).strip()
             
             # Check for Chase column headers
             if any(col in first_line for col in ["Posting Date", "Details", "Check or Slip"]):
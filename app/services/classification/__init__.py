@@ -1,9 +1,10 @@
-from .classifier import DocumentClassifier, ClassificationResult
+from .classifier import DocumentClassifier, ClassificationResult, get_document_classifier
 from .field_parser import InvoiceFieldParser, ParsedInvoiceFields
 
 __all__ = [
     "DocumentClassifier",
     "ClassificationResult",
+    "get_document_classifier",
     "InvoiceFieldParser",
     "ParsedInvoiceFields",
 ]
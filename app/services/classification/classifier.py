@@ -1,6 +1,7 @@
 import logging
 import re
 from dataclasses import dataclass, field
+from functools import lru_cache
 from typing import Optional
 
 from app.models.document import DocumentType, DocumentDestination
@@ -9,7 +10,7 @@ from .field_parser import InvoiceFieldParser, ParsedInvoiceFields
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class ClassificationResult:
     """Result of document classification."""
     document_type: DocumentType
@@ -274,6 +275,7 @@ class DocumentClassifier:
         return tags
 
 
-
-
-
+@lru_cache(maxsize=4)
+def get_document_classifier(confidence_threshold: float = 0.75) -> DocumentClassifier:
+    """Shared DocumentClassifier per threshold (it holds no per-document state)."""
+    return DocumentClassifier(confidence_threshold)
@@ -2,12 +2,62 @@ import logging
 import re
 from dataclasses import dataclass, field
 from datetime import datetime
+from functools import lru_cache
 from typing import Optional
 
 logger = logging.getLogger(__name__)
 
+# Vendor name prefixes, matched at the start of a line
+VENDOR_LINE_RES = [
+    re.compile(pattern, re.IGNORECASE)
+    for pattern in (
+        r"^from:?\s*(.+)",
+        r"^bill from:?\s*(.+)",
+        r"^seller:?\s*(.+)",
+        r"^vendor:?\s*(.+)",
+    )
+]
 
-@dataclass
+# A line made only of digits, spaces and date separators
+NUMERIC_LINE_RE = re.compile(r"^[\d\s\-\/\.]+$")
+
+# Line item: description followed by quantity and amount
+LINE_ITEM_RE = re.compile(r"(.{10,50})\s+(\d+\.?\d*)\s+\$?\s*([\d,]+\.?\d*)")
+
+# Currency markers, checked in order
+CURRENCY_RES = {
+    currency: [re.compile(pattern, re.IGNORECASE) for pattern in patterns]
+    for currency, patterns in {
+        "USD": [r"\$", r"USD", r"US\s*Dollar"],
+        "EUR": [r"€", r"EUR", r"Euro"],
+        "GBP": [r"£", r"GBP", r"Pound"],
+        "INR": [r"₹", r"INR", r"Rs\.?"],
+        "CAD": [r"CAD", r"C\$"],
+    }.items()
+}
+
+# Date formats, tried in order against each date-like match
+DATE_FORMATS = (
+    "%m/%d/%Y", "%d/%m/%Y", "%Y/%m/%d",
+    "%m-%d-%Y", "%d-%m-%Y", "%Y-%m-%d",
+    "%m/%d/%y", "%d/%m/%y",
+    "%B %d, %Y", "%d %B %Y",
+    "%b %d, %Y", "%d %b %Y",
+)
+
+
+@lru_cache(maxsize=1024)
+def _parse_date_str(date_str: str) -> Optional[datetime]:
+    """Parse a date string with the first matching DATE_FORMATS entry (cached)."""
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(date_str, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+@dataclass(slots=True)
 class LineItem:
     """Represents a line item from an invoice."""
     description: str
@@ -16,7 +66,7 @@ class LineItem:
     total: Optional[float] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class ParsedInvoiceFields:
     """Parsed fields from an invoice/receipt."""
     # Identification
@@ -104,6 +154,12 @@ class InvoiceFieldParser:
         ],
     }
 
+    # PATTERNS compiled once for the class, not on every search
+    COMPILED_PATTERNS = {
+        name: [re.compile(pattern, re.IGNORECASE) for pattern in patterns]
+        for name, patterns in PATTERNS.items()
+    }
+
     # Keywords for classification
     INVOICE_KEYWORDS = [
         "invoice", "inv", "bill", "billing", "statement",
@@ -179,9 +235,9 @@ class InvoiceFieldParser:
 
     def _extract_pattern(self, text: str, pattern_name: str) -> Optional[str]:
         """Extract first match for a pattern group."""
-        patterns = self.PATTERNS.get(pattern_name, [])
+        patterns = self.COMPILED_PATTERNS.get(pattern_name, [])
         for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+            match = pattern.search(text)
             if match:
                 return match.group(1).strip()
         return None
@@ -189,8 +245,8 @@ class InvoiceFieldParser:
     def _extract_all_dates(self, text: str) -> list[datetime]:
         """Extract all dates from text."""
         dates = []
-        for pattern in self.PATTERNS["date"]:
-            matches = re.findall(pattern, text, re.IGNORECASE)
+        for pattern in self.COMPILED_PATTERNS["date"]:
+            matches = pattern.findall(text)
             for match in matches:
                 parsed = self._parse_date(match)
                 if parsed and parsed not in dates:
@@ -199,25 +255,13 @@ class InvoiceFieldParser:
 
     def _parse_date(self, date_str: str) -> Optional[datetime]:
         """Parse a date string into datetime."""
-        formats = [
-            "%m/%d/%Y", "%d/%m/%Y", "%Y/%m/%d",
-            "%m-%d-%Y", "%d-%m-%Y", "%Y-%m-%d",
-            "%m/%d/%y", "%d/%m/%y",
-            "%B %d, %Y", "%d %B %Y",
-            "%b %d, %Y", "%d %b %Y",
-        ]
-        for fmt in formats:
-            try:
-                return datetime.strptime(date_str.strip(), fmt)
-            except ValueError:
-                continue
-        return None
+        return _parse_date_str(date_str.strip())
 
     def _extract_all_amounts(self, text: str) -> list[float]:
         """Extract all monetary amounts from text."""
         amounts = []
-        for pattern in self.PATTERNS["amount"]:
-            matches = re.findall(pattern, text, re.IGNORECASE)
+        for pattern in self.COMPILED_PATTERNS["amount"]:
+            matches = pattern.findall(text)
             for match in matches:
                 try:
                     amount = float(match.replace(",", ""))
@@ -231,22 +275,14 @@ class InvoiceFieldParser:
         """Extract vendor name using heuristics."""
         lines = text.split("\n")
         
-        # Common patterns for vendor names
-        vendor_patterns = [
-            r"^from:?\s*(.+)",
-            r"^bill from:?\s*(.+)",
-            r"^seller:?\s*(.+)",
-            r"^vendor:?\s*(.+)",
-        ]
-        
         for line in lines[:10]:  # Check first 10 lines
             line = line.strip()
             if not line or len(line) < 3:
                 continue
             
             # Try patterns
-            for pattern in vendor_patterns:
-                match = re.match(pattern, line, re.IGNORECASE)
+            for pattern in VENDOR_LINE_RES:
+                match = pattern.match(line)
                 if match:
                     return match.group(1).strip()
             
@@ -264,7 +300,7 @@ class InvoiceFieldParser:
             return False
         
         # Reject if just numbers or date
-        if re.match(r"^[\d\s\-\/\.]+$", text):
+        if NUMERIC_LINE_RE.match(text):
             return False
         
         # Reject common header words
@@ -291,10 +327,7 @@ class InvoiceFieldParser:
         """Extract line items from text."""
         items = []
         
-        # Pattern for line items: description followed by quantity and amount
-        line_item_pattern = r"(.{10,50})\s+(\d+\.?\d*)\s+\$?\s*([\d,]+\.?\d*)"
-        
-        matches = re.findall(line_item_pattern, text)
+        matches = LINE_ITEM_RE.findall(text)
         for match in matches:
             try:
                 items.append(LineItem(
@@ -309,17 +342,9 @@ class InvoiceFieldParser:
 
     def _detect_currency(self, text: str) -> str:
         """Detect currency from text."""
-        currency_patterns = {
-            "USD": [r"\$", r"USD", r"US\s*Dollar"],
-            "EUR": [r"€", r"EUR", r"Euro"],
-            "GBP": [r"£", r"GBP", r"Pound"],
-            "INR": [r"₹", r"INR", r"Rs\.?"],
-            "CAD": [r"CAD", r"C\$"],
-        }
-        
-        for currency, patterns in currency_patterns.items():
+        for currency, patterns in CURRENCY_RES.items():
             for pattern in patterns:
-                if re.search(pattern, text, re.IGNORECASE):
+                if pattern.search(text):
                     return currency
         
         return "USD"  # Default
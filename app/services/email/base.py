@@ -60,6 +60,16 @@ class EmailAdapter(ABC):
         """Fetch unread emails from the specified folder."""
         pass
 
+    @abstractmethod
+    async def fetch_unread_headers(
+        self,
+        folder: str = "INBOX",
+        limit: int = 50,
+        since: Optional[datetime] = None,
+    ) -> list[EmailMessage]:
+        """Fetch unread emails with headers only (no body or attachments)."""
+        pass
+
     @abstractmethod
     async def fetch_email_by_uid(self, uid: str, folder: str = "INBOX") -> Optional[EmailMessage]:
         """Fetch a specific email by its UID."""
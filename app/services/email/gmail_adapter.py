@@ -67,6 +67,25 @@ class GmailAdapter(EmailAdapter):
         since: Optional[datetime] = None,
     ) -> list[EmailMessage]:
         """Fetch unread emails from Gmail."""
+        return await self._fetch_unread(folder, limit, since, "full")
+
+    async def fetch_unread_headers(
+        self,
+        folder: str = None,
+        limit: int = 50,
+        since: Optional[datetime] = None,
+    ) -> list[EmailMessage]:
+        """Fetch unread email headers from Gmail (no parts or attachment downloads)."""
+        return await self._fetch_unread(folder, limit, since, "metadata")
+
+    async def _fetch_unread(
+        self,
+        folder: Optional[str],
+        limit: int,
+        since: Optional[datetime],
+        message_format: str,
+    ) -> list[EmailMessage]:
+        """List unread messages and get each one in `message_format`."""
         if not self._service:
             raise ConnectionError("Not connected to Gmail API")
 
@@ -97,7 +116,7 @@ class GmailAdapter(EmailAdapter):
                     msg = self._service.users().messages().get(
                         userId="me",
                         id=msg_ref["id"],
-                        format="full",
+                        format=message_format,
                     ).execute()
                     
                     parsed = self._parse_gmail_message(msg)
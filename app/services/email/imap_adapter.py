@@ -68,6 +68,25 @@ class IMAPAdapter(EmailAdapter):
         since: Optional[datetime] = None,
     ) -> list[EmailMessage]:
         """Fetch unread emails from IMAP."""
+        return await self._fetch_unread(folder, limit, since, "(RFC822 UID)")
+
+    async def fetch_unread_headers(
+        self,
+        folder: str = None,
+        limit: int = 50,
+        since: Optional[datetime] = None,
+    ) -> list[EmailMessage]:
+        """Fetch unread email headers from IMAP (marks them seen, like RFC822)."""
+        return await self._fetch_unread(folder, limit, since, "(BODY[HEADER] UID)")
+
+    async def _fetch_unread(
+        self,
+        folder: Optional[str],
+        limit: int,
+        since: Optional[datetime],
+        message_parts: str,
+    ) -> list[EmailMessage]:
+        """Search unseen messages and fetch `message_parts` for the latest `limit`."""
         if not self._connection:
             raise ConnectionError("Not connected to IMAP server")
 
@@ -93,7 +112,7 @@ class IMAPAdapter(EmailAdapter):
 
             for email_id in email_ids:
                 try:
-                    _, msg_data = self._connection.fetch(email_id, "(RFC822 UID)")
+                    _, msg_data = self._connection.fetch(email_id, message_parts)
                     
                     # Extract UID
                     uid = None
@@ -1,13 +1,17 @@
 import io
 import logging
 import mimetypes
+import mmap
 import zipfile
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Union
 
 logger = logging.getLogger(__name__)
 
+# Attachment content: any buffer that supports len() and slicing
+BytesLike = Union[bytes, bytearray, memoryview, mmap.mmap]
+
 # Supported file types
 SUPPORTED_TYPES = {
     # Documents
@@ -43,12 +47,28 @@ DANGEROUS_EXTENSIONS = {
     ".vbs", ".js", ".jse", ".wsf", ".wsh", ".ps1", ".psm1",
 }
 
+SUPPORTED_EXTENSIONS = frozenset(f".{ext}" for ext in SUPPORTED_TYPES.values())
+
+# Magic bytes per MIME type; tuples so one startswith() checks them all
+MAGIC_SIGNATURES = {
+    "application/pdf": (b"%PDF",),
+    "application/zip": (b"PK\x03\x04", b"PK\x05\x06"),
+    "image/jpeg": (b"\xff\xd8\xff",),
+    "image/png": (b"\x89PNG\r\n\x1a\n",),
+    "image/gif": (b"GIF87a", b"GIF89a"),
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet": (b"PK\x03\x04",),  # XLSX is ZIP
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document": (b"PK\x03\x04",),  # DOCX is ZIP
+}
+
+# Leading bytes needed to check any signature above
+MAGIC_PREFIX_LEN = max(len(sig) for sigs in MAGIC_SIGNATURES.values() for sig in sigs)
+
 
 @dataclass
 class ExtractedFile:
     """Represents an extracted file from an attachment."""
     filename: str
-    content: bytes
+    content: BytesLike
     content_type: str
     size: int
     original_filename: str  # Original attachment filename
@@ -81,7 +101,7 @@ class AttachmentExtractor:
     def extract(
         self,
         filename: str,
-        content: bytes,
+        content: BytesLike,
         content_type: str,
     ) -> ExtractionResult:
         """
@@ -89,7 +109,8 @@ class AttachmentExtractor:
         
         Args:
             filename: Original filename of the attachment
-            content: Binary content of the attachment
+            content: Binary content of the attachment (bytes, memoryview or
+                mmap; passed through to ExtractedFile without copying)
             content_type: MIME type of the attachment
         
         Returns:
@@ -128,7 +149,7 @@ class AttachmentExtractor:
         result.files.append(extracted)
         return result
 
-    def _extract_archive(self, filename: str, content: bytes) -> ExtractionResult:
+    def _extract_archive(self, filename: str, content: BytesLike) -> ExtractionResult:
         """Extract files from a ZIP archive."""
         result = ExtractionResult()
 
@@ -193,8 +214,7 @@ class AttachmentExtractor:
 
         # Check by extension
         ext = Path(filename).suffix.lower()
-        valid_extensions = {f".{v}" for v in SUPPORTED_TYPES.values()}
-        if ext in valid_extensions:
+        if ext in SUPPORTED_EXTENSIONS:
             return True
 
         # Additional check for common types
@@ -227,29 +247,17 @@ class AttachmentExtractor:
             return True
         return False
 
-    def validate_content_matches_type(self, content: bytes, claimed_type: str) -> bool:
+    def validate_content_matches_type(self, content: BytesLike, claimed_type: str) -> bool:
         """
         Validate that file content matches claimed MIME type.
         Uses magic bytes to verify.
         """
-        # Magic bytes for common types
-        magic_signatures = {
-            "application/pdf": [b"%PDF"],
-            "application/zip": [b"PK\x03\x04", b"PK\x05\x06"],
-            "image/jpeg": [b"\xff\xd8\xff"],
-            "image/png": [b"\x89PNG\r\n\x1a\n"],
-            "image/gif": [b"GIF87a", b"GIF89a"],
-            "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet": [b"PK\x03\x04"],  # XLSX is ZIP
-            "application/vnd.openxmlformats-officedocument.wordprocessingml.document": [b"PK\x03\x04"],  # DOCX is ZIP
-        }
-
-        signatures = magic_signatures.get(claimed_type, [])
+        signatures = MAGIC_SIGNATURES.get(claimed_type)
         if not signatures:
             return True  # Can't validate, assume OK
 
-        for sig in signatures:
-            if content.startswith(sig):
-                return True
+        if bytes(content[:MAGIC_PREFIX_LEN]).startswith(signatures):
+            return True
 
         logger.warning(f"Content does not match claimed type: {claimed_type}")
         return False
@@ -7,6 +7,9 @@ from typing import Optional
 
 logger = logging.getLogger(__name__)
 
+# Links in email bodies worth following as attachments
+DOWNLOADABLE_LINK_EXTENSIONS = (".pdf", ".xlsx", ".xls", ".csv", ".doc")
+
 
 @dataclass
 class ExtractedContent:
@@ -188,7 +191,8 @@ class ContentExtractor:
             links = []
             for a in soup.find_all("a", href=True):
                 href = a["href"]
-                if any(ext in href.lower() for ext in [".pdf", ".xlsx", ".xls", ".csv", ".doc"]):
+                href_lower = href.lower()
+                if any(ext in href_lower for ext in DOWNLOADABLE_LINK_EXTENSIONS):
                     links.append({"url": href, "text": a.get_text(strip=True)})
             
             return ExtractedContent(
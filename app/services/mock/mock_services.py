@@ -6,10 +6,11 @@ Usage:
 """
 
 import asyncio
+from dataclasses import replace
 from datetime import datetime
 from typing import Optional
 import hashlib
-import uuid
+import secrets
 
 from app.services.email.base import EmailAdapter, EmailMessage, EmailAttachment
 from app.services.ocr.base import OCRProvider, OCRResult
@@ -143,6 +144,16 @@ class MockEmailAdapter(EmailAdapter):
 
         return emails[:limit]
 
+    async def fetch_unread_headers(
+        self,
+        folder: str = "INBOX",
+        limit: int = 50,
+        since: Optional[datetime] = None,
+    ) -> list[EmailMessage]:
+        """Return mock emails without body or attachments."""
+        emails = await self.fetch_unread_emails(folder, limit, since)
+        return [replace(email, body_text=None, attachments=[]) for email in emails]
+
     async def fetch_email_by_uid(self, uid: str, folder: str = "INBOX") -> Optional[EmailMessage]:
         """Fetch a specific mock email."""
         emails = await self.fetch_unread_emails()
@@ -218,10 +229,11 @@ class MockStorageService:
         content_type: str,
         folder: str = "documents",
         metadata: Optional[dict] = None,
+        content_hash: Optional[str] = None,
     ) -> StoredFile:
         """Store file in memory."""
-        content_hash = hashlib.sha256(content).hexdigest()
-        key = f"{folder}/{content_hash[:16]}_{uuid.uuid4().hex[:8]}"
+        content_hash = content_hash or hashlib.sha256(content).hexdigest()
+        key = f"{folder}/{content_hash[:16]}_{secrets.token_hex(4)}"
         
         self._storage[key] = (content, metadata or {})
         
@@ -241,6 +253,11 @@ class MockStorageService:
             return self._storage[key][0]
         raise FileNotFoundError(f"File not found: {key}")
 
+    async def try_download_file(self, key: str) -> Optional[bytes]:
+        """Retrieve file from memory, or None if missing."""
+        entry = self._storage.get(key)
+        return entry[0] if entry else None
+
     async def delete_file(self, key: str) -> bool:
         """Delete file from memory."""
         if key in self._storage:
@@ -93,7 +93,6 @@ class NotificationService:
         
         self.db.add(notification)
         self.db.commit()
-        self.db.refresh(notification)
         
         logger.info(
             "Success notification created",
@@ -130,7 +129,6 @@ class NotificationService:
         
         self.db.add(notification)
         self.db.commit()
-        self.db.refresh(notification)
         
         logger.info(
             "Review notification created",
@@ -168,7 +166,6 @@ class NotificationService:
         
         self.db.add(notification)
         self.db.commit()
-        self.db.refresh(notification)
         
         logger.info(
             "Error notification created",
@@ -203,7 +200,6 @@ class NotificationService:
         
         self.db.add(notification)
         self.db.commit()
-        self.db.refresh(notification)
         
         logger.warning(
             "Virus notification created",
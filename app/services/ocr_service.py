@@ -1,23 +1,81 @@
 """OCR service for extracting text from images and PDFs."""
 
+import atexit
+import csv
+import hashlib
 import io
 import os
 import tempfile
+import threading
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from functools import lru_cache
 from typing import List, Optional, Tuple
 import structlog
 
-from PIL import Image
-import pytesseract
-from pdf2image import convert_from_bytes
-import pdfplumber
-from docx import Document
-
 from ..core.config import get_settings
 
 logger = structlog.get_logger()
 
+IMAGE_EXTENSIONS = frozenset({'jpg', 'jpeg', 'png', 'gif', 'bmp', 'tiff', 'tif'})
+
+# Gray level above which a pixel becomes white when binarizing for OCR
+OCR_BINARIZE_THRESHOLD = 180
+
+# One warm tesserocr API per worker thread: the LSTM model is loaded once
+# and reused by every TesseractOCR instance running on that thread
+_tess_local = threading.local()
+_tess_apis: list = []
+_tess_apis_lock = threading.Lock()
+
+# Imaging, PDF and document parsers are imported where they are used so
+# that processes importing this module without OCRing don't pay for them
+
+
+@lru_cache(maxsize=1)
+def _get_pytesseract():
+    """Import pytesseract and apply the configured tesseract command once."""
+    import pytesseract
+    
+    tesseract_cmd = get_settings().tesseract_cmd
+    if tesseract_cmd:
+        pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+    return pytesseract
+
+
+@lru_cache(maxsize=1)
+def _get_tesserocr():
+    """Return the optional in-process libtesseract bindings, or None."""
+    try:
+        import tesserocr
+    except ImportError:
+        return None
+    return tesserocr
+
+
+def _get_tess_api(psm: int):
+    """Return this thread's tesserocr API, creating it on first use."""
+    api = getattr(_tess_local, "api", None)
+    if api is None:
+        tesserocr = _get_tesserocr()
+        api = tesserocr.PyTessBaseAPI(lang="eng", psm=psm, oem=tesserocr.OEM.LSTM_ONLY)
+        api.SetVariable("preserve_interword_spaces", "1")
+        _tess_local.api = api
+        with _tess_apis_lock:
+            _tess_apis.append(api)
+    else:
+        api.SetPageSegMode(psm)
+    return api
+
+
+@atexit.register
+def _close_tess_apis() -> None:
+    """Release the tesserocr APIs held by worker threads."""
+    with _tess_apis_lock:
+        while _tess_apis:
+            _tess_apis.pop().End()
+
 
 @dataclass
 class OCRResult:
@@ -41,25 +99,75 @@ class OCRService(ABC):
 class TesseractOCR(OCRService):
     """Tesseract-based OCR implementation."""
     
+    # Extraction results shared by all instances, keyed by content hash so a
+    # re-sent attachment is not rasterized and OCR'd again
+    _result_cache: "OrderedDict[Tuple[str, str, str], OCRResult]" = OrderedDict()
+    _result_cache_lock = threading.Lock()
+    
     def __init__(self):
         self.settings = get_settings()
         
-        # Set tesseract command if specified
-        if self.settings.tesseract_cmd:
-            pytesseract.pytesseract.tesseract_cmd = self.settings.tesseract_cmd
+        # LSTM engine with a fixed page segmentation mode skips Tesseract's
+        # automatic layout analysis pass
+        self.tesseract_config = (
+            f"--oem 1 --psm {self.settings.ocr_psm} -c preserve_interword_spaces=1"
+        )
     
     def extract_text(self, content: bytes, content_type: str, filename: str) -> OCRResult:
         """Extract text from file content using Tesseract."""
+        if self.settings.ocr_cache_size <= 0:
+            return self._extract_text(content, content_type, filename)
+        
+        cache_key = (
+            hashlib.sha256(content).hexdigest(),
+            content_type,
+            self._file_extension(filename),
+        )
+        cached = self._get_cached_result(cache_key)
+        if cached is not None:
+            return cached
+        
+        result = self._extract_text(content, content_type, filename)
+        
+        # Empty results may come from a transient failure; don't pin them
+        if result.text:
+            self._cache_result(cache_key, result)
+        return result
+    
+    def _get_cached_result(self, key: Tuple[str, str, str]) -> Optional[OCRResult]:
+        """Return a copy of a cached result, marking it most recently used."""
+        with self._result_cache_lock:
+            result = self._result_cache.get(key)
+            if result is None:
+                return None
+            self._result_cache.move_to_end(key)
+        return replace(result)
+    
+    def _cache_result(self, key: Tuple[str, str, str], result: OCRResult) -> None:
+        """Store a result, evicting the least recently used beyond ocr_cache_size."""
+        max_size = self.settings.ocr_cache_size
+        if max_size <= 0:
+            return
+        with self._result_cache_lock:
+            self._result_cache[key] = replace(result)
+            self._result_cache.move_to_end(key)
+            while len(self._result_cache) > max_size:
+                self._result_cache.popitem(last=False)
+    
+    def _extract_text(self, content: bytes, content_type: str, filename: str) -> OCRResult:
+        """Dispatch extraction on content type / file extension."""
         try:
-            if content_type == 'application/pdf' or filename.lower().endswith('.pdf'):
+            ext = self._file_extension(filename)
+            
+            if content_type == 'application/pdf' or ext == 'pdf':
                 return self._process_pdf(content)
-            elif content_type.startswith('image/') or self._is_image_file(filename):
+            elif content_type.startswith('image/') or ext in IMAGE_EXTENSIONS:
                 return self._process_image(content)
-            elif 'spreadsheet' in content_type or filename.lower().endswith(('.xlsx', '.xls')):
+            elif 'spreadsheet' in content_type or ext in ('xlsx', 'xls'):
                 return self._process_excel(content, filename)
-            elif content_type == 'text/csv' or filename.lower().endswith('.csv'):
+            elif content_type == 'text/csv' or ext == 'csv':
                 return self._process_csv(content)
-            elif 'wordprocessing' in content_type or filename.lower().endswith(('.docx', '.doc')):
+            elif 'wordprocessing' in content_type or ext in ('docx', 'doc'):
                 return self._process_docx(content)
             else:
                 logger.warning(
@@ -81,60 +189,62 @@ class TesseractOCR(OCRService):
             )
     
     def _process_pdf(self, content: bytes) -> OCRResult:
-        """Process PDF file."""
-        all_text = []
-        confidences = []
-        pages_processed = 0
+        """Process PDF file, running OCR only on pages without a text layer."""
+        from pdf2image import convert_from_bytes
+        from PIL import Image
         
         # First, try to extract text directly (for digital PDFs)
-        try:
-            with pdfplumber.open(io.BytesIO(content)) as pdf:
-                for page in pdf.pages:
-                    text = page.extract_text()
-                    if text and text.strip():
-                        all_text.append(text)
-                        confidences.append(0.95)  # High confidence for extracted text
-                        pages_processed += 1
-        except Exception as e:
-            logger.debug("Direct PDF text extraction failed, trying OCR", error=str(e))
+        page_count, page_results = self._extract_pdf_text_layer(content)
         
-        # If no text extracted, use OCR
-        if not all_text:
-            try:
-                # Convert PDF to images
-                images = convert_from_bytes(content, dpi=300)
+        # OCR the remaining pages; rasterize everything if the page count is unknown
+        if page_count is None:
+            ocr_ranges = [(None, None)]
+        else:
+            missing = [i for i in range(page_count) if i not in page_results]
+            ocr_ranges = self._page_ranges(missing)
+        
+        # Rasterized pages go to disk and are loaded one at a time, keeping
+        # peak memory at a single page image regardless of document length
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for first_page, last_page in ocr_ranges:
+                try:
+                    # Convert only this run of pages to images
+                    image_paths = convert_from_bytes(
+                        content,
+                        dpi=self.settings.ocr_dpi,
+                        grayscale=self.settings.ocr_grayscale,
+                        first_page=first_page,
+                        last_page=last_page,
+                        output_folder=tmpdir,
+                        fmt='png',
+                        paths_only=True,
+                        thread_count=os.cpu_count() or 1,
+                    )
+                except Exception as e:
+                    logger.error(
+                        "PDF to image conversion failed",
+                        error=str(e),
+                        first_page=first_page,
+                        last_page=last_page,
+                    )
+                    continue
                 
-                for i, image in enumerate(images):
+                for i, image_path in enumerate(image_paths, (first_page or 1) - 1):
                     try:
-                        # Run OCR with confidence data
-                        data = pytesseract.image_to_data(
-                            image, 
-                            output_type=pytesseract.Output.DICT
-                        )
-                        
-                        # Extract text and confidence
-                        page_text = []
-                        page_confidences = []
-                        
-                        for j, text in enumerate(data['text']):
-                            if text.strip():
-                                page_text.append(text)
-                                conf = data['conf'][j]
-                                if conf > 0:  # -1 means no confidence
-                                    page_confidences.append(conf / 100.0)
-                        
-                        if page_text:
-                            all_text.append(' '.join(page_text))
-                            if page_confidences:
-                                confidences.append(sum(page_confidences) / len(page_confidences))
-                        
-                        pages_processed += 1
-                        
+                        with Image.open(image_path) as image:
+                            image.load()
+                            image = self._preprocess_for_ocr(image)
+                            # Run OCR with confidence data
+                            page_results[i] = self._ocr_image(image)
                     except Exception as e:
                         logger.error(f"OCR failed for page {i}", error=str(e))
-                        
-            except Exception as e:
-                logger.error("PDF to image conversion failed", error=str(e))
+                    finally:
+                        os.remove(image_path)
+        
+        # Merge direct and OCR text back into page order
+        ordered = [page_results[i] for i in sorted(page_results)]
+        all_text = [text for text, _ in ordered if text]
+        confidences = [conf for text, conf in ordered if text and conf is not None]
         
         combined_text = '\n\n'.join(all_text)
         avg_confidence = sum(confidences) / len(confidences) if confidences else 0.0
@@ -143,41 +253,95 @@ class TesseractOCR(OCRService):
             text=combined_text,
             confidence=avg_confidence,
             provider="tesseract",
-            pages_processed=pages_processed
+            pages_processed=len(ordered)
         )
     
+    def _extract_pdf_text_layer(self, content: bytes) -> Tuple[Optional[int], dict]:
+        """
+        Read the embedded text of each PDF page.
+        
+        Uses pdfium's native text extraction; pdfplumber's layout-aware parse
+        is only run for the rare pages where pdfium sees glyphs but returns
+        no text.
+        
+        Returns:
+            Tuple of (page count or None if the PDF could not be opened,
+            dict of page index -> (text, confidence) for pages with text).
+        """
+        import pypdfium2 as pdfium
+        
+        page_results: dict = {}
+        page_count = None
+        glyph_pages = []
+        
+        try:
+            pdf = pdfium.PdfDocument(content)
+        except Exception as e:
+            logger.debug("Direct PDF text extraction failed, trying OCR", error=str(e))
+            return page_count, page_results
+        
+        try:
+            page_count = len(pdf)
+            for i in range(page_count):
+                page = pdf[i]
+                textpage = page.get_textpage()
+                try:
+                    text = textpage.get_text_range()
+                    if text and text.strip():
+                        # High confidence for extracted text
+                        page_results[i] = (text.replace('\r\n', '\n'), 0.95)
+                    elif textpage.count_chars() > 0:
+                        glyph_pages.append(i)
+                finally:
+                    textpage.close()
+                    page.close()
+        except Exception as e:
+            logger.debug("Direct PDF text extraction failed, trying OCR", error=str(e))
+        finally:
+            pdf.close()
+        
+        if glyph_pages:
+            import pdfplumber
+            
+            try:
+                with pdfplumber.open(io.BytesIO(content)) as plumber_pdf:
+                    for i in glyph_pages:
+                        text = plumber_pdf.pages[i].extract_text()
+                        if text and text.strip():
+                            page_results[i] = (text, 0.95)
+            except Exception as e:
+                logger.debug("pdfplumber fallback extraction failed", error=str(e))
+        
+        return page_count, page_results
+    
+    @staticmethod
+    def _page_ranges(page_indexes: List[int]) -> List[Tuple[int, int]]:
+        """Group 0-based page indexes into contiguous 1-based (first, last) ranges."""
+        ranges: List[Tuple[int, int]] = []
+        for index in sorted(page_indexes):
+            page = index + 1
+            if ranges and ranges[-1][1] == page - 1:
+                ranges[-1] = (ranges[-1][0], page)
+            else:
+                ranges.append((page, page))
+        return ranges
+    
     def _process_image(self, content: bytes) -> OCRResult:
         """Process image file with OCR."""
         try:
+            from PIL import Image
+            
             image = Image.open(io.BytesIO(content))
             
             # Preprocess for better OCR
-            if image.mode != 'RGB':
-                image = image.convert('RGB')
-            
-            # Get OCR data with confidence
-            data = pytesseract.image_to_data(
-                image,
-                output_type=pytesseract.Output.DICT
-            )
-            
-            # Extract text and confidence
-            texts = []
-            confidences = []
-            
-            for i, text in enumerate(data['text']):
-                if text.strip():
-                    texts.append(text)
-                    conf = data['conf'][i]
-                    if conf > 0:
-                        confidences.append(conf / 100.0)
+            image = self._preprocess_for_ocr(image)
             
-            combined_text = ' '.join(texts)
-            avg_confidence = sum(confidences) / len(confidences) if confidences else 0.0
+            # Get OCR text with confidence
+            combined_text, avg_confidence = self._ocr_image(image)
             
             return OCRResult(
                 text=combined_text,
-                confidence=avg_confidence,
+                confidence=avg_confidence or 0.0,
                 provider="tesseract",
                 pages_processed=1
             )
@@ -186,6 +350,98 @@ class TesseractOCR(OCRService):
             logger.error("Image OCR failed", error=str(e))
             return OCRResult(text="", confidence=0.0, provider="tesseract")
     
+    def _ocr_image(self, image) -> Tuple[str, Optional[float]]:
+        """
+        Run Tesseract on a PIL image.
+        
+        Uses tesserocr's in-process API when it is installed, avoiding the
+        PNG encode + subprocess spawn pytesseract pays on every call.
+        
+        Returns:
+            Tuple of (space-joined words, average confidence on a 0-1 scale or
+            None when no word carried a confidence score).
+        """
+        tesserocr = _get_tesserocr()
+        if tesserocr is None:
+            pytesseract = _get_pytesseract()
+            data = pytesseract.image_to_data(
+                image,
+                output_type=pytesseract.Output.DICT,
+                config=self.tesseract_config,
+            )
+            return self._aggregate_tesseract_data(data)
+        
+        api = _get_tess_api(self.settings.ocr_psm)
+        api.SetImage(image)
+        api.Recognize()
+        
+        words = []
+        confidences = []
+        iterator = api.GetIterator()
+        if iterator is not None:
+            level = tesserocr.RIL.WORD
+            for word in tesserocr.iterate_level(iterator, level):
+                text = word.GetUTF8Text(level)
+                if text and text.strip():
+                    words.append(text)
+                    conf = word.Confidence(level)
+                    if conf > 0:
+                        confidences.append(conf)
+        
+        avg_confidence = sum(confidences) / len(confidences) / 100.0 if confidences else None
+        return ' '.join(words), avg_confidence
+    
+    def _preprocess_for_ocr(self, image):
+        """Prepare a PIL image for Tesseract according to the OCR settings."""
+        if self.settings.ocr_preprocess:
+            from PIL import ImageOps
+            
+            # Upright, contrast-stretched 1-bit image: less work for Tesseract
+            # and a much smaller PNG handed to the tesseract process
+            image = ImageOps.exif_transpose(image).convert('L')
+            image = ImageOps.autocontrast(image, cutoff=2)
+            return image.point(
+                lambda p: 255 if p > OCR_BINARIZE_THRESHOLD else 0,
+                mode='1',
+            )
+        
+        # Tesseract works on a single channel anyway
+        target_mode = 'L' if self.settings.ocr_grayscale else 'RGB'
+        if image.mode != target_mode:
+            image = image.convert(target_mode)
+        return image
+    
+    @staticmethod
+    def _aggregate_tesseract_data(data: dict) -> Tuple[str, Optional[float]]:
+        """
+        Collapse a pytesseract ``image_to_data`` dict into text and confidence.
+        
+        Works on the ``text``/``conf`` columns as numpy arrays so the per-word
+        filtering and averaging run as array operations instead of a Python loop.
+        
+        Returns:
+            Tuple of (space-joined words, average confidence on a 0-1 scale or
+            None when no word carried a confidence score).
+        """
+        import numpy as np
+        
+        texts = np.asarray(data['text'], dtype=object)
+        if texts.size == 0:
+            return "", None
+        
+        # -1 means no confidence (block/line rows); newer Tesseract reports floats
+        conf = np.asarray(data['conf'], dtype=np.float64)
+        has_text = np.fromiter(
+            (bool(t and t.strip()) for t in texts),
+            dtype=bool,
+            count=texts.size,
+        )
+        has_conf = has_text & (conf > 0)
+        
+        text = ' '.join(texts[has_text].tolist())
+        avg_confidence = float(conf[has_conf].mean()) / 100.0 if has_conf.any() else None
+        return text, avg_confidence
+    
     def _process_excel(self, content: bytes, filename: str) -> OCRResult:
         """Extract text from Excel files."""
         try:
@@ -206,10 +462,7 @@ class TesseractOCR(OCRService):
                 text_parts.append("Headers: " + ", ".join(headers))
                 
                 # Add data rows
-                for _, row in df.iterrows():
-                    row_text = " | ".join([str(v) for v in row.values if pd.notna(v)])
-                    if row_text.strip():
-                        text_parts.append(row_text)
+                text_parts.extend(self._dataframe_rows_to_text(df))
                 
                 all_text.append('\n'.join(text_parts))
             
@@ -227,62 +480,72 @@ class TesseractOCR(OCRService):
     def _process_csv(self, content: bytes) -> OCRResult:
         """Extract text from CSV files."""
         try:
-            import pandas as pd
-            
-            # Try different encodings
-            text_content = None
-            for encoding in ['utf-8', 'latin-1', 'cp1252']:
-                try:
-                    text_content = content.decode(encoding)
-                    break
-                except UnicodeDecodeError:
-                    continue
+            text_content = self._decode_text(content)
             
             if not text_content:
-                return OCRResult(text="", confidence=0.0, provider="pandas")
+                return OCRResult(text="", confidence=0.0, provider="csv")
             
-            df = pd.read_csv(io.StringIO(text_content))
+            reader = csv.reader(io.StringIO(text_content))
+            headers = next(reader, None)
+            if headers is None:
+                return OCRResult(text="", confidence=0.0, provider="csv")
             
             # Convert to text
-            text_parts = []
-            
-            # Headers
-            headers = [str(col) for col in df.columns]
-            text_parts.append("Headers: " + ", ".join(headers))
+            text_parts = ["Headers: " + ", ".join(headers)]
             
             # Data rows
-            for _, row in df.iterrows():
-                row_text = " | ".join([str(v) for v in row.values if pd.notna(v)])
-                if row_text.strip():
+            for row in reader:
+                row_text = " | ".join(v for v in row if v.strip())
+                if row_text:
                     text_parts.append(row_text)
             
             return OCRResult(
                 text='\n'.join(text_parts),
                 confidence=0.98,
-                provider="pandas",
+                provider="csv",
                 pages_processed=1
             )
             
         except Exception as e:
             logger.error("CSV extraction failed", error=str(e))
-            return OCRResult(text="", confidence=0.0, provider="pandas")
+            return OCRResult(text="", confidence=0.0, provider="csv")
+    
+    @staticmethod
+    def _decode_text(content: bytes) -> str:
+        """Decode text content, running charset detection only when it is not UTF-8."""
+        try:
+            return content.decode('utf-8')
+        except UnicodeDecodeError:
+            pass
+        
+        from charset_normalizer import from_bytes as detect_charset
+        
+        match = detect_charset(content).best()
+        if match is not None:
+            return str(match)
+        return content.decode('cp1252', errors='replace')
+    
+    @staticmethod
+    def _dataframe_rows_to_text(df) -> List[str]:
+        """
+        Render DataFrame rows as " | "-joined non-empty cells.
+        
+        Stringifies and masks NaNs for the whole frame at once and walks the
+        resulting ndarray, avoiding the per-row Series that iterrows builds.
+        """
+        values = df.astype(str).where(df.notna(), "").to_numpy()
+        lines = (" | ".join(v for v in row if v) for row in values)
+        return [line for line in lines if line.strip()]
     
     def _process_docx(self, content: bytes) -> OCRResult:
         """Extract text from DOCX files."""
         try:
-            doc = Document(io.BytesIO(content))
+            from docx import Document
             
-            paragraphs = [p.text for p in doc.paragraphs if p.text.strip()]
-            
-            # Also extract from tables
-            for table in doc.tables:
-                for row in table.rows:
-                    row_text = " | ".join([cell.text for cell in row.cells if cell.text.strip()])
-                    if row_text.strip():
-                        paragraphs.append(row_text)
+            doc = Document(io.BytesIO(content))
             
             return OCRResult(
-                text='\n'.join(paragraphs),
+                text='\n'.join(self._iter_docx_lines(doc)),
                 confidence=0.98,
                 provider="python-docx",
                 pages_processed=1
@@ -292,11 +555,32 @@ class TesseractOCR(OCRService):
             logger.error("DOCX extraction failed", error=str(e))
             return OCRResult(text="", confidence=0.0, provider="python-docx")
     
+    @staticmethod
+    def _iter_docx_lines(doc):
+        """Yield non-empty paragraph texts, then " | "-joined table rows."""
+        for paragraph in doc.paragraphs:
+            text = paragraph.text
+            if text.strip():
+                yield text
+        
+        # Also extract from tables
+        for table in doc.tables:
+            for row in table.rows:
+                row_text = " | ".join(
+                    text for text in (cell.text for cell in row.cells) if text.strip()
+                )
+                if row_text:
+                    yield row_text
+    
+    @staticmethod
+    def _file_extension(filename: str) -> str:
+        """Return the lowercased extension of filename without the dot."""
+        _, dot, ext = filename.rpartition('.')
+        return ext.lower() if dot else ''
+    
     def _is_image_file(self, filename: str) -> bool:
         """Check if filename indicates an image file."""
-        image_extensions = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.tif'}
-        ext = os.path.splitext(filename)[1].lower()
-        return ext in image_extensions
+        return self._file_extension(filename) in IMAGE_EXTENSIONS
 
 
 def get_ocr_service() -> OCRService:
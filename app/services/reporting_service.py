@@ -3,11 +3,11 @@
 import logging
 from datetime import date
 from decimal import Decimal
-from typing import Dict, List, Any, Optional
+from typing import Dict, Any, Optional
 from uuid import UUID
 
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_, case, select
+from sqlalchemy import func, and_, or_, case, select, tuple_
 from sqlalchemy.dialects.postgresql import UUID as PGUUID
 
 from app.models.accounting import (
@@ -41,7 +41,8 @@ def get_profit_and_loss(
         granularity: "monthly", "quarterly", or "yearly"
     
     Returns:
-        Dict with periods, accounts, and totals
+        Dict with periods, accounts, and totals; amounts are exact Decimals
+        (the response schemas convert them to floats)
     """
     # Build period extraction based on granularity
     if granularity == "monthly":
@@ -58,7 +59,8 @@ def get_profit_and_loss(
     else:
         period_expr = func.to_char(JournalEntry.date, "YYYY-MM")
     
-    # Query journal lines with joins
+    # Per-account-per-period rows, per-account totals and per-type totals
+    # all come back from one GROUPING SETS query; GROUPING() tells them apart
     query = (
         db.query(
             ChartOfAccount.id.label("account_id"),
@@ -72,7 +74,9 @@ def get_profit_and_loss(
                     (ChartOfAccount.account_type == AccountType.EXPENSE, JournalLine.debit - JournalLine.credit),
                     else_=0
                 )
-            ).label("net_amount")
+            ).label("net_amount"),
+            func.grouping(ChartOfAccount.id).label("account_grouping"),
+            func.grouping(period_expr).label("period_grouping"),
         )
         .join(JournalLine, JournalLine.account_id == ChartOfAccount.id)
         .join(JournalEntry, JournalEntry.id == JournalLine.journal_entry_id)
@@ -84,26 +88,46 @@ def get_profit_and_loss(
             ChartOfAccount.account_type.in_([AccountType.REVENUE, AccountType.EXPENSE])
         )
         .group_by(
-            ChartOfAccount.id,
-            ChartOfAccount.code,
-            ChartOfAccount.name,
-            ChartOfAccount.account_type,
-            period_expr
+            func.grouping_sets(
+                tuple_(
+                    ChartOfAccount.id,
+                    ChartOfAccount.code,
+                    ChartOfAccount.name,
+                    ChartOfAccount.account_type,
+                    period_expr,
+                ),
+                tuple_(
+                    ChartOfAccount.id,
+                    ChartOfAccount.code,
+                    ChartOfAccount.name,
+                    ChartOfAccount.account_type,
+                ),
+                tuple_(ChartOfAccount.account_type),
+            )
         )
         .order_by(ChartOfAccount.code, period_expr)
     )
     
+    # NUMERIC aggregates already come back as Decimal; no str() round trip needed
     results = query.all()
     
     # Organize data by account
     accounts_dict: Dict[str, Dict[str, Any]] = {}
     periods_set = set()
+    type_totals = {
+        AccountType.REVENUE: Decimal("0.00"),
+        AccountType.EXPENSE: Decimal("0.00"),
+    }
     
     for row in results:
-        account_key = str(row.account_id)
-        period = row.period
+        net_amount = row.net_amount or Decimal("0.00")
         
-        periods_set.add(period)
+        # Revenue / expense grand total row
+        if row.account_grouping:
+            type_totals[row.account_type] = net_amount
+            continue
+        
+        account_key = str(row.account_id)
         
         if account_key not in accounts_dict:
             accounts_dict[account_key] = {
@@ -115,23 +139,16 @@ def get_profit_and_loss(
                 "total": Decimal("0.00")
             }
         
-        net_amount = Decimal(str(row.net_amount or 0))
-        accounts_dict[account_key]["period_amounts"][period] = float(net_amount)
-        accounts_dict[account_key]["total"] += net_amount
-    
-    # Convert to list and format totals
-    accounts = []
-    total_revenue = Decimal("0.00")
-    total_expenses = Decimal("0.00")
-    
-    for acc in accounts_dict.values():
-        acc["total"] = float(acc["total"])
-        accounts.append(acc)
-        
-        if acc["type"] == "REVENUE":
-            total_revenue += Decimal(str(acc["total"]))
-        elif acc["type"] == "EXPENSE":
-            total_expenses += Decimal(str(acc["total"]))
+        if row.period_grouping:
+            # Account total across all periods
+            accounts_dict[account_key]["total"] = net_amount
+        else:
+            periods_set.add(row.period)
+            accounts_dict[account_key]["period_amounts"][row.period] = net_amount
+    
+    accounts = list(accounts_dict.values())
+    total_revenue = type_totals[AccountType.REVENUE]
+    total_expenses = type_totals[AccountType.EXPENSE]
     
     # Sort periods
     periods = sorted(list(periods_set))
@@ -142,9 +159,9 @@ def get_profit_and_loss(
         "periods": periods,
         "accounts": accounts,
         "totals": {
-            "revenue": float(total_revenue),
-            "expenses": float(total_expenses),
-            "net_profit": float(net_profit)
+            "revenue": total_revenue,
+            "expenses": total_expenses,
+            "net_profit": net_profit
         }
     }
 
@@ -163,7 +180,8 @@ def get_balance_sheet(
         as_of: As-of date
     
     Returns:
-        Dict with sections (Assets, Liabilities, Equity) and totals
+        Dict with sections (Assets, Liabilities, Equity) and totals;
+        amounts are exact Decimals (the response schemas convert them to floats)
     """
     # Query all accounts with their balances
     query = (
@@ -227,12 +245,12 @@ def get_balance_sheet(
     total_equity = Decimal("0.00")
     
     for row in results:
-        balance = Decimal(str(row.balance or 0))
+        balance = row.balance or Decimal("0.00")
         
         account_data = {
             "code": row.code,
             "name": row.name,
-            "balance": float(balance)
+            "balance": balance
         }
         
         if row.account_type == AccountType.ASSET:
@@ -250,21 +268,21 @@ def get_balance_sheet(
     if assets:
         sections.append({
             "name": "Assets",
-            "total": float(total_assets),
+            "total": total_assets,
             "accounts": assets
         })
     
     if liabilities:
         sections.append({
             "name": "Liabilities",
-            "total": float(total_liabilities),
+            "total": total_liabilities,
             "accounts": liabilities
         })
     
     if equity:
         sections.append({
             "name": "Equity",
-            "total": float(total_equity),
+            "total": total_equity,
             "accounts": equity
         })
     
@@ -274,8 +292,8 @@ def get_balance_sheet(
         "as_of": as_of.isoformat(),
         "sections": sections,
         "check": {
-            "assets": float(total_assets),
-            "liabilities_plus_equity": float(liabilities_plus_equity)
+            "assets": total_assets,
+            "liabilities_plus_equity": liabilities_plus_equity
         }
     }
 
@@ -285,7 +303,8 @@ def classify_account_for_cash_flow(account: ChartOfAccount) -> str:
     Classify account for cash flow statement categorization.
     
     Args:
-        account: ChartOfAccount instance
+        account: ChartOfAccount instance, or any row exposing
+            ``account_type`` and ``is_cash``
     
     Returns:
         "OPERATING", "INVESTING", or "FINANCING"
@@ -319,7 +338,8 @@ def get_cash_flow(
         date_to: End date
     
     Returns:
-        Dict with cash flow breakdown by category
+        Dict with cash flow breakdown by category; amounts are exact
+        Decimals (the response schemas convert them to floats)
     """
     # Get opening cash balance (before date_from)
     opening_query = (
@@ -336,104 +356,98 @@ def get_cash_flow(
         )
     )
     opening_result = opening_query.scalar()
-    opening_cash = Decimal(str(opening_result or 0))
-    
-    # Get all journal entries in period that affect cash accounts
-    # We need to find entries where at least one line is a cash account
-    # and categorize based on the other accounts in the same entry
-    
-    # First, get all journal entries in period
-    entries_in_period = (
-        db.query(JournalEntry.id)
-        .filter(
+    opening_cash = opening_result or Decimal("0.00")
+    
+    # Categorize cash movements in SQL: each entry's net cash change is
+    # classified by its first non-cash line and summed per category
+    period_lines = (
+        select(
+            JournalLine.journal_entry_id.label("entry_id"),
+            JournalLine.id.label("line_id"),
+            JournalLine.debit,
+            JournalLine.credit,
+            ChartOfAccount.account_type,
+            ChartOfAccount.is_cash,
+        )
+        .join(ChartOfAccount, ChartOfAccount.id == JournalLine.account_id)
+        .join(JournalEntry, JournalEntry.id == JournalLine.journal_entry_id)
+        .where(
             JournalEntry.company_id == company_id,
             JournalEntry.date >= date_from,
             JournalEntry.date <= date_to,
             JournalEntry.status == JournalStatus.POSTED
         )
+        .cte("period_lines")
+    )
+    
+    # Net cash change per entry (entries without cash lines drop out here)
+    entry_cash = (
+        select(
+            period_lines.c.entry_id,
+            func.sum(period_lines.c.debit - period_lines.c.credit).label("cash_change"),
+        )
+        .where(period_lines.c.is_cash.is_(True))
+        .group_by(period_lines.c.entry_id)
+        .cte("entry_cash")
+    )
+    
+    # Representative (first) non-cash account per entry
+    entry_counterpart = (
+        select(period_lines.c.entry_id, period_lines.c.account_type)
+        .where(period_lines.c.is_cash.isnot(True))
+        .distinct(period_lines.c.entry_id)
+        .order_by(period_lines.c.entry_id, period_lines.c.line_id)
+        .cte("entry_counterpart")
+    )
+    
+    # Mirrors classify_account_for_cash_flow; entries with no non-cash
+    # lines have a NULL account_type and fall through to OPERATING
+    entry_flows = (
+        select(
+            case(
+                (
+                    entry_counterpart.c.account_type.in_([AccountType.REVENUE, AccountType.EXPENSE]),
+                    "OPERATING"
+                ),
+                (entry_counterpart.c.account_type == AccountType.ASSET, "INVESTING"),
+                (
+                    entry_counterpart.c.account_type.in_([AccountType.LIABILITY, AccountType.EQUITY]),
+                    "FINANCING"
+                ),
+                else_="OPERATING"
+            ).label("category"),
+            entry_cash.c.cash_change,
+        )
+        .select_from(entry_cash)
+        .outerjoin(entry_counterpart, entry_counterpart.c.entry_id == entry_cash.c.entry_id)
+        .where(entry_cash.c.cash_change != 0)
         .subquery()
     )
     
-    # Get all lines for these entries
-    all_lines_query = (
+    flows_query = (
         db.query(
-            JournalEntry.id.label("entry_id"),
-            JournalLine.account_id,
-            ChartOfAccount.account_type,
-            ChartOfAccount.is_cash,
-            JournalLine.debit,
-            JournalLine.credit
+            entry_flows.c.category,
+            func.sum(
+                case((entry_flows.c.cash_change > 0, entry_flows.c.cash_change), else_=0)
+            ).label("inflows"),
+            func.sum(
+                case((entry_flows.c.cash_change < 0, -entry_flows.c.cash_change), else_=0)
+            ).label("outflows"),
         )
-        .join(ChartOfAccount, ChartOfAccount.id == JournalLine.account_id)
-        .join(JournalEntry, JournalEntry.id == JournalLine.journal_entry_id)
-        .filter(JournalEntry.id.in_(select(entries_in_period.c.id)))
+        .group_by(entry_flows.c.category)
     )
     
-    all_lines = all_lines_query.all()
-    
-    # Group by entry_id
-    entries_dict: Dict[UUID, List[Any]] = {}
-    for line in all_lines:
-        entry_id = line.entry_id
-        if entry_id not in entries_dict:
-            entries_dict[entry_id] = []
-        entries_dict[entry_id].append(line)
-    
-    # Categorize cash flows
-    operating_inflows = Decimal("0.00")
-    operating_outflows = Decimal("0.00")
-    investing_inflows = Decimal("0.00")
-    investing_outflows = Decimal("0.00")
-    financing_inflows = Decimal("0.00")
-    financing_outflows = Decimal("0.00")
-    
-    for entry_id, lines in entries_dict.items():
-        # Find cash lines in this entry
-        cash_lines = [l for l in lines if l.is_cash]
-        non_cash_lines = [l for l in lines if not l.is_cash]
-        
-        if not cash_lines:
-            continue  # Skip entries that don't affect cash
-        
-        # Calculate net cash change for this entry
-        cash_change = sum(Decimal(str(l.debit)) - Decimal(str(l.credit)) for l in cash_lines)
-        
-        if cash_change == 0:
-            continue
-        
-        # Categorize based on non-cash accounts in the entry
-        # If no non-cash lines, default to operating
-        if not non_cash_lines:
-            category = "OPERATING"
-        else:
-            # Use the first non-cash account to determine category
-            first_non_cash = non_cash_lines[0]
-            # Get the account to classify
-            account = db.query(ChartOfAccount).filter(
-                ChartOfAccount.id == first_non_cash.account_id
-            ).first()
-            
-            if account:
-                category = classify_account_for_cash_flow(account)
-            else:
-                category = "OPERATING"
-        
-        # Categorize the cash flow
-        if cash_change > 0:  # Cash inflow
-            if category == "OPERATING":
-                operating_inflows += cash_change
-            elif category == "INVESTING":
-                investing_inflows += cash_change
-            elif category == "FINANCING":
-                financing_inflows += cash_change
-        else:  # Cash outflow
-            abs_change = abs(cash_change)
-            if category == "OPERATING":
-                operating_outflows += abs_change
-            elif category == "INVESTING":
-                investing_outflows += abs_change
-            elif category == "FINANCING":
-                financing_outflows += abs_change
+    flows = {
+        row.category: (
+            row.inflows or Decimal("0.00"),
+            row.outflows or Decimal("0.00"),
+        )
+        for row in flows_query.all()
+    }
+    zero = (Decimal("0.00"), Decimal("0.00"))
+    operating_inflows, operating_outflows = flows.get("OPERATING", zero)
+    investing_inflows, investing_outflows = flows.get("INVESTING", zero)
+    financing_inflows, financing_outflows = flows.get("FINANCING", zero)
     
     # Calculate net changes
     operating_net = operating_inflows - operating_outflows
@@ -448,25 +462,25 @@ def get_cash_flow(
             "from": date_from.isoformat(),
             "to": date_to.isoformat()
         },
-        "opening_cash": float(opening_cash),
-        "closing_cash": float(closing_cash),
+        "opening_cash": opening_cash,
+        "closing_cash": closing_cash,
         "categories": {
             "OPERATING": {
-                "inflows": float(operating_inflows),
-                "outflows": float(operating_outflows),
-                "net": float(operating_net)
+                "inflows": operating_inflows,
+                "outflows": operating_outflows,
+                "net": operating_net
             },
             "INVESTING": {
-                "inflows": float(investing_inflows),
-                "outflows": float(investing_outflows),
-                "net": float(investing_net)
+                "inflows": investing_inflows,
+                "outflows": investing_outflows,
+                "net": investing_net
             },
             "FINANCING": {
-                "inflows": float(financing_inflows),
-                "outflows": float(financing_outflows),
-                "net": float(financing_net)
+                "inflows": financing_inflows,
+                "outflows": financing_outflows,
+                "net": financing_net
             }
         },
-        "net_change_in_cash": float(net_change)
+        "net_change_in_cash": net_change
     }
 
@@ -1,11 +1,15 @@
 from .virus_scanner import VirusScanner, ScanResult
 from .file_validator import FileValidator, ValidationResult
+from .upload_screening import ScreeningResult, screen_upload, screen_uploads
 
 __all__ = [
     "VirusScanner",
     "ScanResult",
     "FileValidator",
     "ValidationResult",
+    "ScreeningResult",
+    "screen_upload",
+    "screen_uploads",
 ]
 
 
@@ -1,12 +1,87 @@
 import logging
+import re
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Union
 
 logger = logging.getLogger(__name__)
 
-
-@dataclass
+# File content as accepted by the validator and scanner (any bytes-like buffer)
+BytesLike = Union[bytes, bytearray, memoryview]
+
+# Number of leading bytes packed into one integer for signature matching
+MAGIC_PREFIX_LEN = 16
+
+# Executable headers at offset 0, as big-endian integers of the first bytes
+PE_MAGIC_U16 = 0x4D5A  # "MZ"
+EXECUTABLE_MAGIC_U32 = frozenset({
+    0x7F454C46,  # ELF
+    0xFEEDFACE,  # Mach-O 32-bit
+    0xFEEDFACF,  # Mach-O 64-bit
+    0xCAFEBABE,  # Mach-O universal
+})
+
+# Script markers (#!/, #!python, #!bash, @echo off, powershell), matched in
+# a single pass over the scanned prefix
+SCRIPT_MARKERS_RE = re.compile(rb"#!(?:/|python|bash)|@echo off|powershell")
+
+# ASCII control characters (below 0x20) in filenames
+CONTROL_CHARS_RE = re.compile(r"[\x00-\x1f]")
+
+# Characters unsafe in stored filenames, each replaced with "_"
+UNSAFE_FILENAME_CHARS = str.maketrans(dict.fromkeys('<>:"/\\|?*', "_"))
+
+# Compatibility categories for claimed vs detected MIME types: two types are
+# compatible when their category bits overlap
+MIME_IMAGE = 1
+MIME_ZIP_CONTAINER = 2  # ZIP and the Office formats stored as ZIP (XLSX/DOCX)
+MIME_CATEGORIES = {
+    "image/jpeg": MIME_IMAGE,
+    "image/png": MIME_IMAGE,
+    "image/gif": MIME_IMAGE,
+    "image/webp": MIME_IMAGE,
+    "image/tiff": MIME_IMAGE,
+    "application/zip": MIME_ZIP_CONTAINER,
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet": MIME_ZIP_CONTAINER,
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document": MIME_ZIP_CONTAINER,
+}
+
+
+def _mime_category(mime_type: str) -> int:
+    category = MIME_CATEGORIES.get(mime_type)
+    if category is None:
+        # Other image/* types are still images
+        category = MIME_IMAGE if mime_type.startswith("image/") else 0
+    return category
+
+
+def _build_signature_table(signatures: dict) -> tuple:
+    """
+    Precompute (min_length, mask, value, mime_type) rows for magic-byte matching.
+    
+    Each signature becomes a mask with 0xFF over its bytes and the expected
+    bytes at the same positions, both packed big-endian into an integer the
+    width of MAGIC_PREFIX_LEN, so a match is a single AND + compare against
+    the packed file prefix.
+    """
+    table = []
+    for mime_type, entries in signatures.items():
+        for offset, signature in entries:
+            end = offset + len(signature)
+            mask = bytearray(MAGIC_PREFIX_LEN)
+            value = bytearray(MAGIC_PREFIX_LEN)
+            mask[offset:end] = b"\xff" * len(signature)
+            value[offset:end] = signature
+            table.append((
+                end,
+                int.from_bytes(mask, "big"),
+                int.from_bytes(value, "big"),
+                mime_type,
+            ))
+    return tuple(table)
+
+
+@dataclass(slots=True)
 class ValidationResult:
     """Result of file validation."""
     is_valid: bool
@@ -37,9 +112,10 @@ class FileValidator:
         "image/webp": [(0, b"RIFF"), (8, b"WEBP")],
         "image/tiff": [(0, b"II\x2a\x00"), (0, b"MM\x00\x2a")],
     }
+    _SIGNATURE_TABLE = _build_signature_table(MAGIC_SIGNATURES)
 
     # Dangerous extensions
-    DANGEROUS_EXTENSIONS = {
+    DANGEROUS_EXTENSIONS = frozenset({
         ".exe", ".bat", ".cmd", ".com", ".msi", ".scr", ".pif",
         ".vbs", ".vbe", ".js", ".jse", ".wsf", ".wsh",
         ".ps1", ".psm1", ".psd1",
@@ -47,21 +123,23 @@ class FileValidator:
         ".app", ".dmg", ".pkg",
         ".sh", ".bash", ".zsh",
         ".jar", ".class",
-    }
+    })
+    # Dangerous extensions without the dot, for matching inner filename parts
+    DANGEROUS_STEMS = frozenset(ext[1:] for ext in DANGEROUS_EXTENSIONS)
 
     # Allowed extensions
-    ALLOWED_EXTENSIONS = {
+    ALLOWED_EXTENSIONS = frozenset({
         ".pdf", ".xlsx", ".xls", ".csv", ".docx", ".doc",
         ".jpg", ".jpeg", ".png", ".gif", ".tiff", ".tif", ".webp",
         ".zip",
-    }
+    })
 
     def __init__(self, max_file_size: int = 50 * 1024 * 1024):
         self.max_file_size = max_file_size
 
     def validate(
         self,
-        content: bytes,
+        content: BytesLike,
         filename: str,
         claimed_type: Optional[str] = None,
     ) -> ValidationResult:
@@ -69,7 +147,7 @@ class FileValidator:
         Validate a file.
         
         Args:
-            content: File content as bytes
+            content: File content (bytes, bytearray or memoryview; not copied)
             filename: Filename
             claimed_type: Claimed MIME type
         
@@ -101,8 +179,10 @@ class FileValidator:
         if ext not in self.ALLOWED_EXTENSIONS:
             result.warnings.append(f"Unusual file extension: {ext}")
 
-        # Detect actual file type
-        detected_type = self._detect_type(content)
+        # Detect actual file type (the packed prefix is shared with the
+        # executable check below)
+        prefix = self._packed_prefix(content)
+        detected_type = self._detect_type(content, prefix)
         result.detected_type = detected_type
 
         # Verify claimed type matches content
@@ -113,7 +193,7 @@ class FileValidator:
                 )
 
         # Check for executable content in non-executable files
-        if self._contains_executable_markers(content) and ext not in {".zip"}:
+        if self._contains_executable_markers(content, prefix) and ext not in {".zip"}:
             result.is_valid = False
             result.errors.append("File contains executable content")
             return result
@@ -124,13 +204,19 @@ class FileValidator:
 
         return result
 
-    def _detect_type(self, content: bytes) -> Optional[str]:
+    @staticmethod
+    def _packed_prefix(content: BytesLike) -> int:
+        """First MAGIC_PREFIX_LEN bytes as a big-endian integer (zero-padded)."""
+        return int.from_bytes(bytes(content[:MAGIC_PREFIX_LEN]).ljust(MAGIC_PREFIX_LEN, b"\x00"), "big")
+
+    def _detect_type(self, content: BytesLike, prefix: Optional[int] = None) -> Optional[str]:
         """Detect file type from magic bytes."""
-        for mime_type, signatures in self.MAGIC_SIGNATURES.items():
-            for offset, signature in signatures:
-                if len(content) > offset + len(signature):
-                    if content[offset:offset + len(signature)] == signature:
-                        return mime_type
+        size = len(content)
+        if prefix is None:
+            prefix = self._packed_prefix(content)
+        for min_length, mask, value, mime_type in self._SIGNATURE_TABLE:
+            if size > min_length and prefix & mask == value:
+                return mime_type
         return None
 
     def _types_compatible(self, claimed: str, detected: str) -> bool:
@@ -139,41 +225,22 @@ class FileValidator:
         if claimed == detected:
             return True
 
-        # XLSX/DOCX are ZIP files internally
-        if detected == "application/zip" and claimed in {
-            "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-        }:
-            return True
+        # Any two images, or XLSX/DOCX claimed for a ZIP (they are ZIP files
+        # internally)
+        return _mime_category(claimed) & _mime_category(detected) != 0
 
-        # Image type variations
-        if claimed.startswith("image/") and detected.startswith("image/"):
-            return True
-
-        return False
-
-    def _contains_executable_markers(self, content: bytes) -> bool:
+    def _contains_executable_markers(self, content: BytesLike, prefix: Optional[int] = None) -> bool:
         """Check for executable content markers."""
-        # PE executable (Windows)
-        if content[:2] == b"MZ":
-            return True
+        if prefix is None:
+            prefix = self._packed_prefix(content)
 
-        # ELF executable (Linux)
-        if content[:4] == b"\x7fELF":
-            return True
-
-        # Mach-O (macOS)
-        if content[:4] in {b"\xfe\xed\xfa\xce", b"\xfe\xed\xfa\xcf", b"\xca\xfe\xba\xbe"}:
+        # PE (Windows), ELF (Linux) and Mach-O (macOS) headers
+        head = prefix >> (8 * (MAGIC_PREFIX_LEN - 4))
+        if head >> 16 == PE_MAGIC_U16 or head in EXECUTABLE_MAGIC_U32:
             return True
 
         # Script markers in first 1KB
-        script_markers = [b"#!/", b"#!python", b"#!bash", b"@echo off", b"powershell"]
-        first_kb = content[:1024]
-        for marker in script_markers:
-            if marker in first_kb:
-                return True
-
-        return False
+        return SCRIPT_MARKERS_RE.search(content, 0, 1024) is not None
 
     def _validate_filename(self, filename: str) -> list[str]:
         """Validate filename for security issues."""
@@ -188,7 +255,7 @@ class FileValidator:
             issues.append("Filename contains null bytes")
 
         # Check for control characters
-        if any(ord(c) < 32 for c in filename):
+        if CONTROL_CHARS_RE.search(filename):
             issues.append("Filename contains control characters")
 
         # Check length
@@ -199,7 +266,7 @@ class FileValidator:
         parts = filename.split(".")
         if len(parts) > 2:
             for part in parts[1:-1]:
-                if f".{part}" in self.DANGEROUS_EXTENSIONS:
+                if part.lower() in self.DANGEROUS_STEMS:
                     issues.append(f"Suspicious double extension: {filename}")
 
         return issues
@@ -210,18 +277,15 @@ class FileValidator:
         filename = Path(filename).name
 
         # Remove control characters
-        filename = "".join(c for c in filename if ord(c) >= 32)
+        filename = CONTROL_CHARS_RE.sub("", filename)
 
-        # Remove/replace dangerous characters
-        dangerous_chars = '<>:"/\\|?*'
-        for char in dangerous_chars:
-            filename = filename.replace(char, "_")
+        # Replace dangerous characters
+        filename = filename.translate(UNSAFE_FILENAME_CHARS)
 
         # Limit length
         if len(filename) > 200:
-            name = Path(filename).stem[:150]
-            ext = Path(filename).suffix
-            filename = f"{name}{ext}"
+            path = Path(filename)
+            filename = f"{path.stem[:150]}{path.suffix}"
 
         return filename or "unnamed_file"
 
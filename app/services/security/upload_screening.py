@@ -0,0 +1,103 @@
+import asyncio
+import hashlib
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+from .file_validator import BytesLike, FileValidator, ValidationResult
+from .virus_scanner import ScanResult, VirusScanner
+
+
+@dataclass
+class ScreeningResult:
+    """Result of screening an uploaded file."""
+    validation: ValidationResult
+    scan: Optional[ScanResult] = None  # None when validation rejected the file
+    content_hash: Optional[str] = None  # SHA-256 hex digest
+
+    @property
+    def is_accepted(self) -> bool:
+        return self.validation.is_valid and self.scan is not None and self.scan.is_clean
+
+
+def _sha256_hexdigest(content: BytesLike) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+async def screen_upload(
+    content: BytesLike,
+    filename: str,
+    claimed_type: Optional[str] = None,
+    validator: Optional[FileValidator] = None,
+    scanner: Optional[VirusScanner] = None,
+    content_hash: Optional[str] = None,
+) -> ScreeningResult:
+    """
+    Validate, virus scan and hash file content before it is stored.
+
+    Validation only inspects the size and the first KB, so it runs inline
+    and rejects bad files before anything is sent to clamd. The scan
+    (network I/O) and the SHA-256 (a thread; hashlib releases the GIL)
+    then run concurrently over the same buffer.
+
+    Args:
+        content: File content (bytes, bytearray or memoryview; not copied)
+        filename: Filename
+        claimed_type: Claimed MIME type
+        validator: FileValidator to use (default: new instance)
+        scanner: VirusScanner to use (default: new instance)
+        content_hash: SHA-256 hex digest if the caller already has it
+
+    Returns:
+        ScreeningResult; pass content_hash on to the storage upload
+    """
+    validator = validator or FileValidator()
+    validation = validator.validate(content, filename, claimed_type)
+    if not validation.is_valid:
+        return ScreeningResult(validation=validation)
+
+    scanner = scanner or VirusScanner()
+    if content_hash:
+        scan = await scanner.scan(content)
+    else:
+        content_hash, scan = await asyncio.gather(
+            asyncio.to_thread(_sha256_hexdigest, content),
+            scanner.scan(content),
+        )
+    return ScreeningResult(validation=validation, scan=scan, content_hash=content_hash)
+
+
+async def screen_uploads(
+    items: Sequence[Tuple[BytesLike, str, Optional[str]]],
+    validator: Optional[FileValidator] = None,
+    scanner: Optional[VirusScanner] = None,
+    content_hashes: Optional[Sequence[str]] = None,
+) -> List[ScreeningResult]:
+    """
+    Screen several files at once.
+
+    All scans and hashes are in flight together instead of one file after
+    another; results come back in the order of `items`.
+
+    Args:
+        items: (content, filename, claimed_type) per file
+        validator: FileValidator to use (default: new instance)
+        scanner: VirusScanner to use (default: new instance)
+        content_hashes: SHA-256 hex digests per item, if already computed
+
+    Returns:
+        One ScreeningResult per item
+    """
+    validator = validator or FileValidator()
+    scanner = scanner or VirusScanner()
+    content_hashes = content_hashes or [None] * len(items)
+    return list(await asyncio.gather(*(
+        screen_upload(
+            content,
+            filename,
+            claimed_type,
+            validator=validator,
+            scanner=scanner,
+            content_hash=content_hash,
+        )
+        for (content, filename, claimed_type), content_hash in zip(items, content_hashes)
+    )))
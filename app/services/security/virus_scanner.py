@@ -1,13 +1,143 @@
 import asyncio
 import logging
-import socket
+import struct
+import time
+import weakref
 from dataclasses import dataclass
-from typing import Optional
+from typing import Dict, Optional, Tuple
 
 from app.core.config import get_settings
 
+from .file_validator import BytesLike
+
 logger = logging.getLogger(__name__)
 
+# INSTREAM chunk size (clamd's default read buffer)
+INSTREAM_CHUNK_SIZE = 64 * 1024
+# Zero-length chunk that terminates an INSTREAM upload
+INSTREAM_END = b"\x00\x00\x00\x00"
+# Concurrent clamd connections per (host, port); also the idle sessions kept
+CLAMD_POOL_SIZE = 4
+
+
+class _ClamdSession:
+    """A clamd connection in IDSESSION mode.
+
+    Commands are null-terminated (``z`` prefix) and each reply is prefixed
+    with the request id clamd assigns, starting at 1 for a new session.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self._next_id = 1
+
+    async def request(self, command: bytes, payload: Optional[BytesLike] = None) -> str:
+        self.writer.write(b"z" + command + b"\0")
+        if payload is not None:
+            view = memoryview(payload)
+            for i in range(0, len(view), INSTREAM_CHUNK_SIZE):
+                chunk = view[i:i + INSTREAM_CHUNK_SIZE]
+                self.writer.write(struct.pack("!I", len(chunk)))
+                self.writer.write(chunk)
+                await self.writer.drain()
+            self.writer.write(INSTREAM_END)
+        await self.writer.drain()
+
+        reply = (await self.reader.readuntil(b"\0"))[:-1].decode("utf-8").strip()
+        prefix = f"{self._next_id}: "
+        self._next_id += 1
+        if reply.startswith(prefix):
+            reply = reply[len(prefix):]
+        return reply
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+class _ClamdPool:
+    """IDSESSION connections to one clamd, reused across calls.
+
+    At most `size` commands run at once; further callers wait for a slot
+    instead of opening more connections than clamd's thread pool serves.
+    """
+
+    def __init__(self, host: str, port: int, size: int = CLAMD_POOL_SIZE):
+        self.host = host
+        self.port = port
+        self._idle: asyncio.LifoQueue = asyncio.LifoQueue(maxsize=size)
+        self._slots = asyncio.Semaphore(size)
+
+    async def _connect(self) -> _ClamdSession:
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        writer.write(b"zIDSESSION\0")
+        return _ClamdSession(reader, writer)
+
+    async def _request_on(
+        self, session: _ClamdSession, command: bytes, payload: Optional[BytesLike]
+    ) -> str:
+        try:
+            reply = await session.request(command, payload)
+        except BaseException:
+            session.close()
+            raise
+
+        # clamd ends the session after an ERROR reply (e.g. size limit exceeded)
+        if reply.endswith("ERROR"):
+            session.close()
+            return reply
+        try:
+            self._idle.put_nowait(session)
+        except asyncio.QueueFull:
+            session.close()
+        return reply
+
+    async def execute(
+        self,
+        command: bytes,
+        payload: Optional[BytesLike] = None,
+        timeout: Optional[float] = None,
+    ) -> str:
+        """
+        Run one command on a pooled session once a slot is free.
+
+        `timeout` covers the command itself, not the wait for a slot, so a
+        large batch queues instead of timing out behind other scans.
+        """
+        async with self._slots:
+            return await asyncio.wait_for(self._execute(command, payload), timeout=timeout)
+
+    async def _execute(self, command: bytes, payload: Optional[BytesLike]) -> str:
+        """Run one command on a pooled session, opening one if none is idle."""
+        try:
+            session = self._idle.get_nowait()
+        except asyncio.QueueEmpty:
+            return await self._request_on(await self._connect(), command, payload)
+
+        try:
+            return await self._request_on(session, command, payload)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            # clamd drops idle sessions after its IdleTimeout; retry once fresh
+            return await self._request_on(await self._connect(), command, payload)
+
+
+# Pools are bound to the event loop their streams were opened on. Each
+# process normally has one long-lived loop (uvicorn's, or the Celery worker
+# loop in app.tasks.email_tasks), but both exist in one process when tasks
+# run eagerly from the API, so key by loop. Weak keys only matter for
+# short-lived loops (tests, scripts): their entry goes with the loop.
+_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[str, int], _ClamdPool]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _get_pool(host: str, port: int) -> _ClamdPool:
+    loop_pools = _pools.setdefault(asyncio.get_running_loop(), {})
+    pool = loop_pools.get((host, port))
+    if pool is None:
+        pool = loop_pools[(host, port)] = _ClamdPool(host, port)
+    return pool
+
 
 @dataclass
 class ScanResult:
@@ -22,22 +152,24 @@ class VirusScanner:
     """
     Virus scanner using ClamAV daemon.
     
-    Connects to clamd via TCP socket to scan files.
+    Talks to clamd over pooled IDSESSION connections (see ``_ClamdPool``),
+    so consecutive scans reuse the same TCP socket.
     """
 
     def __init__(self, host: Optional[str] = None, port: Optional[int] = None):
         settings = get_settings()
         self.host = host or settings.clamav_host
         self.port = port or settings.clamav_port
+        self.stream_max_length = settings.clamav_stream_max_length
         self.enabled = settings.virus_scanner == "clamav"
         self._timeout = 30  # seconds
 
-    async def scan(self, content: bytes) -> ScanResult:
+    async def scan(self, content: BytesLike) -> ScanResult:
         """
         Scan file content for viruses.
         
         Args:
-            content: File content as bytes
+            content: File content (bytes, bytearray or memoryview; not copied)
         
         Returns:
             ScanResult indicating if file is clean
@@ -45,131 +177,71 @@ class VirusScanner:
         if not self.enabled:
             return ScanResult(is_clean=True, error="Scanner disabled")
 
-        import time
+        if len(content) > self.stream_max_length:
+            # clamd would reject the stream after we had sent it all
+            return ScanResult(is_clean=True, error="File exceeds ClamAV StreamMaxLength")
+
         start_time = time.time()
 
-        def _scan():
-            try:
-                # Connect to ClamAV daemon
-                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                sock.settimeout(self._timeout)
-                sock.connect((self.host, self.port))
-
-                try:
-                    # Use INSTREAM command for scanning content
-                    sock.sendall(b"nINSTREAM\n")
-
-                    # Send content in chunks
-                    chunk_size = 2048
-                    for i in range(0, len(content), chunk_size):
-                        chunk = content[i:i + chunk_size]
-                        size = len(chunk)
-                        sock.sendall(size.to_bytes(4, byteorder='big') + chunk)
-
-                    # Send zero-length chunk to indicate end
-                    sock.sendall((0).to_bytes(4, byteorder='big'))
-
-                    # Receive response
-                    response = b""
-                    while True:
-                        data = sock.recv(4096)
-                        if not data:
-                            break
-                        response += data
-                        if b"\n" in data:
-                            break
-
-                    response_str = response.decode('utf-8').strip()
-                    elapsed = (time.time() - start_time) * 1000
-
-                    # Parse response
-                    # Format: "stream: OK" or "stream: VirusName FOUND"
-                    if "OK" in response_str:
-                        return ScanResult(is_clean=True, scan_time_ms=elapsed)
-                    elif "FOUND" in response_str:
-                        # Extract virus name
-                        parts = response_str.split(":")
-                        if len(parts) >= 2:
-                            virus_info = parts[1].strip()
-                            virus_name = virus_info.replace("FOUND", "").strip()
-                        else:
-                            virus_name = "Unknown"
-                        return ScanResult(
-                            is_clean=False,
-                            virus_name=virus_name,
-                            scan_time_ms=elapsed,
-                        )
-                    else:
-                        return ScanResult(
-                            is_clean=True,
-                            error=f"Unexpected response: {response_str}",
-                            scan_time_ms=elapsed,
-                        )
-
-                finally:
-                    sock.close()
-
-            except socket.timeout:
-                return ScanResult(is_clean=True, error="Scan timeout")
-            except ConnectionRefusedError:
-                logger.warning("ClamAV not available, skipping scan")
-                return ScanResult(is_clean=True, error="ClamAV not available")
-            except Exception as e:
-                logger.error(f"Virus scan error: {e}")
-                return ScanResult(is_clean=True, error=str(e))
-
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, _scan)
+        try:
+            response_str = await _get_pool(self.host, self.port).execute(
+                b"INSTREAM", content, timeout=self._timeout
+            )
+        except asyncio.TimeoutError:
+            return ScanResult(is_clean=True, error="Scan timeout")
+        except ConnectionRefusedError:
+            logger.warning("ClamAV not available, skipping scan")
+            return ScanResult(is_clean=True, error="ClamAV not available")
+        except Exception as e:
+            logger.error(f"Virus scan error: {e}")
+            return ScanResult(is_clean=True, error=str(e))
+
+        elapsed = (time.time() - start_time) * 1000
+
+        # Parse response
+        # Format: "stream: OK" or "stream: VirusName FOUND" (match the
+        # suffix: a signature name may itself contain "OK")
+        if response_str.endswith(" OK"):
+            return ScanResult(is_clean=True, scan_time_ms=elapsed)
+        elif response_str.endswith(" FOUND"):
+            # Extract virus name
+            _, _, virus_info = response_str.partition(":")
+            virus_name = virus_info[:-len(" FOUND")].strip() or "Unknown"
+            return ScanResult(
+                is_clean=False,
+                virus_name=virus_name,
+                scan_time_ms=elapsed,
+            )
+        else:
+            return ScanResult(
+                is_clean=True,
+                error=f"Unexpected response: {response_str}",
+                scan_time_ms=elapsed,
+            )
 
     async def health_check(self) -> bool:
         """Check if ClamAV is available."""
         if not self.enabled:
             return True
 
-        def _check():
-            try:
-                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                sock.settimeout(5)
-                sock.connect((self.host, self.port))
-                
-                try:
-                    # Send PING command
-                    sock.sendall(b"nPING\n")
-                    response = sock.recv(1024).decode('utf-8').strip()
-                    return response == "PONG"
-                finally:
-                    sock.close()
-            except Exception as e:
-                logger.error(f"ClamAV health check failed: {e}")
-                return False
-
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, _check)
+        try:
+            # Send PING command
+            response = await asyncio.wait_for(
+                _get_pool(self.host, self.port).execute(b"PING"), timeout=5
+            )
+            return response == "PONG"
+        except Exception as e:
+            logger.error(f"ClamAV health check failed: {e}")
+            return False
 
     async def get_version(self) -> Optional[str]:
         """Get ClamAV version."""
         if not self.enabled:
             return None
 
-        def _get_version():
-            try:
-                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                sock.settimeout(5)
-                sock.connect((self.host, self.port))
-                
-                try:
-                    sock.sendall(b"nVERSION\n")
-                    response = sock.recv(1024).decode('utf-8').strip()
-                    return response
-                finally:
-                    sock.close()
-            except Exception:
-                return None
-
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, _get_version)
-
-
-
-
-
+        try:
+            return await asyncio.wait_for(
+                _get_pool(self.host, self.port).execute(b"VERSION"), timeout=5
+            )
+        except Exception:
+            return None
@@ -1,4 +1,6 @@
 import logging
+from functools import lru_cache
+
 from .s3_storage import S3StorageService, StoredFile
 from .azure_storage import AzureBlobStorageService
 
@@ -12,10 +14,14 @@ __all__ = [
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=1)
 def get_storage_service():
     """
     Get the appropriate storage service based on configuration.
     
+    The service is built once per process and shared, so its SDK client
+    (connection pool, TLS sessions) is reused across requests.
+    
     Returns:
         Storage service instance (AzureBlobStorageService or S3StorageService)
         
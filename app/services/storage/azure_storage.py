@@ -1,16 +1,46 @@
 import asyncio
 import hashlib
 import logging
-import uuid
+import secrets
+import weakref
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional, Tuple
 
 from app.core.config import get_settings
 
 logger = logging.getLogger(__name__)
 
+# Block size for incremental hashing of uploads
+HASH_BLOCK_SIZE = 1 << 20
+# Parallel PUT Block requests for blobs above the SDK's single-put limit
+UPLOAD_MAX_CONCURRENCY = 8
+# Extra lifetime given to a container SAS so it can be reused across calls
+SAS_REUSE_WINDOW = timedelta(minutes=5)
+
+
+def _generate_read_sas(account_name: str, container_name: str, account_key: str, expiry: datetime) -> str:
+    """Sign a read-only container SAS (local HMAC, no request to Azure)."""
+    from azure.storage.blob import generate_container_sas, ContainerSasPermissions
+
+    return generate_container_sas(
+        account_name=account_name,
+        container_name=container_name,
+        account_key=account_key,
+        permission=ContainerSasPermissions(read=True),
+        expiry=expiry,
+    )
+
+
+def _sha256_hexdigest(content: bytes) -> str:
+    """SHA-256 of content, fed to hashlib in 1 MB views of the same buffer."""
+    digest = hashlib.sha256()
+    view = memoryview(content)
+    for i in range(0, len(view), HASH_BLOCK_SIZE):
+        digest.update(view[i:i + HASH_BLOCK_SIZE])
+    return digest.hexdigest()
+
 
 @dataclass
 class StoredFile:
@@ -29,6 +59,9 @@ class AzureBlobStorageService:
     Azure Blob Storage service for documents.
     """
 
+    # Read-only container SAS tokens: (account, container, expiration) -> (token, expiry)
+    _sas_cache: Dict[Tuple[str, str, int], Tuple[str, datetime]] = {}
+
     def __init__(
         self,
         connection_string: Optional[str] = None,
@@ -43,19 +76,40 @@ class AzureBlobStorageService:
         self.account_key = account_key or getattr(settings, 'azure_storage_account_key', None)
         self.container_name = container_name or getattr(settings, 'azure_storage_container_name', 'bookkeeping-documents')
         
-        self._client = None
+        # Async clients by event loop: loop -> (BlobServiceClient, ContainerClient)
+        self._clients = weakref.WeakKeyDictionary()
+        self._container_ready = False
+
+    def _get_container_client(self):
+        """Get or create the client for this service's container."""
+        return self._get_clients()[1]
 
     def _get_client(self):
-        """Get or create Azure Blob Storage client."""
-        if self._client is None:
+        """Get or create the async Azure Blob Storage client."""
+        return self._get_clients()[0]
+
+    def _get_clients(self):
+        """
+        Get or create the (service, container) clients for the running loop.
+
+        A client's HTTP session belongs to the event loop it was opened on,
+        and this service is a process-wide singleton. Tasks share one
+        persistent worker loop per process and the API has its own, but
+        both can live in one process (eager tasks), so clients are kept per
+        loop. Short-lived loops (tests, scripts) should await close()
+        before they end.
+        """
+        loop = asyncio.get_running_loop()
+        clients = self._clients.get(loop)
+        if clients is None:
             try:
-                from azure.storage.blob import BlobServiceClient
+                from azure.storage.blob.aio import BlobServiceClient
                 
                 if self.connection_string:
-                    self._client = BlobServiceClient.from_connection_string(self.connection_string)
+                    client = BlobServiceClient.from_connection_string(self.connection_string)
                 elif self.account_name and self.account_key:
                     account_url = f"https://{self.account_name}.blob.core.windows.net"
-                    self._client = BlobServiceClient(account_url=account_url, credential=self.account_key)
+                    client = BlobServiceClient(account_url=account_url, credential=self.account_key)
                 else:
                     raise ValueError(
                         "Azure storage credentials not configured. "
@@ -64,9 +118,18 @@ class AzureBlobStorageService:
                     )
                     
             except ImportError:
-                raise ImportError("azure-storage-blob not installed. Run: pip install azure-storage-blob")
+                raise ImportError("azure-storage-blob not installed. Run: pip install azure-storage-blob aiohttp")
+
+            clients = (client, client.get_container_client(self.container_name))
+            self._clients[loop] = clients
         
-        return self._client
+        return clients
+
+    async def close(self) -> None:
+        """Close the HTTP session opened on the running loop."""
+        clients = self._clients.pop(asyncio.get_running_loop(), None)
+        if clients is not None:
+            await clients[0].close()
 
     async def upload_file(
         self,
@@ -75,6 +138,7 @@ class AzureBlobStorageService:
         content_type: str,
         folder: str = "documents",
         metadata: Optional[dict] = None,
+        content_hash: Optional[str] = None,
     ) -> StoredFile:
         """
         Upload a file to Azure Blob Storage.
@@ -85,61 +149,52 @@ class AzureBlobStorageService:
             content_type: MIME type
             folder: Folder/prefix in container
             metadata: Optional metadata to store with file
+            content_hash: SHA-256 hex digest if the caller already has it
         
         Returns:
             StoredFile with storage information
         """
-        def _upload():
-            client = self._get_client()
-            container_client = client.get_container_client(self.container_name)
-            
-            # Ensure container exists
-            try:
-                container_client.create_container()
-            except Exception:
-                pass  # Container already exists
-            
-            # Generate unique blob name
-            content_hash = hashlib.sha256(content).hexdigest()
-            ext = Path(original_filename).suffix.lower()
-            timestamp = datetime.utcnow().strftime("%Y/%m/%d")
-            unique_id = str(uuid.uuid4())[:8]
-            
-            blob_name = f"{folder}/{timestamp}/{content_hash[:16]}_{unique_id}{ext}"
-            
-            # Prepare metadata
-            blob_metadata = {
-                "original_filename": original_filename,
-                "content_hash": content_hash,
-                "uploaded_at": datetime.utcnow().isoformat(),
-            }
-            if metadata:
-                blob_metadata.update({k: str(v) for k, v in metadata.items()})
-            
-            # Upload
-            blob_client = container_client.get_blob_client(blob_name)
-            blob_client.upload_blob(
-                data=content,
-                content_type=content_type,
-                metadata=blob_metadata,
-                overwrite=True,
-            )
-            
-            # Generate URL
-            url = blob_client.url
-            
-            return StoredFile(
-                bucket=self.container_name,
-                key=blob_name,
-                url=url,
-                content_hash=content_hash,
-                content_type=content_type,
-                size=len(content),
-                original_filename=original_filename,
-            )
-
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, _upload)
+        from azure.storage.blob import ContentSettings
+
+        container_client = self._get_container_client()
+        
+        # Generate unique blob name
+        digest = content_hash or await asyncio.to_thread(_sha256_hexdigest, content)
+        ext = Path(original_filename).suffix.lower()
+        now = datetime.now(timezone.utc)
+        unique_id = secrets.token_hex(4)
+        
+        blob_name = f"{folder}/{now.year:04d}/{now.month:02d}/{now.day:02d}/{digest[:16]}_{unique_id}{ext}"
+        
+        # Prepare metadata
+        blob_metadata = {
+            "original_filename": original_filename,
+            "content_hash": digest,
+            "uploaded_at": now.isoformat(),
+        }
+        if metadata:
+            blob_metadata.update({k: str(v) for k, v in metadata.items()})
+        
+        # Upload
+        blob_client = container_client.get_blob_client(blob_name)
+        await blob_client.upload_blob(
+            data=content,
+            length=len(content),
+            content_settings=ContentSettings(content_type=content_type),
+            metadata=blob_metadata,
+            overwrite=True,
+            max_concurrency=UPLOAD_MAX_CONCURRENCY,
+        )
+        
+        return StoredFile(
+            bucket=self.container_name,
+            key=blob_name,
+            url=blob_client.url,
+            content_hash=digest,
+            content_type=content_type,
+            size=len(content),
+            original_filename=original_filename,
+        )
 
     async def download_file(self, key: str) -> bytes:
         """
@@ -151,14 +206,23 @@ class AzureBlobStorageService:
         Returns:
             File content as bytes
         """
-        def _download():
-            client = self._get_client()
-            container_client = client.get_container_client(self.container_name)
-            blob_client = container_client.get_blob_client(key)
-            return blob_client.download_blob().readall()
+        blob_client = self._get_container_client().get_blob_client(key)
+        downloader = await blob_client.download_blob()
+        return await downloader.readall()
 
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, _download)
+    async def try_download_file(self, key: str) -> Optional[bytes]:
+        """
+        Download a file from Azure Blob Storage, or return None if it does not exist.
+        
+        Use this rather than file_exists() followed by download_file(): the
+        download itself reports a missing blob, saving a round-trip.
+        """
+        from azure.core.exceptions import ResourceNotFoundError
+
+        try:
+            return await self.download_file(key)
+        except ResourceNotFoundError:
+            return None
 
     async def delete_file(self, key: str) -> bool:
         """
@@ -170,19 +234,13 @@ class AzureBlobStorageService:
         Returns:
             True if deleted successfully
         """
-        def _delete():
-            try:
-                client = self._get_client()
-                container_client = client.get_container_client(self.container_name)
-                blob_client = container_client.get_blob_client(key)
-                blob_client.delete_blob()
-                return True
-            except Exception as e:
-                logger.error(f"Error deleting file {key}: {e}")
-                return False
-
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, _delete)
+        try:
+            blob_client = self._get_container_client().get_blob_client(key)
+            await blob_client.delete_blob()
+            return True
+        except Exception as e:
+            logger.error(f"Error deleting file {key}: {e}")
+            return False
 
     async def get_presigned_url(self, key: str, expiration: int = 3600) -> str:
         """
@@ -195,75 +253,72 @@ class AzureBlobStorageService:
         Returns:
             Presigned URL
         """
-        def _get_url():
-            from datetime import timedelta
+        blob_client = self._get_container_client().get_blob_client(key)
+        return f"{blob_client.url}?{self._get_container_sas(expiration)}"
+
+    def _get_container_sas(self, expiration: int) -> str:
+        """
+        Get a read-only container SAS valid for `expiration` seconds.
+
+        Tokens are issued with SAS_REUSE_WINDOW of extra lifetime and shared
+        by all blobs in the container until that slack runs out, so listing N
+        documents signs once instead of N times. Tokens are cached per
+        requested expiration and never outlive the request by more than
+        SAS_REUSE_WINDOW, so a short-lived URL is never signed with a token
+        issued for a longer one.
+        """
+        account_name = self.account_name
+        account_key = self.account_key
+        if not (account_name and account_key):
             client = self._get_client()
-            container_client = client.get_container_client(self.container_name)
-            blob_client = container_client.get_blob_client(key)
-            
-            # Generate SAS token
-            from azure.storage.blob import generate_container_sas, ContainerSasPermissions
-            from datetime import datetime, timedelta
-            
-            sas_token = generate_container_sas(
-                account_name=self.account_name or client.account_name,
-                container_name=self.container_name,
-                account_key=self.account_key or client.credential,
-                permission=ContainerSasPermissions(read=True),
-                expiry=datetime.utcnow() + timedelta(seconds=expiration),
-            )
-            
-            return f"{blob_client.url}?{sas_token}"
+            account_name = account_name or client.account_name
+            account_key = account_key or client.credential.account_key
+        cache_key = (account_name, self.container_name, expiration)
+        now = datetime.utcnow()
+        requested_expiry = now + timedelta(seconds=expiration)
 
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, _get_url)
+        cached = self._sas_cache.get(cache_key)
+        if cached is not None and requested_expiry <= cached[1] <= requested_expiry + SAS_REUSE_WINDOW:
+            return cached[0]
 
-    async def file_exists(self, key: str) -> bool:
-        """Check if a file exists in Azure Blob Storage."""
-        def _exists():
-            try:
-                client = self._get_client()
-                container_client = client.get_container_client(self.container_name)
-                blob_client = container_client.get_blob_client(key)
-                blob_client.get_blob_properties()
-                return True
-            except Exception:
-                return False
+        expiry = requested_expiry + SAS_REUSE_WINDOW
+        # SAS signing is local (no request to Azure), so no thread hop
+        sas_token = _generate_read_sas(account_name, self.container_name, account_key, expiry)
+        self._sas_cache[cache_key] = (sas_token, expiry)
+        return sas_token
 
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, _exists)
+    async def file_exists(self, key: str) -> bool:
+        """Check if a file exists in Azure Blob Storage (not needed before a download; see try_download_file)."""
+        try:
+            blob_client = self._get_container_client().get_blob_client(key)
+            await blob_client.get_blob_properties()
+            return True
+        except Exception:
+            return False
 
     async def ensure_bucket_exists(self) -> bool:
-        """Ensure the container exists, create if not."""
-        def _ensure():
-            try:
-                client = self._get_client()
-                container_client = client.get_container_client(self.container_name)
-                container_client.create_container()
-                logger.info(f"Created container: {self.container_name}")
-                return True
-            except Exception as e:
-                # Container might already exist
-                if "ContainerAlreadyExists" in str(e):
-                    return True
-                logger.error(f"Error ensuring container exists: {e}")
-                return False
+        """Ensure the container exists, create if not (once per instance)."""
+        if self._container_ready:
+            return True
 
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, _ensure)
+        try:
+            await self._get_container_client().create_container()
+            logger.info(f"Created container: {self.container_name}")
+            self._container_ready = True
+            return True
+        except Exception as e:
+            # Container might already exist
+            if "ContainerAlreadyExists" in str(e):
+                self._container_ready = True
+                return True
+            logger.error(f"Error ensuring container exists: {e}")
+            return False
 
     async def health_check(self) -> bool:
         """Check Azure Blob Storage connection health."""
-        def _check():
-            try:
-                client = self._get_client()
-                container_client = client.get_container_client(self.container_name)
-                container_client.get_container_properties()
-                return True
-            except Exception as e:
-                logger.error(f"Azure Blob Storage health check failed: {e}")
-                return False
-
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, _check)
-
+        try:
+            await self._get_container_client().get_container_properties()
+            return True
+        except Exception as e:
+            logger.error(f"Azure Blob Storage health check failed: {e}")
+            return False
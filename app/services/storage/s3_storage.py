@@ -1,16 +1,128 @@
 import asyncio
 import hashlib
+import io
 import logging
-import uuid
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import BinaryIO, Dict, Optional, Set, Tuple, Union
 
 from app.core.config import get_settings
 
 logger = logging.getLogger(__name__)
 
+# HTTP connections per boto3 client (botocore defaults to 10)
+S3_MAX_POOL_CONNECTIONS = 50
+# Multipart transfers: parts of 16 MB (smaller parts are dominated by
+# per-request overhead) for objects above 8 MB, 10 parts in flight
+S3_MULTIPART_THRESHOLD = 8 * 1024 * 1024
+S3_MULTIPART_CHUNKSIZE = 16 * 1024 * 1024
+S3_TRANSFER_CONCURRENCY = 10
+# Read size from each ranged GET body (boto3 defaults to 256 KB)
+S3_IO_CHUNKSIZE = 1024 * 1024
+# Presigned URLs are reused for up to this many seconds (never longer than
+# their expiration), so hot keys are not re-signed on every request
+PRESIGN_REUSE_WINDOW = 60
+# SigV4 presigned URLs cannot be valid for longer than 7 days
+PRESIGN_MAX_EXPIRATION = 7 * 24 * 3600
+PRESIGN_CACHE_SIZE = 8192
+# Block size when hashing file objects that are streamed to S3
+HASH_BLOCK_SIZE = 1024 * 1024
+
+# Shared clients keyed by (endpoint_url, access_key, secret_key, region).
+# boto3 clients are thread-safe, so one per configuration serves every
+# service instance and executor thread from a single warm connection pool.
+_clients: Dict[Tuple[Optional[str], Optional[str], Optional[str], Optional[str]], object] = {}
+_clients_lock = threading.Lock()
+
+# (endpoint_url, bucket) pairs already confirmed to exist in this process;
+# the app checks at startup, so later calls skip the HEAD round-trip
+_bucket_verified: Set[Tuple[Optional[str], str]] = set()
+
+# Blocking boto3 calls run here rather than in the loop's default executor,
+# sized to the connection pool so neither starves the other
+_executor = ThreadPoolExecutor(max_workers=S3_MAX_POOL_CONNECTIONS, thread_name_prefix="s3")
+
+
+def get_s3_client(
+    endpoint_url: Optional[str],
+    access_key: Optional[str],
+    secret_key: Optional[str],
+    region: Optional[str],
+):
+    """Get the process-wide boto3 S3 client for this configuration."""
+    key = (endpoint_url, access_key, secret_key, region)
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            try:
+                import boto3
+                from botocore.config import Config
+            except ImportError:
+                raise ImportError("boto3 not installed. Run: pip install boto3")
+
+            config = Config(
+                signature_version='s3v4',
+                retries={'max_attempts': 3, 'mode': 'adaptive'},
+                max_pool_connections=S3_MAX_POOL_CONNECTIONS,
+                tcp_keepalive=True,
+            )
+            client = boto3.session.Session().client(
+                's3',
+                endpoint_url=endpoint_url,
+                aws_access_key_id=access_key,
+                aws_secret_access_key=secret_key,
+                region_name=region,
+                config=config,
+            )
+            _clients[key] = client
+    return client
+
+
+@lru_cache(maxsize=1)
+def get_transfer_config():
+    """TransferConfig for upload_fileobj/download_fileobj (parallel multipart)."""
+    from boto3.s3.transfer import TransferConfig
+
+    return TransferConfig(
+        multipart_threshold=S3_MULTIPART_THRESHOLD,
+        multipart_chunksize=S3_MULTIPART_CHUNKSIZE,
+        max_concurrency=S3_TRANSFER_CONCURRENCY,
+        io_chunksize=S3_IO_CHUNKSIZE,
+        use_threads=True,
+    )
+
+
+def _measure_fileobj(fileobj: BinaryIO, content_hash: Optional[str]) -> Tuple[str, int]:
+    """
+    SHA-256 hex digest and remaining length of a seekable file object.
+
+    The object is read block by block (hashing only when content_hash is
+    not given) and its position is restored for the upload.
+    """
+    start = fileobj.tell()
+    if content_hash:
+        size = fileobj.seek(0, io.SEEK_END) - start
+    else:
+        sha256 = hashlib.sha256()
+        size = 0
+        for block in iter(lambda: fileobj.read(HASH_BLOCK_SIZE), b""):
+            sha256.update(block)
+            size += len(block)
+        content_hash = sha256.hexdigest()
+    fileobj.seek(start)
+    return content_hash, size
+
 
 @dataclass
 class StoredFile:
@@ -35,6 +147,12 @@ class S3StorageService:
     - Any S3-compatible storage
     """
 
+    # Presigned URLs: (endpoint, access key, region, bucket, key, expiration)
+    # -> (url, reuse_until monotonic). Shared by all instances, so the key
+    # names everything the signature depends on.
+    _presign_cache: "OrderedDict[Tuple[Optional[str], Optional[str], Optional[str], str, str, int], Tuple[str, float]]" = OrderedDict()
+    _presign_cache_lock = threading.Lock()
+
     def __init__(
         self,
         endpoint_url: Optional[str] = None,
@@ -50,51 +168,42 @@ class S3StorageService:
         self.secret_key = secret_key or settings.s3_secret_key
         self.bucket_name = bucket_name or settings.s3_bucket_name
         self.region = region or settings.s3_region
+        self._s3_uri_prefix = f"s3://{self.bucket_name}/"
         
         self._client = None
 
     def _get_client(self):
-        """Get or create S3 client."""
+        """Get the shared S3 client."""
         if self._client is None:
-            try:
-                import boto3
-                from botocore.config import Config
-                
-                config = Config(
-                    signature_version='s3v4',
-                    retries={'max_attempts': 3, 'mode': 'adaptive'}
-                )
-                
-                self._client = boto3.client(
-                    's3',
-                    endpoint_url=self.endpoint_url if self.endpoint_url != "https://s3.amazonaws.com" else None,
-                    aws_access_key_id=self.access_key,
-                    aws_secret_access_key=self.secret_key,
-                    region_name=self.region,
-                    config=config,
-                )
-            except ImportError:
-                raise ImportError("boto3 not installed. Run: pip install boto3")
+            self._client = get_s3_client(
+                self.endpoint_url if self.endpoint_url != "https://s3.amazonaws.com" else None,
+                self.access_key,
+                self.secret_key,
+                self.region,
+            )
         
         return self._client
 
     async def upload_file(
         self,
-        content: bytes,
+        content: Union[bytes, BinaryIO],
         original_filename: str,
         content_type: str,
         folder: str = "documents",
         metadata: Optional[dict] = None,
+        content_hash: Optional[str] = None,
     ) -> StoredFile:
         """
         Upload a file to S3.
         
         Args:
-            content: File content as bytes
+            content: File content as bytes, or a seekable binary file object
+                that is streamed in multipart chunks without being loaded
             original_filename: Original filename for reference
             content_type: MIME type
             folder: Folder/prefix in bucket
             metadata: Optional metadata to store with file
+            content_hash: SHA-256 hex digest if the caller already has it
         
         Returns:
             StoredFile with storage information
@@ -102,47 +211,53 @@ class S3StorageService:
         def _upload():
             client = self._get_client()
             
+            if isinstance(content, (bytes, bytearray, memoryview)):
+                digest = content_hash or hashlib.sha256(content).hexdigest()
+                size = len(content)
+                fileobj = io.BytesIO(content)
+            else:
+                digest, size = _measure_fileobj(content, content_hash)
+                fileobj = content
+            
             # Generate unique key
-            content_hash = hashlib.sha256(content).hexdigest()
             ext = Path(original_filename).suffix.lower()
-            timestamp = datetime.utcnow().strftime("%Y/%m/%d")
-            unique_id = str(uuid.uuid4())[:8]
+            now = datetime.now(timezone.utc)
+            unique_id = secrets.token_hex(4)
             
-            key = f"{folder}/{timestamp}/{content_hash[:16]}_{unique_id}{ext}"
+            key = f"{folder}/{now.year:04d}/{now.month:02d}/{now.day:02d}/{digest[:16]}_{unique_id}{ext}"
             
             # Prepare metadata
             file_metadata = {
                 "original-filename": original_filename,
-                "content-hash": content_hash,
-                "uploaded-at": datetime.utcnow().isoformat(),
+                "content-hash": digest,
+                "uploaded-at": now.isoformat(),
             }
             if metadata:
                 file_metadata.update({k: str(v) for k, v in metadata.items()})
             
             # Upload
-            client.put_object(
-                Bucket=self.bucket_name,
-                Key=key,
-                Body=content,
-                ContentType=content_type,
-                Metadata=file_metadata,
+            client.upload_fileobj(
+                fileobj,
+                self.bucket_name,
+                key,
+                ExtraArgs={'ContentType': content_type, 'Metadata': file_metadata},
+                Config=get_transfer_config(),
             )
             
             # Generate URL
-            url = f"s3://{self.bucket_name}/{key}"
+            url = self._s3_uri_prefix + key
             
             return StoredFile(
                 bucket=self.bucket_name,
                 key=key,
                 url=url,
-                content_hash=content_hash,
+                content_hash=digest,
                 content_type=content_type,
-                size=len(content),
+                size=size,
                 original_filename=original_filename,
             )
 
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, _upload)
+        return await asyncio.get_running_loop().run_in_executor(_executor, _upload)
 
     async def download_file(self, key: str) -> bytes:
         """
@@ -156,11 +271,27 @@ class S3StorageService:
         """
         def _download():
             client = self._get_client()
-            response = client.get_object(Bucket=self.bucket_name, Key=key)
-            return response['Body'].read()
+            buffer = io.BytesIO()
+            client.download_fileobj(self.bucket_name, key, buffer, Config=get_transfer_config())
+            return buffer.getvalue()
+
+        return await asyncio.get_running_loop().run_in_executor(_executor, _download)
+
+    async def try_download_file(self, key: str) -> Optional[bytes]:
+        """
+        Download a file from S3, or return None if it does not exist.
+        
+        Use this rather than file_exists() followed by download_file(): the
+        download itself reports a missing key, saving a round-trip.
+        """
+        from botocore.exceptions import ClientError
 
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, _download)
+        try:
+            return await self.download_file(key)
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404'):
+                return None
+            raise
 
     async def delete_file(self, key: str) -> bool:
         """
@@ -181,8 +312,7 @@ class S3StorageService:
                 logger.error(f"Error deleting file {key}: {e}")
                 return False
 
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, _delete)
+        return await asyncio.get_running_loop().run_in_executor(_executor, _delete)
 
     async def get_presigned_url(self, key: str, expiration: int = 3600) -> str:
         """
@@ -195,19 +325,30 @@ class S3StorageService:
         Returns:
             Presigned URL
         """
-        def _get_url():
-            client = self._get_client()
-            return client.generate_presigned_url(
-                'get_object',
-                Params={'Bucket': self.bucket_name, 'Key': key},
-                ExpiresIn=expiration,
-            )
+        cache_key = (self.endpoint_url, self.access_key, self.region, self.bucket_name, key, expiration)
+        now = time.monotonic()
+        with self._presign_cache_lock:
+            cached = self._presign_cache.get(cache_key)
+            if cached is not None and cached[1] > now:
+                self._presign_cache.move_to_end(cache_key)
+                return cached[0]
 
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, _get_url)
+        # SigV4 query signing is local CPU work; no thread hop needed
+        url = self._get_client().generate_presigned_url(
+            'get_object',
+            Params={'Bucket': self.bucket_name, 'Key': key},
+            ExpiresIn=min(expiration, PRESIGN_MAX_EXPIRATION),
+        )
+
+        with self._presign_cache_lock:
+            self._presign_cache[cache_key] = (url, now + min(PRESIGN_REUSE_WINDOW, expiration))
+            self._presign_cache.move_to_end(cache_key)
+            while len(self._presign_cache) > PRESIGN_CACHE_SIZE:
+                self._presign_cache.popitem(last=False)
+        return url
 
     async def file_exists(self, key: str) -> bool:
-        """Check if a file exists in S3."""
+        """Check if a file exists in S3 (not needed before a download; see try_download_file)."""
         def _exists():
             try:
                 client = self._get_client()
@@ -216,11 +357,14 @@ class S3StorageService:
             except Exception:
                 return False
 
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, _exists)
+        return await asyncio.get_running_loop().run_in_executor(_executor, _exists)
 
     async def ensure_bucket_exists(self) -> bool:
-        """Ensure the bucket exists, create if not."""
+        """Ensure the bucket exists, create if not (checked once per process)."""
+        bucket_id = (self.endpoint_url, self.bucket_name)
+        if bucket_id in _bucket_verified:
+            return True
+
         def _ensure():
             try:
                 client = self._get_client()
@@ -228,6 +372,7 @@ class S3StorageService:
                 # Check if bucket exists
                 try:
                     client.head_bucket(Bucket=self.bucket_name)
+                    _bucket_verified.add(bucket_id)
                     return True
                 except Exception:
                     pass
@@ -242,13 +387,13 @@ class S3StorageService:
                     client.create_bucket(Bucket=self.bucket_name)
                 
                 logger.info(f"Created bucket: {self.bucket_name}")
+                _bucket_verified.add(bucket_id)
                 return True
             except Exception as e:
                 logger.error(f"Error ensuring bucket exists: {e}")
                 return False
 
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, _ensure)
+        return await asyncio.get_running_loop().run_in_executor(_executor, _ensure)
 
     async def health_check(self) -> bool:
         """Check S3 connection health."""
@@ -261,8 +406,7 @@ class S3StorageService:
                 logger.error(f"S3 health check failed: {e}")
                 return False
 
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, _check)
+        return await asyncio.get_running_loop().run_in_executor(_executor, _check)
 
 
 
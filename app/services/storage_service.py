@@ -2,20 +2,26 @@
 
 import io
 import os
-import uuid
+import re
+import secrets
 from dataclasses import dataclass
-from datetime import datetime
-from typing import Optional, BinaryIO
+from datetime import datetime, timezone
+from typing import Optional, BinaryIO, Set, Tuple, Union
 import structlog
 
-import boto3
-from botocore.config import Config
 from botocore.exceptions import ClientError
 
 from ..core.config import get_settings
+from .storage.s3_storage import get_s3_client, get_transfer_config
 
 logger = structlog.get_logger()
 
+# Anything outside this set is replaced with '_' in storage keys
+UNSAFE_FILENAME_CHARS_RE = re.compile(r'[^A-Za-z0-9._-]')
+
+# (endpoint_url, bucket) pairs already confirmed to exist in this process
+_bucket_verified: Set[Tuple[str, str]] = set()
+
 
 @dataclass
 class StorageResult:
@@ -31,39 +37,48 @@ class StorageService:
     """S3-compatible storage service."""
     
     def __init__(self):
-        self.settings = get_settings()
+        settings = get_settings()
+        self.endpoint_url = settings.s3_endpoint_url
+        self.access_key = settings.s3_access_key
+        self.secret_key = settings.s3_secret_key
+        self.bucket_name = settings.s3_bucket_name
+        self.region = settings.s3_region
         self._client = None
+        self._url_prefix = f"{self.endpoint_url}/{self.bucket_name}/"
     
     @property
     def client(self):
-        """Lazy-initialize S3 client."""
+        """Lazy-fetch the shared S3 client."""
         if self._client is None:
-            self._client = boto3.client(
-                's3',
-                endpoint_url=self.settings.s3_endpoint_url,
-                aws_access_key_id=self.settings.s3_access_key,
-                aws_secret_access_key=self.settings.s3_secret_key,
-                region_name=self.settings.s3_region,
-                config=Config(signature_version='s3v4')
+            self._client = get_s3_client(
+                self.endpoint_url,
+                self.access_key,
+                self.secret_key,
+                self.region,
             )
         return self._client
     
     def ensure_bucket_exists(self) -> bool:
-        """Ensure the storage bucket exists."""
+        """Ensure the storage bucket exists (checked once per process)."""
+        bucket_id = (self.endpoint_url, self.bucket_name)
+        if bucket_id in _bucket_verified:
+            return True
         try:
-            self.client.head_bucket(Bucket=self.settings.s3_bucket_name)
+            self.client.head_bucket(Bucket=self.bucket_name)
+            _bucket_verified.add(bucket_id)
             return True
         except ClientError as e:
             error_code = e.response['Error']['Code']
             if error_code == '404':
                 try:
                     self.client.create_bucket(
-                        Bucket=self.settings.s3_bucket_name
+                        Bucket=self.bucket_name
                     )
                     logger.info(
                         "Created storage bucket",
-                        bucket=self.settings.s3_bucket_name
+                        bucket=self.bucket_name
                     )
+                    _bucket_verified.add(bucket_id)
                     return True
                 except Exception as create_error:
                     logger.error(
@@ -76,20 +91,20 @@ class StorageService:
     
     def upload_file(
         self,
-        content: bytes,
+        content: Union[bytes, BinaryIO],
         filename: str,
         content_type: str,
         file_hash: str,
         metadata: Optional[dict] = None
     ) -> StorageResult:
-        """Upload file to storage."""
+        """Upload file to storage (bytes, or a file object streamed in chunks)."""
         try:
             # Generate unique key with organization
-            date_prefix = datetime.utcnow().strftime("%Y/%m/%d")
-            unique_id = str(uuid.uuid4())[:8]
+            now = datetime.now(timezone.utc)
+            unique_id = secrets.token_hex(4)
             safe_filename = self._sanitize_filename(filename)
             
-            key = f"documents/{date_prefix}/{unique_id}_{safe_filename}"
+            key = f"documents/{now.year:04d}/{now.month:02d}/{now.day:02d}/{unique_id}_{safe_filename}"
             
             # Prepare metadata
             s3_metadata = {
@@ -101,12 +116,13 @@ class StorageService:
                     s3_metadata[k] = str(v)
             
             # Upload
-            self.client.put_object(
-                Bucket=self.settings.s3_bucket_name,
-                Key=key,
-                Body=content,
-                ContentType=content_type,
-                Metadata=s3_metadata
+            fileobj = content if hasattr(content, 'read') else io.BytesIO(content)
+            self.client.upload_fileobj(
+                fileobj,
+                self.bucket_name,
+                key,
+                ExtraArgs={'ContentType': content_type, 'Metadata': s3_metadata},
+                Config=get_transfer_config()
             )
             
             # Generate URL
@@ -114,13 +130,13 @@ class StorageService:
             
             logger.info(
                 "File uploaded to storage",
-                bucket=self.settings.s3_bucket_name,
+                bucket=self.bucket_name,
                 key=key
             )
             
             return StorageResult(
                 success=True,
-                bucket=self.settings.s3_bucket_name,
+                bucket=self.bucket_name,
                 key=key,
                 url=url
             )
@@ -129,7 +145,7 @@ class StorageService:
             logger.error("Storage upload failed", error=str(e))
             return StorageResult(
                 success=False,
-                bucket=self.settings.s3_bucket_name,
+                bucket=self.bucket_name,
                 key="",
                 error=str(e)
             )
@@ -137,11 +153,14 @@ class StorageService:
     def download_file(self, key: str) -> Optional[bytes]:
         """Download file from storage."""
         try:
-            response = self.client.get_object(
-                Bucket=self.settings.s3_bucket_name,
-                Key=key
+            buffer = io.BytesIO()
+            self.client.download_fileobj(
+                self.bucket_name,
+                key,
+                buffer,
+                Config=get_transfer_config()
             )
-            return response['Body'].read()
+            return buffer.getvalue()
         except Exception as e:
             logger.error("Storage download failed", key=key, error=str(e))
             return None
@@ -150,7 +169,7 @@ class StorageService:
         """Delete file from storage."""
         try:
             self.client.delete_object(
-                Bucket=self.settings.s3_bucket_name,
+                Bucket=self.bucket_name,
                 Key=key
             )
             logger.info("File deleted from storage", key=key)
@@ -165,7 +184,7 @@ class StorageService:
             url = self.client.generate_presigned_url(
                 'get_object',
                 Params={
-                    'Bucket': self.settings.s3_bucket_name,
+                    'Bucket': self.bucket_name,
                     'Key': key
                 },
                 ExpiresIn=expires_in
@@ -178,16 +197,12 @@ class StorageService:
     def _generate_url(self, key: str) -> str:
         """Generate storage URL for the object."""
         # For MinIO/local development
-        return f"{self.settings.s3_endpoint_url}/{self.settings.s3_bucket_name}/{key}"
+        return self._url_prefix + key
     
     def _sanitize_filename(self, filename: str) -> str:
         """Sanitize filename for storage."""
-        # Remove path separators
-        filename = filename.replace('/', '_').replace('\\', '_')
-        
-        # Remove special characters
-        safe_chars = set('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789._-')
-        filename = ''.join(c if c in safe_chars else '_' for c in filename)
+        # Replace path separators and other special characters
+        filename = UNSAFE_FILENAME_CHARS_RE.sub('_', filename)
         
         # Ensure reasonable length
         if len(filename) > 200:
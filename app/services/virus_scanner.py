@@ -1,6 +1,5 @@
 """Virus scanning service using ClamAV."""
 
-import io
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from typing import Optional, Tuple
@@ -12,6 +11,28 @@ from ..core.config import get_settings
 
 logger = structlog.get_logger()
 
+# Bytes sent per INSTREAM chunk
+INSTREAM_CHUNK_SIZE = 64 * 1024
+
+
+class _InstreamReader:
+    """
+    File-like view over scan content for clamd.instream.
+
+    clamd.instream asks for 1 KB per read and sends each read as one
+    INSTREAM chunk; this returns up to INSTREAM_CHUNK_SIZE per read instead,
+    sliced from a memoryview of the content.
+    """
+
+    def __init__(self, content: bytes):
+        self._view = memoryview(content)
+        self._pos = 0
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self._view[self._pos:self._pos + INSTREAM_CHUNK_SIZE]
+        self._pos += len(chunk)
+        return bytes(chunk)
+
 
 @dataclass
 class ScanResult:
@@ -72,9 +93,18 @@ class ClamAVScanner(VirusScanner):
     
     def scan(self, content: bytes, filename: str) -> ScanResult:
         """Scan file content using ClamAV."""
+        if len(content) > self.settings.clamav_stream_max_length:
+            # clamd would reject the stream after we had sent it all
+            logger.warning("File too large for ClamAV", filename=filename, size=len(content))
+            return ScanResult(
+                is_clean=False,
+                scanner="clamav",
+                error="File exceeds ClamAV StreamMaxLength"
+            )
+
         try:
             # Use instream to scan the content
-            result = self.client.instream(io.BytesIO(content))
+            result = self.client.instream(_InstreamReader(content))
             
             # Result is like {'stream': ('OK', None)} or {'stream': ('FOUND', 'Eicar-Test-Signature')}
             stream_result = result.get('stream', ('ERROR', 'Unknown'))
@@ -1,6 +1,10 @@
 """Celery tasks for bank feed processing."""
 
 import logging
+import time
+
+from sqlalchemy import select
+
 from app.celery_app import celery_app
 from app.db.session import SessionLocal
 from app.models.bank_feed import BankFile, BankTransaction, ClassificationStatus
@@ -9,6 +13,10 @@ from app.services.notifications import NotificationService
 
 logger = logging.getLogger(__name__)
 
+# Commit classification progress at most every this many percent or seconds
+PROGRESS_COMMIT_STEP = 10
+PROGRESS_COMMIT_INTERVAL = 5.0
+
 
 @celery_app.task(name="bank_feed.classify_file", bind=True, max_retries=3)
 def classify_bank_file(self, file_id: int, use_ai: bool = False):
@@ -33,32 +41,34 @@ def classify_bank_file(self, file_id: int, use_ai: bool = False):
         bank_file.last_classification_error = None
         db.commit()
         
-        # Get all transactions for this file
-        transactions = db.query(BankTransaction).filter(
-            BankTransaction.bank_file_id == file_id
-        ).all()
+        # Get all transaction IDs for this file (no ORM objects needed)
+        transaction_ids = db.execute(
+            select(BankTransaction.id)
+            .where(BankTransaction.bank_file_id == file_id)
+            .order_by(BankTransaction.id)
+        ).scalars().all()
         
-        if not transactions:
+        if not transaction_ids:
             logger.warning(f"No transactions found for file {file_id}")
             bank_file.classification_status = ClassificationStatus.DONE
             bank_file.classification_progress = 100
             db.commit()
             return {"status": "success", "message": "No transactions to classify"}
         
-        total_transactions = len(transactions)
-        transaction_ids = [txn.id for txn in transactions]
+        total_transactions = len(transaction_ids)
         
         logger.info(f"Classifying {total_transactions} transactions for file {file_id}")
         
         # Process in batches
         batch_size = 200
-        processed = 0
+        committed_progress = 0
+        committed_at = time.monotonic()
         
-        for i in range(0, total_transactions, batch_size):
-            batch_ids = transaction_ids[i:i + batch_size]
-            
-            try:
-                # Classify batch
+        try:
+            # Batches run one after another; with use_ai each batch sends
+            # its OpenAI requests concurrently (openai_classify_concurrency)
+            for i in range(0, total_transactions, batch_size):
+                batch_ids = transaction_ids[i:i + batch_size]
                 classify_transactions_batch(
                     db=db,
                     transaction_ids=batch_ids,
@@ -66,19 +76,27 @@ def classify_bank_file(self, file_id: int, use_ai: bool = False):
                     chunk_size=100,
                 )
                 
-                processed = min(i + batch_size, total_transactions)
+                processed = i + len(batch_ids)
                 progress = int((processed / total_transactions) * 100)
                 
-                # Update progress
+                # Update progress; the classifier's own chunk commits carry it
+                # along, so only commit explicitly every step/interval
                 bank_file.classification_progress = progress
-                db.commit()
+                now = time.monotonic()
+                if (
+                    progress - committed_progress >= PROGRESS_COMMIT_STEP
+                    or now - committed_at >= PROGRESS_COMMIT_INTERVAL
+                ):
+                    db.commit()
+                    committed_progress = progress
+                    committed_at = now
                 
                 logger.info(f"File {file_id}: Classified {processed}/{total_transactions} ({progress}%)")
                 
-            except Exception as e:
-                logger.error(f"Error classifying batch for file {file_id}: {str(e)}")
-                db.rollback()
-                raise
+        except Exception as e:
+            logger.error(f"Error classifying batch for file {file_id}: {str(e)}")
+            db.rollback()
+            raise
         
         # Mark as DONE
         bank_file.classification_status = ClassificationStatus.DONE
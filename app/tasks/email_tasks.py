@@ -1,9 +1,16 @@
 import asyncio
+import hashlib
 import logging
+import os
+import threading
+from dataclasses import dataclass
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional
 
 from celery import shared_task
+from sqlalchemy import delete, exists, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
 from app.celery_app import celery_app
@@ -23,20 +30,100 @@ from app.models.document import (
 from app.services.email import get_email_adapter, is_email_whitelisted, EmailMessage
 from app.services.extraction import AttachmentExtractor, ContentExtractor
 from app.services.ocr import get_ocr_provider
-from app.services.classification import DocumentClassifier
+from app.services.classification import DocumentClassifier, get_document_classifier
 from app.services.storage import S3StorageService
-from app.services.security import VirusScanner, FileValidator
+from app.services.security import VirusScanner, FileValidator, screen_uploads
 
 logger = logging.getLogger(__name__)
 
+# Rows deleted per transaction by cleanup_old_jobs
+CLEANUP_BATCH_SIZE = 5000
+
+
+def get_or_create_tags(db: Session, names, cache: dict) -> list:
+    """
+    Resolve tag names to Tag rows, creating missing ones as system tags.
+    
+    Names not yet in `cache` are fetched with one IN query; any still
+    missing are inserted in one statement (ON CONFLICT DO NOTHING, so a
+    concurrent worker creating the same tag is harmless) and re-read.
+    """
+    names = list(dict.fromkeys(names))
+    missing = [name for name in names if name not in cache]
+    if missing:
+        for tag in db.execute(select(Tag).where(Tag.name.in_(missing))).scalars():
+            cache[tag.name] = tag
+        missing = [name for name in missing if name not in cache]
+    if missing:
+        db.execute(
+            pg_insert(Tag)
+            .values([{"name": name, "is_system": True} for name in missing])
+            .on_conflict_do_nothing(index_elements=[Tag.name])
+        )
+        for tag in db.execute(select(Tag).where(Tag.name.in_(missing))).scalars():
+            cache[tag.name] = tag
+    return [cache[name] for name in names]
+
+
+# One event loop per worker process, run forever in a daemon thread, so
+# async clients keyed by loop (clamd sessions, Azure blob clients) are
+# reused across tasks instead of reconnecting each time
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+_worker_loop_pid: Optional[int] = None
+_worker_loop_lock = threading.Lock()
+
+
+def _get_worker_loop() -> asyncio.AbstractEventLoop:
+    """Return this process's background event loop, starting it if needed."""
+    global _worker_loop, _worker_loop_pid
+    
+    # A loop inherited over fork has no thread running it; start a new one
+    if _worker_loop is None or _worker_loop_pid != os.getpid():
+        with _worker_loop_lock:
+            if _worker_loop is None or _worker_loop_pid != os.getpid():
+                loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=loop.run_forever,
+                    name="celery-asyncio",
+                    daemon=True,
+                ).start()
+                _worker_loop, _worker_loop_pid = loop, os.getpid()
+    
+    return _worker_loop
+
+
+@dataclass(frozen=True)
+class EmailPipeline:
+    """Stateless services used by process_email, shared across tasks."""
+    attachment_extractor: AttachmentExtractor
+    content_extractor: ContentExtractor
+    ocr_provider: object
+    classifier: DocumentClassifier
+    storage: object
+    virus_scanner: VirusScanner
+    file_validator: FileValidator
+
+
+@lru_cache(maxsize=1)
+def get_email_pipeline() -> EmailPipeline:
+    """Build the email processing services once per worker process."""
+    from app.services.storage import get_storage_service
+    
+    settings = get_settings()
+    return EmailPipeline(
+        attachment_extractor=AttachmentExtractor(),
+        content_extractor=ContentExtractor(),
+        ocr_provider=get_ocr_provider(),
+        classifier=get_document_classifier(settings.classification_confidence_threshold),
+        storage=get_storage_service(),
+        virus_scanner=VirusScanner(),
+        file_validator=FileValidator(),
+    )
+
 
 def run_async(coro):
     """Helper to run async code in sync context."""
-    loop = asyncio.new_event_loop()
-    try:
-        return loop.run_until_complete(coro)
-    finally:
-        loop.close()
+    return asyncio.run_coroutine_threadsafe(coro, _get_worker_loop()).result()
 
 
 @celery_app.task(bind=True, max_retries=3, default_retry_delay=60)
@@ -53,52 +140,64 @@ def poll_inbox(self):
             adapter = get_email_adapter()
             
             async with adapter:
-                emails = await adapter.fetch_unread_emails(
+                # Headers are enough to queue jobs; the full message (with
+                # attachments) is fetched once, by process_email
+                emails = await adapter.fetch_unread_headers(
                     limit=20,
                     since=datetime.utcnow() - timedelta(days=7),
                 )
                 
                 logger.info(f"Found {len(emails)} unread emails")
                 
+                candidates = []
                 for email in emails:
                     # Check whitelist
                     if not is_email_whitelisted(email.from_address):
                         logger.debug(f"Skipping non-whitelisted email from {email.from_address}")
                         continue
+                    candidates.append(email)
+                
+                if not candidates:
+                    return len(emails)
+                
+                # One job per Message-ID; within a poll keep the first
+                rows = {}
+                for email in candidates:
+                    rows.setdefault(email.message_id, {
+                        "email_uid": email.uid,
+                        "email_message_id": email.message_id,
+                        "email_from": email.from_address,
+                        "email_to": ",".join(email.to_addresses),
+                        "email_subject": email.subject,
+                        "email_date": email.date,
+                        "status": ProcessingStatus.QUEUED,
+                    })
+                
+                db = SessionLocal()
+                try:
+                    # Insert new jobs and skip already-processed emails in one
+                    # statement; the unique Message-ID makes this race-free
+                    # between overlapping polls
+                    queued = db.execute(
+                        pg_insert(EmailProcessingJob)
+                        .values(list(rows.values()))
+                        .on_conflict_do_nothing(index_elements=[EmailProcessingJob.email_message_id])
+                        .returning(EmailProcessingJob.id, EmailProcessingJob.email_subject)
+                    ).all()
+                    db.commit()
                     
-                    # Skip if already processed
-                    db = SessionLocal()
-                    try:
-                        existing = db.query(EmailProcessingJob).filter(
-                            EmailProcessingJob.email_message_id == email.message_id
-                        ).first()
-                        
-                        if existing:
-                            logger.debug(f"Email already processed: {email.message_id}")
-                            continue
-                        
-                        # Create processing job
-                        job = EmailProcessingJob(
-                            email_uid=email.uid,
-                            email_message_id=email.message_id,
-                            email_from=email.from_address,
-                            email_to=",".join(email.to_addresses),
-                            email_subject=email.subject,
-                            email_date=email.date,
-                            email_body_preview=email.body_text[:500] if email.body_text else None,
-                            status=ProcessingStatus.QUEUED,
-                            attachments_count=len(email.attachments),
-                        )
-                        db.add(job)
-                        db.commit()
-                        
-                        # Queue processing task
-                        process_email.delay(job.id)
-                        
-                        logger.info(f"Queued email for processing: {email.subject}")
-                        
-                    finally:
-                        db.close()
+                    if len(queued) < len(rows):
+                        logger.debug(f"Skipped {len(rows) - len(queued)} already processed emails")
+                    
+                    # Queue processing tasks once the jobs are visible to
+                    # workers, publishing them all over one broker connection
+                    with celery_app.producer_or_acquire() as producer:
+                        for job_id, subject in queued:
+                            process_email.apply_async((job_id,), producer=producer)
+                            logger.info(f"Queued email for processing: {subject}")
+                    
+                finally:
+                    db.close()
                 
                 return len(emails)
         
@@ -122,7 +221,7 @@ def process_email(self, job_id: int):
     
     try:
         # Get job
-        job = db.query(EmailProcessingJob).filter(EmailProcessingJob.id == job_id).first()
+        job = db.get(EmailProcessingJob, job_id)
         if not job:
             logger.error(f"Job not found: {job_id}")
             return
@@ -141,262 +240,327 @@ def process_email(self, job_id: int):
                 if not email:
                     raise Exception(f"Email not found: {job.email_uid}")
                 
-                # Initialize services
-                attachment_extractor = AttachmentExtractor()
-                content_extractor = ContentExtractor()
-                ocr_provider = get_ocr_provider()
-                classifier = DocumentClassifier(settings.classification_confidence_threshold)
-                from app.services.storage import get_storage_service
-                storage = get_storage_service()
-                virus_scanner = VirusScanner()
-                file_validator = FileValidator()
+                job.email_body_preview = email.body_text[:500] if email.body_text else None
+                job.attachments_count = len(email.attachments)
+                
+                # Services are built once per worker process
+                pipeline = get_email_pipeline()
+                attachment_extractor = pipeline.attachment_extractor
+                content_extractor = pipeline.content_extractor
+                ocr_provider = pipeline.ocr_provider
+                classifier = pipeline.classifier
+                storage = pipeline.storage
+                virus_scanner = pipeline.virus_scanner
+                file_validator = pipeline.file_validator
                 
                 documents_created = 0
+                tag_cache = {}
                 
-                # Process attachments
+                # Extract files from every attachment (handles ZIP archives).
+                # Stage changes on job.status are not committed on their own;
+                # they are written with the next audit/document commit.
+                job.status = ProcessingStatus.EXTRACTING
+                extracted_files = []
                 for attachment in email.attachments:
                     try:
-                        # Extract files (handles ZIP archives)
-                        job.status = ProcessingStatus.EXTRACTING
-                        db.commit()
-                        
                         extraction_result = attachment_extractor.extract(
                             attachment.filename,
                             attachment.content,
                             attachment.content_type,
                         )
+                    except Exception as e:
+                        logger.error(f"Error processing attachment {attachment.filename}: {e}")
+                        continue
+                    extracted_files.extend(extraction_result.files)
+                
+                # Skip files whose exact bytes are already stored as a document
+                # (vendors resend statements and reminders); they need no
+                # scan, OCR or classification
+                content_hashes = await asyncio.to_thread(
+                    lambda: [hashlib.sha256(f.content).hexdigest() for f in extracted_files]
+                )
+                known = dict(db.execute(
+                    select(Document.storage_hash, Document.id).where(
+                        Document.storage_hash.in_(set(content_hashes))
+                    )
+                ).all()) if content_hashes else {}
+                if known:
+                    new_files = []
+                    for extracted_file, content_hash in zip(extracted_files, content_hashes):
+                        existing_id = known.get(content_hash)
+                        if existing_id is None:
+                            new_files.append((extracted_file, content_hash))
+                            continue
+                        logger.info(
+                            f"Skipping {extracted_file.filename}: same content as document {existing_id}"
+                        )
+                        db.add(AuditLog(
+                            action="duplicate_skipped",
+                            details={
+                                "filename": extracted_file.filename,
+                                "existing_document_id": existing_id,
+                            },
+                            actor_type="system",
+                            actor_name="email_processor",
+                            document_id=existing_id,
+                        ))
+                    extracted_files = [f for f, _ in new_files]
+                    content_hashes = [h for _, h in new_files]
+                
+                # Validate and virus scan all new files together
+                job.status = ProcessingStatus.SCANNING
+                screenings = await screen_uploads(
+                    [(f.content, f.filename, f.content_type) for f in extracted_files],
+                    validator=file_validator,
+                    scanner=virus_scanner,
+                    content_hashes=content_hashes,
+                )
+                
+                accepted = []
+                for extracted_file, screening in zip(extracted_files, screenings):
+                    if not screening.validation.is_valid:
+                        logger.warning(f"File validation failed: {screening.validation.errors}")
+                        continue
+                    
+                    scan_result = screening.scan
+                    if not scan_result.is_clean:
+                        logger.warning(f"Virus detected: {scan_result.virus_name}")
+                        # Create audit log
+                        audit = AuditLog(
+                            action="virus_detected",
+                            details={
+                                "filename": extracted_file.filename,
+                                "virus": scan_result.virus_name,
+                            },
+                            actor_type="system",
+                            actor_name="virus_scanner",
+                        )
+                        db.add(audit)
+                        db.commit()
+                        continue
+                    
+                    accepted.append((extracted_file, screening))
+                
+                # OCR, classification and upload only wait on the network and
+                # do not touch the session, so clean files go through them
+                # concurrently (bounded to spare the OCR/storage quotas)
+                semaphore = asyncio.Semaphore(settings.attachment_concurrency)
+                
+                async def _prepare(extracted_file, screening):
+                    async with semaphore:
+                        # Extract content
+                        content = content_extractor.extract(
+                            extracted_file.content,
+                            extracted_file.content_type,
+                            extracted_file.filename,
+                        )
                         
-                        for extracted_file in extraction_result.files:
-                            # Validate file
-                            validation = file_validator.validate(
-                                extracted_file.content,
-                                extracted_file.filename,
-                                extracted_file.content_type,
-                            )
-                            
-                            if not validation.is_valid:
-                                logger.warning(f"File validation failed: {validation.errors}")
-                                continue
-                            
-                            # Virus scan
-                            job.status = ProcessingStatus.SCANNING
-                            db.commit()
-                            
-                            scan_result = await virus_scanner.scan(extracted_file.content)
-                            if not scan_result.is_clean:
-                                logger.warning(f"Virus detected: {scan_result.virus_name}")
-                                # Create audit log
-                                audit = AuditLog(
-                                    action="virus_detected",
-                                    details={
-                                        "filename": extracted_file.filename,
-                                        "virus": scan_result.virus_name,
-                                    },
-                                    actor_type="system",
-                                    actor_name="virus_scanner",
+                        # OCR if needed
+                        if content.metadata.get("needs_ocr"):
+                            if extracted_file.content_type.startswith("image/"):
+                                ocr_result = await ocr_provider.extract_text(
+                                    extracted_file.content,
+                                    extracted_file.content_type,
                                 )
-                                db.add(audit)
-                                db.commit()
-                                continue
+                            elif extracted_file.content_type == "application/pdf":
+                                ocr_result = await ocr_provider.extract_text_from_pdf(
+                                    extracted_file.content
+                                )
+                            else:
+                                ocr_result = None
                             
-                            # Extract content
-                            content = content_extractor.extract(
-                                extracted_file.content,
-                                extracted_file.content_type,
-                                extracted_file.filename,
+                            if ocr_result and ocr_result.text:
+                                content.text = ocr_result.text
+                                content.confidence = ocr_result.confidence
+                        
+                        # Classify
+                        classification = classifier.classify(
+                            content.text,
+                            source_email=email.from_address,
+                        )
+                        
+                        # Upload to S3
+                        stored_file = await storage.upload_file(
+                            extracted_file.content,
+                            extracted_file.filename,
+                            extracted_file.content_type,
+                            folder="documents",
+                            metadata={
+                                "source_email": email.from_address,
+                                "email_subject": email.subject,
+                                "document_type": classification.document_type.value,
+                            },
+                            content_hash=screening.content_hash,
+                        )
+                        
+                        return content, classification, stored_file
+                
+                job.status = ProcessingStatus.CLASSIFYING
+                if accepted:
+                    # Once per email, not per attachment
+                    await storage.ensure_bucket_exists()
+                prepared = await asyncio.gather(
+                    *(_prepare(f, screening) for f, screening in accepted),
+                    return_exceptions=True,
+                )
+                
+                # Record documents one at a time, in attachment order
+                for (extracted_file, screening), result in zip(accepted, prepared):
+                    if isinstance(result, BaseException):
+                        logger.error(f"Error processing attachment {extracted_file.filename}: {result}")
+                        continue
+                    content, classification, stored_file = result
+                    
+                    try:
+                        # Create document record
+                        document = Document(
+                            source_email=email.from_address,
+                            source_email_subject=email.subject,
+                            source_email_date=email.date,
+                            email_message_id=email.message_id,
+                            original_filename=extracted_file.filename,
+                            storage_path=stored_file.key,
+                            storage_hash=stored_file.content_hash,
+                            content_type=extracted_file.content_type,
+                            file_size=extracted_file.size,
+                            document_type=classification.document_type,
+                            destination=classification.destination,
+                            confidence_score=classification.confidence,
+                            vendor_name=classification.parsed_fields.vendor_name,
+                            invoice_number=classification.parsed_fields.invoice_number,
+                            invoice_date=classification.parsed_fields.invoice_date,
+                            due_date=classification.parsed_fields.due_date,
+                            total_amount=classification.parsed_fields.total_amount,
+                            tax_amount=classification.parsed_fields.tax_amount,
+                            currency=classification.parsed_fields.currency,
+                            parsed_fields=classification.parsed_fields.confidence_scores,
+                            ocr_text=content.text[:10000] if content.text else None,
+                            status=DocumentStatus.NEEDS_REVIEW if classification.needs_review else DocumentStatus.PROCESSED,
+                            processing_status=ProcessingStatus.COMPLETED,
+                            is_draft=not settings.auto_post_mode,
+                            is_auto_posted=settings.auto_post_mode,
+                            requires_review=classification.needs_review,
+                            virus_scanned=True,
+                            virus_clean=True,
+                            processing_job_id=job.id,
+                        )
+                        
+                        # Add tags
+                        document.tags.extend(
+                            get_or_create_tags(db, classification.tags, tag_cache)
+                        )
+                        
+                        # Flush for the ID; the document is committed together
+                        # with its audit log and notification below
+                        db.add(document)
+                        db.flush()
+                        
+                        # Create AR/AP records if applicable
+                        try:
+                            from app.services.accounting.document_to_accounting_service import (
+                                create_ar_invoice_from_document,
+                                create_ap_bill_from_document,
                             )
                             
-                            # OCR if needed
-                            if content.metadata.get("needs_ocr"):
-                                if extracted_file.content_type.startswith("image/"):
-                                    ocr_result = await ocr_provider.extract_text(
-                                        extracted_file.content,
-                                        extracted_file.content_type,
-                                    )
-                                elif extracted_file.content_type == "application/pdf":
-                                    ocr_result = await ocr_provider.extract_text_from_pdf(
-                                        extracted_file.content
-                                    )
-                                else:
-                                    ocr_result = None
-                                
-                                if ocr_result and ocr_result.text:
-                                    content.text = ocr_result.text
-                                    content.confidence = ocr_result.confidence
-                            
-                            # Classify
-                            job.status = ProcessingStatus.CLASSIFYING
-                            db.commit()
-                            
-                            classification = classifier.classify(
-                                content.text,
-                                source_email=email.from_address,
+                            # Determine if we should create AR or AP
+                            should_create_ar = (
+                                document.document_type == DocumentType.INVOICE
+                                and document.destination == DocumentDestination.ACCOUNT_RECEIVABLE
                             )
-                            
-                            # Upload to S3
-                            job.status = ProcessingStatus.UPLOADING
-                            db.commit()
-                            
-                            await storage.ensure_bucket_exists()
-                            stored_file = await storage.upload_file(
-                                extracted_file.content,
-                                extracted_file.filename,
-                                extracted_file.content_type,
-                                folder="documents",
-                                metadata={
-                                    "source_email": email.from_address,
-                                    "email_subject": email.subject,
-                                    "document_type": classification.document_type.value,
-                                },
+                            should_create_ap = (
+                                document.document_type == DocumentType.INVOICE
+                                and document.destination == DocumentDestination.ACCOUNT_PAYABLE
                             )
                             
-                            # Create document record
-                            document = Document(
-                                source_email=email.from_address,
-                                source_email_subject=email.subject,
-                                source_email_date=email.date,
-                                email_message_id=email.message_id,
-                                original_filename=extracted_file.filename,
-                                storage_path=stored_file.key,
-                                storage_hash=stored_file.content_hash,
-                                content_type=extracted_file.content_type,
-                                file_size=extracted_file.size,
-                                document_type=classification.document_type,
-                                destination=classification.destination,
-                                confidence_score=classification.confidence,
-                                vendor_name=classification.parsed_fields.vendor_name,
-                                invoice_number=classification.parsed_fields.invoice_number,
-                                invoice_date=classification.parsed_fields.invoice_date,
-                                due_date=classification.parsed_fields.due_date,
-                                total_amount=classification.parsed_fields.total_amount,
-                                tax_amount=classification.parsed_fields.tax_amount,
-                                currency=classification.parsed_fields.currency,
-                                parsed_fields=classification.parsed_fields.confidence_scores,
-                                ocr_text=content.text[:10000] if content.text else None,
-                                status=DocumentStatus.NEEDS_REVIEW if classification.needs_review else DocumentStatus.PROCESSED,
-                                processing_status=ProcessingStatus.COMPLETED,
-                                is_draft=not settings.auto_post_mode,
-                                is_auto_posted=settings.auto_post_mode,
-                                requires_review=classification.needs_review,
-                                virus_scanned=True,
-                                virus_clean=True,
-                                processing_job_id=job.id,
-                            )
-                            
-                            # Add tags
-                            for tag_name in classification.tags:
-                                tag = db.query(Tag).filter(Tag.name == tag_name).first()
-                                if not tag:
-                                    tag = Tag(name=tag_name, is_system=True)
-                                    db.add(tag)
-                                    db.flush()
-                                document.tags.append(tag)
-                            
-                            db.add(document)
-                            db.commit()
+                            if should_create_ar or should_create_ap:
+                                # The accounting service runs its own commit;
+                                # keep the document if it fails
+                                db.commit()
                             
-                            # Create AR/AP records if applicable
-                            try:
-                                from app.services.accounting.document_to_accounting_service import (
-                                    create_ar_invoice_from_document,
-                                    create_ap_bill_from_document,
-                                )
-                                
-                                # Determine if we should create AR or AP
-                                should_create_ar = (
-                                    document.document_type == DocumentType.INVOICE
-                                    and document.destination == DocumentDestination.ACCOUNT_RECEIVABLE
-                                )
-                                should_create_ap = (
-                                    document.document_type == DocumentType.INVOICE
-                                    and document.destination == DocumentDestination.ACCOUNT_PAYABLE
+                            if should_create_ar:
+                                ar_invoice = create_ar_invoice_from_document(db, document.id)
+                                logger.info(
+                                    f"Created AR Invoice {ar_invoice.id} from document {document.id}"
                                 )
                                 
-                                if should_create_ar:
-                                    ar_invoice = create_ar_invoice_from_document(db, document.id)
-                                    logger.info(
-                                        f"Created AR Invoice {ar_invoice.id} from document {document.id}"
+                                # Create notification
+                                try:
+                                    from app.models.document import Notification
+                                    notification = Notification(
+                                        title="AR Invoice Created",
+                                        message=f"AR Invoice {ar_invoice.invoice_number} created from document {document.original_filename}",
+                                        notification_type="accounting",
+                                        severity="success",
+                                        reference_type="ar_invoice",
+                                        reference_id=None,  # UUID stored in reference_code as string
+                                        reference_code=str(ar_invoice.id),
+                                        amount=str(ar_invoice.total_amount),
+                                        document_id=document.id,
                                     )
-                                    
-                                    # Create notification
-                                    try:
-                                        from app.models.document import Notification
-                                        notification = Notification(
-                                            title="AR Invoice Created",
-                                            message=f"AR Invoice {ar_invoice.invoice_number} created from document {document.original_filename}",
-                                            notification_type="accounting",
-                                            severity="success",
-                                            reference_type="ar_invoice",
-                                            reference_id=None,  # UUID stored in reference_code as string
-                                            reference_code=str(ar_invoice.id),
-                                            amount=str(ar_invoice.total_amount),
-                                            document_id=document.id,
-                                        )
-                                        db.add(notification)
-                                        db.commit()
-                                    except Exception as notif_error:
-                                        logger.warning(f"Failed to create notification: {notif_error}")
+                                    db.add(notification)
+                                except Exception as notif_error:
+                                    logger.warning(f"Failed to create notification: {notif_error}")
+                            
+                            elif should_create_ap:
+                                ap_bill = create_ap_bill_from_document(db, document.id)
+                                logger.info(
+                                    f"Created AP Bill {ap_bill.id} from document {document.id}"
+                                )
                                 
-                                elif should_create_ap:
-                                    ap_bill = create_ap_bill_from_document(db, document.id)
-                                    logger.info(
-                                        f"Created AP Bill {ap_bill.id} from document {document.id}"
+                                # Create notification
+                                try:
+                                    from app.models.document import Notification
+                                    notification = Notification(
+                                        title="AP Bill Created",
+                                        message=f"AP Bill {ap_bill.bill_number} created from document {document.original_filename}",
+                                        notification_type="accounting",
+                                        severity="success",
+                                        reference_type="ap_bill",
+                                        reference_id=None,  # UUID stored in reference_code as string
+                                        reference_code=str(ap_bill.id),
+                                        amount=str(ap_bill.total_amount),
+                                        document_id=document.id,
                                     )
-                                    
-                                    # Create notification
-                                    try:
-                                        from app.models.document import Notification
-                                        notification = Notification(
-                                            title="AP Bill Created",
-                                            message=f"AP Bill {ap_bill.bill_number} created from document {document.original_filename}",
-                                            notification_type="accounting",
-                                            severity="success",
-                                            reference_type="ap_bill",
-                                            reference_id=None,  # UUID stored in reference_code as string
-                                            reference_code=str(ap_bill.id),
-                                            amount=str(ap_bill.total_amount),
-                                            document_id=document.id,
-                                        )
-                                        db.add(notification)
-                                        db.commit()
-                                    except Exception as notif_error:
-                                        logger.warning(f"Failed to create notification: {notif_error}")
-                                
-                            except Exception as accounting_error:
-                                # Don't break email processing if accounting creation fails
-                                logger.error(
-                                    f"Failed to create AR/AP record from document {document.id}: {accounting_error}",
-                                    exc_info=True
-                                )
+                                    db.add(notification)
+                                except Exception as notif_error:
+                                    logger.warning(f"Failed to create notification: {notif_error}")
                             
-                            documents_created += 1
-                            
-                            # Create audit log
-                            audit = AuditLog(
-                                action="document_created",
-                                details={
-                                    "filename": extracted_file.filename,
-                                    "type": classification.document_type.value,
-                                    "destination": classification.destination.value,
-                                    "confidence": classification.confidence,
-                                },
-                                actor_type="celery",
-                                actor_id=self.request.id,
-                                actor_name="email_processor",
-                                document_id=document.id,
+                        except Exception as accounting_error:
+                            # Don't break email processing if accounting creation fails
+                            logger.error(
+                                f"Failed to create AR/AP record from document {document.id}: {accounting_error}",
+                                exc_info=True
                             )
-                            db.add(audit)
-                            
-                            # Create notification
-                            create_notification(
-                                db,
-                                document,
-                                classification,
-                                email.from_address,
-                            )
-                            
+                        
+                        documents_created += 1
+                        
+                        # Create audit log
+                        audit = AuditLog(
+                            action="document_created",
+                            details={
+                                "filename": extracted_file.filename,
+                                "type": classification.document_type.value,
+                                "destination": classification.destination.value,
+                                "confidence": classification.confidence,
+                            },
+                            actor_type="celery",
+                            actor_id=self.request.id,
+                            actor_name="email_processor",
+                            document_id=document.id,
+                        )
+                        db.add(audit)
+                        
+                        # Create notification
+                        create_notification(
+                            db,
+                            document,
+                            classification,
+                            email.from_address,
+                        )
+                        db.commit()
+                        
                     except Exception as e:
-                        logger.error(f"Error processing attachment {attachment.filename}: {e}")
+                        logger.error(f"Error processing attachment {extracted_file.filename}: {e}")
                         continue
                 
                 # Mark email as processed
@@ -444,12 +608,31 @@ def cleanup_old_jobs():
         # Delete jobs older than 30 days
         cutoff = datetime.utcnow() - timedelta(days=30)
         
-        deleted = db.query(EmailProcessingJob).filter(
-            EmailProcessingJob.created_at < cutoff,
-            EmailProcessingJob.status == ProcessingStatus.COMPLETED,
-        ).delete()
+        # Delete in short batches, each its own transaction, so the nightly
+        # run never holds locks on a large range. Jobs still referenced by
+        # a document are kept (documents.processing_job_id).
+        batch = (
+            select(EmailProcessingJob.id)
+            .where(
+                EmailProcessingJob.created_at < cutoff,
+                EmailProcessingJob.status == ProcessingStatus.COMPLETED,
+                ~exists().where(Document.processing_job_id == EmailProcessingJob.id),
+            )
+            .limit(CLEANUP_BATCH_SIZE)
+            .correlate(None)
+            .scalar_subquery()
+        )
+        
+        deleted = 0
+        while True:
+            count = db.execute(
+                delete(EmailProcessingJob).where(EmailProcessingJob.id.in_(batch))
+            ).rowcount
+            db.commit()
+            deleted += count
+            if count < CLEANUP_BATCH_SIZE:
+                break
         
-        db.commit()
         logger.info(f"Cleaned up {deleted} old processing jobs")
         
         return deleted
@@ -469,14 +652,14 @@ def reprocess_document(self, document_id: int):
     db = SessionLocal()
     
     try:
-        document = db.query(Document).filter(Document.id == document_id).first()
+        document = db.get(Document, document_id)
         if not document:
             logger.error(f"Document not found: {document_id}")
             return
         
         # Re-classify
         settings = get_settings()
-        classifier = DocumentClassifier(settings.classification_confidence_threshold)
+        classifier = get_document_classifier(settings.classification_confidence_threshold)
         
         if document.ocr_text:
             classification = classifier.classify(
@@ -537,7 +720,7 @@ def create_notification(
     classification,
     source_email: str,
 ):
-    """Create a notification for a processed document."""
+    """Create a notification for a processed document (the caller commits)."""
     
     if classification.needs_review:
         title = "Review required — Document needs classification"
@@ -575,7 +758,3 @@ def create_notification(
     )
     
     db.add(notification)
-    db.commit()
-
-
-
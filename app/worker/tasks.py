@@ -1,12 +1,14 @@
 """Celery tasks for email processing."""
 
-import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, Optional
 import structlog
 
 from celery import shared_task
 from celery.exceptions import MaxRetriesExceededError
+from sqlalchemy import delete, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
 from ..core.config import get_settings
@@ -32,10 +34,39 @@ from ..services.notification_service import NotificationService
 logger = structlog.get_logger()
 settings = get_settings()
 
+SYSTEM_TAGS = [
+    ("invoice", "#10b981", "Automatically tagged as invoice"),
+    ("receipt", "#3b82f6", "Automatically tagged as receipt"),
+    ("needs_review", "#f59e0b", "Requires manual review"),
+]
+
+# System tag applied for a classified document type / destination
+DOCUMENT_TYPE_TAGS = {
+    DocumentType.INVOICE: "invoice",
+    DocumentType.RECEIPT: "receipt",
+}
+DESTINATION_TAGS = {
+    DocumentDestination.NEEDS_REVIEW: "needs_review",
+}
+
+# Rows deleted per transaction by cleanup_old_documents_task
+CLEANUP_BATCH_SIZE = 5000
+
+# A document left in PROCESSING this long is assumed abandoned by a dead
+# worker and may be claimed again
+PROCESSING_STALE_AFTER = timedelta(minutes=30)
+
+# System tag name -> id; filled once the tags are known to exist
+_system_tag_ids: Dict[str, int] = {}
+
 
 def get_db() -> Session:
-    """Get database session."""
-    return SessionLocal()
+    """Get database session.
+    
+    Tasks keep working with their rows after committing progress, so
+    don't expire them (and re-SELECT on next access) at each commit.
+    """
+    return SessionLocal(expire_on_commit=False)
 
 
 @shared_task(bind=True, max_retries=3, default_retry_delay=60)
@@ -51,10 +82,14 @@ def poll_emails_task(self):
         since = datetime.utcnow() - timedelta(hours=24)
         
         processed_count = 0
-        for email in adapter.fetch_new_emails(since=since):
-            # Queue each email for processing
-            process_email_task.delay(email_data=serialize_email(email))
-            processed_count += 1
+        # Queue each email for processing, all over one broker connection
+        with self.app.producer_or_acquire() as producer:
+            for email in adapter.fetch_new_emails(since=since):
+                process_email_task.apply_async(
+                    kwargs={"email_data": serialize_email(email)},
+                    producer=producer,
+                )
+                processed_count += 1
         
         adapter.disconnect()
         
@@ -83,34 +118,35 @@ def process_email_task(self, email_data: dict):
             subject=email.subject
         )
         
-        # Check if already processed
-        existing = db.query(EmailMessage).filter(
-            EmailMessage.message_id == email.message_id
+        # Create email record, unless this message was already processed
+        # (the unique message_id makes this safe against concurrent pollers)
+        email_message = db.scalars(
+            pg_insert(EmailMessage)
+            .values(
+                message_id=email.message_id,
+                thread_id=email.thread_id,
+                from_address=email.from_address,
+                to_addresses=email.to_addresses,
+                cc_addresses=email.cc_addresses,
+                subject=email.subject,
+                received_date=email.received_date,
+                body_text=email.body_text,
+                body_html=email.body_html,
+                source_provider=settings.email_provider,
+                source_folder=settings.imap_folder if settings.email_provider == "imap" else settings.gmail_label,
+                processing_status=ProcessingStatus.PROCESSING,
+            )
+            .on_conflict_do_nothing(index_elements=[EmailMessage.message_id])
+            .returning(EmailMessage)
         ).first()
         
-        if existing:
+        if email_message is None:
+            db.rollback()
             logger.info("Email already processed", message_id=email.message_id)
             return {"status": "skipped", "reason": "already_processed"}
         
-        # Create email record
-        email_message = EmailMessage(
-            message_id=email.message_id,
-            thread_id=email.thread_id,
-            from_address=email.from_address,
-            to_addresses=json.dumps(email.to_addresses),
-            cc_addresses=json.dumps(email.cc_addresses),
-            subject=email.subject,
-            received_date=email.received_date,
-            body_text=email.body_text,
-            body_html=email.body_html,
-            source_provider=settings.email_provider,
-            source_folder=settings.imap_folder if settings.email_provider == "imap" else settings.gmail_label,
-            processing_status=ProcessingStatus.PROCESSING,
-        )
-        
-        db.add(email_message)
+        email_id = email_message.id
         db.commit()
-        db.refresh(email_message)
         
         # Log audit
         create_audit_log(
@@ -132,12 +168,10 @@ def process_email_task(self, email_data: dict):
             db.commit()
             return {"status": "completed", "documents": 0}
         
-        # Queue each document for processing
-        document_ids = []
-        for file in extracted_files:
-            # Create document record
-            doc = EmailDocument(
-                email_id=email_message.id,
+        # Create all document records in one transaction
+        documents = [
+            EmailDocument(
+                email_id=email_id,
                 original_filename=file.filename,
                 content_type=file.content_type,
                 file_size=file.size,
@@ -146,19 +180,25 @@ def process_email_task(self, email_data: dict):
                 storage_bucket=settings.s3_bucket_name,
                 processing_status=ProcessingStatus.PENDING,
             )
-            db.add(doc)
-            db.commit()
-            db.refresh(doc)
-            
-            document_ids.append(doc.id)
-            
-            # Queue document processing
-            process_document_task.delay(
-                document_id=doc.id,
-                file_content=file.content.hex(),  # Convert bytes to hex for JSON
-                filename=file.filename,
-                content_type=file.content_type
-            )
+            for file in extracted_files
+        ]
+        db.add_all(documents)
+        db.flush()
+        document_ids = [doc.id for doc in documents]
+        db.commit()
+        
+        # Queue document processing over one broker connection
+        with self.app.producer_or_acquire() as producer:
+            for document_id, file in zip(document_ids, extracted_files):
+                process_document_task.apply_async(
+                    kwargs={
+                        "document_id": document_id,
+                        "file_content": file.content,  # msgpack carries raw bytes
+                        "filename": file.filename,
+                        "content_type": file.content_type,
+                    },
+                    producer=producer,
+                )
         
         logger.info(
             "Queued documents for processing",
@@ -185,28 +225,24 @@ def process_email_task(self, email_data: dict):
 def process_document_task(
     self,
     document_id: int,
-    file_content: str,
+    file_content: bytes,
     filename: str,
     content_type: str
 ):
     """Process a single document: scan, OCR, classify, store."""
     db = get_db()
+    document = None
     
     try:
-        # Get document record
-        document = db.query(EmailDocument).filter(
-            EmailDocument.id == document_id
-        ).first()
+        # Claim the document in one statement so a duplicate delivery of
+        # this task skips it while it is in flight or already processed
+        if not claim_document(db, document_id):
+            logger.info("Document not found or already claimed", document_id=document_id)
+            return {"status": "skipped", "reason": "not_found_or_claimed"}
         
-        if not document:
-            logger.error("Document not found", document_id=document_id)
-            return {"status": "error", "reason": "not_found"}
+        document = db.get(EmailDocument, document_id)
         
-        document.processing_status = ProcessingStatus.PROCESSING
-        db.commit()
-        
-        # Convert hex back to bytes
-        content = bytes.fromhex(file_content)
+        content = _as_bytes(file_content)
         
         logger.info(
             "Processing document",
@@ -244,47 +280,79 @@ def process_document_task(
             )
             return {"status": "virus_detected", "virus": scan_result.virus_name}
         
-        # Step 2: Store file
-        storage = StorageService()
-        storage.ensure_bucket_exists()
-        
-        storage_result = storage.upload_file(
-            content=content,
-            filename=filename,
-            content_type=content_type,
-            file_hash=document.file_hash,
-            metadata={"document_id": str(document_id)}
-        )
-        
-        if not storage_result.success:
-            raise Exception(f"Storage upload failed: {storage_result.error}")
-        
-        document.storage_path = storage_result.key
-        document.storage_bucket = storage_result.bucket
-        
-        create_audit_log(
-            db, document_id, "uploaded_to_storage",
-            {"bucket": storage_result.bucket, "key": storage_result.key},
-            "system"
-        )
-        
-        # Step 3: OCR
-        ocr_service = get_ocr_service()
-        ocr_result = ocr_service.extract_text(content, content_type, filename)
-        
-        document.ocr_text = ocr_result.text
-        document.ocr_provider = ocr_result.provider
-        document.ocr_confidence = ocr_result.confidence
-        
-        create_audit_log(
-            db, document_id, "ocr_processed",
-            {"provider": ocr_result.provider, "confidence": ocr_result.confidence},
-            "system"
-        )
+        # Identical content already processed (e.g. a forwarded attachment):
+        # reuse its stored object and OCR text instead of redoing both
+        previous = db.query(
+            EmailDocument.id,
+            EmailDocument.storage_path,
+            EmailDocument.storage_bucket,
+            EmailDocument.ocr_text,
+            EmailDocument.ocr_provider,
+            EmailDocument.ocr_confidence,
+        ).filter(
+            EmailDocument.file_hash == document.file_hash,
+            EmailDocument.processing_status == ProcessingStatus.COMPLETED,
+            EmailDocument.id != document_id,
+        ).order_by(EmailDocument.id.desc()).first()
+        
+        if previous:
+            document.storage_path = previous.storage_path
+            document.storage_bucket = previous.storage_bucket
+            document.ocr_text = previous.ocr_text
+            document.ocr_provider = previous.ocr_provider
+            document.ocr_confidence = previous.ocr_confidence
+            ocr_text = previous.ocr_text
+            
+            create_audit_log(
+                db, document_id, "duplicate_reused",
+                {"source_document_id": previous.id, "key": previous.storage_path},
+                "system"
+            )
+        else:
+            # Steps 2 and 3: store the (clean) file while OCR runs; the
+            # upload is network I/O and overlaps with the OCR CPU work
+            storage = StorageService()
+            storage.ensure_bucket_exists()
+            ocr_service = get_ocr_service()
+            
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                upload = executor.submit(
+                    storage.upload_file,
+                    content=content,
+                    filename=filename,
+                    content_type=content_type,
+                    file_hash=document.file_hash,
+                    metadata={"document_id": str(document_id)}
+                )
+                ocr_result = ocr_service.extract_text(content, content_type, filename)
+                storage_result = upload.result()
+            
+            if not storage_result.success:
+                raise Exception(f"Storage upload failed: {storage_result.error}")
+            
+            document.storage_path = storage_result.key
+            document.storage_bucket = storage_result.bucket
+            
+            create_audit_log(
+                db, document_id, "uploaded_to_storage",
+                {"bucket": storage_result.bucket, "key": storage_result.key},
+                "system"
+            )
+            
+            document.ocr_text = ocr_result.text
+            document.ocr_provider = ocr_result.provider
+            document.ocr_confidence = ocr_result.confidence
+            ocr_text = ocr_result.text
+            
+            create_audit_log(
+                db, document_id, "ocr_processed",
+                {"provider": ocr_result.provider, "confidence": ocr_result.confidence},
+                "system"
+            )
         
         # Step 4: Classification
         classifier = ClassificationService(settings.classification_confidence_threshold)
-        classification = classifier.classify(ocr_result.text, filename)
+        classification = classifier.classify(ocr_text, filename)
         
         document.document_type = classification.document_type
         document.destination = classification.destination
@@ -305,13 +373,12 @@ def process_document_task(
         # Step 5: Add tags
         ensure_system_tags(db)
         
-        if classification.document_type == DocumentType.INVOICE:
-            add_tag_to_document(db, document_id, "invoice")
-        elif classification.document_type == DocumentType.RECEIPT:
-            add_tag_to_document(db, document_id, "receipt")
-        
-        if classification.destination == DocumentDestination.NEEDS_REVIEW:
-            add_tag_to_document(db, document_id, "needs_review")
+        for tag_name in (
+            DOCUMENT_TYPE_TAGS.get(classification.document_type),
+            DESTINATION_TAGS.get(classification.destination),
+        ):
+            if tag_name:
+                add_tag_to_document(db, document_id, tag_name)
         
         # Step 6: Set draft mode
         document.is_draft = not settings.auto_post_mode
@@ -378,13 +445,28 @@ def cleanup_old_documents_task():
         # Keep documents for 90 days
         cutoff = datetime.utcnow() - timedelta(days=90)
         
-        # Find old dismissed notifications
-        deleted_notifications = db.query(Notification).filter(
-            Notification.is_dismissed == True,
-            Notification.created_at < cutoff
-        ).delete()
+        # Delete old dismissed notifications in short batches, each its own
+        # transaction, so the table is never locked for one long delete
+        batch = (
+            select(Notification.id)
+            .where(
+                Notification.is_dismissed == True,
+                Notification.created_at < cutoff
+            )
+            .limit(CLEANUP_BATCH_SIZE)
+            .correlate(None)
+            .scalar_subquery()
+        )
         
-        db.commit()
+        deleted_notifications = 0
+        while True:
+            count = db.execute(
+                delete(Notification).where(Notification.id.in_(batch))
+            ).rowcount
+            db.commit()
+            deleted_notifications += count
+            if count < CLEANUP_BATCH_SIZE:
+                break
         
         logger.info(f"Cleaned up {deleted_notifications} old notifications")
         return {"deleted_notifications": deleted_notifications}
@@ -414,7 +496,7 @@ def serialize_email(email: ParsedEmail) -> dict:
             {
                 "filename": a.filename,
                 "content_type": a.content_type,
-                "content": a.content.hex(),
+                "content": a.content,
                 "size": a.size,
                 "content_id": a.content_id,
             }
@@ -441,7 +523,7 @@ def deserialize_email(data: dict) -> ParsedEmail:
             EmailAttachment(
                 filename=a["filename"],
                 content_type=a["content_type"],
-                content=bytes.fromhex(a["content"]),
+                content=_as_bytes(a["content"]),
                 size=a["size"],
                 content_id=a.get("content_id"),
             )
@@ -450,6 +532,40 @@ def deserialize_email(data: dict) -> ParsedEmail:
     )
 
 
+def _as_bytes(content) -> bytes:
+    """Attachment bytes from a task message (hex str if queued as JSON)."""
+    if isinstance(content, str):
+        return bytes.fromhex(content)
+    return content
+
+
+def claim_document(db: Session, document_id: int) -> bool:
+    """Move a document to PROCESSING unless it is processed or in flight.
+    
+    Returns False when the document does not exist, has already been
+    processed, or is being processed by another worker (and is not stale).
+    """
+    now = datetime.utcnow()
+    claimed_id = db.execute(
+        update(EmailDocument)
+        .where(
+            EmailDocument.id == document_id,
+            EmailDocument.processing_status.notin_(
+                (ProcessingStatus.COMPLETED, ProcessingStatus.VIRUS_DETECTED)
+            ),
+            or_(
+                EmailDocument.processing_status != ProcessingStatus.PROCESSING,
+                EmailDocument.updated_at < now - PROCESSING_STALE_AFTER,
+            ),
+        )
+        .values(processing_status=ProcessingStatus.PROCESSING, updated_at=now)
+        .returning(EmailDocument.id)
+        .execution_options(synchronize_session=False)
+    ).scalar_one_or_none()
+    db.commit()
+    return claimed_id is not None
+
+
 def create_audit_log(
     db: Session,
     document_id: Optional[int],
@@ -457,7 +573,7 @@ def create_audit_log(
     event_data: dict,
     actor: str
 ):
-    """Create an audit log entry."""
+    """Add an audit log entry; it is committed with the caller's next commit."""
     log = AuditLog(
         document_id=document_id,
         event_type=event_type,
@@ -465,42 +581,41 @@ def create_audit_log(
         actor=actor,
     )
     db.add(log)
-    db.commit()
 
 
 def ensure_system_tags(db: Session):
-    """Ensure system tags exist."""
-    system_tags = [
-        ("invoice", "#10b981", "Automatically tagged as invoice"),
-        ("receipt", "#3b82f6", "Automatically tagged as receipt"),
-        ("needs_review", "#f59e0b", "Requires manual review"),
-    ]
-    
-    for name, color, description in system_tags:
-        existing = db.query(Tag).filter(Tag.name == name).first()
-        if not existing:
-            tag = Tag(
-                name=name,
-                color=color,
-                description=description,
-                is_system=True
-            )
-            db.add(tag)
+    """Ensure system tags exist and cache their ids (once per worker process)."""
+    if _system_tag_ids:
+        return
     
+    db.execute(
+        pg_insert(Tag)
+        .values([
+            {"name": name, "color": color, "description": description, "is_system": True}
+            for name, color, description in SYSTEM_TAGS
+        ])
+        .on_conflict_do_nothing(index_elements=[Tag.name])
+    )
     db.commit()
+    
+    names = [name for name, _, _ in SYSTEM_TAGS]
+    _system_tag_ids.update(
+        db.query(Tag.name, Tag.id).filter(Tag.name.in_(names)).all()
+    )
 
 
 def add_tag_to_document(db: Session, document_id: int, tag_name: str):
-    """Add a tag to a document."""
-    tag = db.query(Tag).filter(Tag.name == tag_name).first()
-    if tag:
+    """Add a tag to a document (committed with the caller's transaction)."""
+    tag_id = _system_tag_ids.get(tag_name)
+    if tag_id is None:
+        tag_id = db.query(Tag.id).filter(Tag.name == tag_name).scalar()
+    if tag_id is not None:
         doc_tag = DocumentTag(
             document_id=document_id,
-            tag_id=tag.id,
+            tag_id=tag_id,
             added_by="system"
         )
         db.add(doc_tag)
-        db.commit()
 
 
 def update_email_status(db: Session, email_id: int):
@@ -509,17 +624,21 @@ def update_email_status(db: Session, email_id: int):
     if not email:
         return
     
-    documents = db.query(EmailDocument).filter(
-        EmailDocument.email_id == email_id
-    ).all()
+    # Document count per status; no need to load the rows themselves
+    status_counts = dict(
+        db.query(EmailDocument.processing_status, func.count())
+        .filter(EmailDocument.email_id == email_id)
+        .group_by(EmailDocument.processing_status)
+        .all()
+    )
     
-    if not documents:
+    if not status_counts:
         email.processing_status = ProcessingStatus.COMPLETED
-    elif all(d.processing_status == ProcessingStatus.COMPLETED for d in documents):
+    elif status_counts.keys() == {ProcessingStatus.COMPLETED}:
         email.processing_status = ProcessingStatus.COMPLETED
-    elif any(d.processing_status == ProcessingStatus.FAILED for d in documents):
+    elif ProcessingStatus.FAILED in status_counts:
         email.processing_status = ProcessingStatus.FAILED
-    elif any(d.processing_status == ProcessingStatus.NEEDS_REVIEW for d in documents):
+    elif ProcessingStatus.NEEDS_REVIEW in status_counts:
         email.processing_status = ProcessingStatus.NEEDS_REVIEW
     
     email.processed_at = datetime.utcnow()
@@ -0,0 +1,52 @@
+"""Shared database fixtures.
+
+Tests never commit to the database: each module runs in one outer
+transaction that is rolled back at the end, and each test runs in a
+savepoint inside it. Sessions join with
+``join_transaction_mode="create_savepoint"``, so commits made by the code
+under test only release savepoints.
+"""
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.db.session import engine
+
+
+@pytest.fixture(scope="module")
+def connection():
+    """Connection whose outer transaction spans the module."""
+    connection = engine.connect()
+    transaction = connection.begin()
+    try:
+        yield connection
+    finally:
+        transaction.rollback()
+        connection.close()
+
+
+@pytest.fixture(scope="module")
+def module_db(connection) -> Session:
+    """Session for module-scoped fixtures; its commits stay in the module transaction."""
+    db = Session(
+        bind=connection,
+        autoflush=False,
+        expire_on_commit=False,
+        join_transaction_mode="create_savepoint",
+    )
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def db(connection) -> Session:
+    """Session for one test, inside a savepoint that is rolled back afterwards."""
+    savepoint = connection.begin_nested()
+    db = Session(bind=connection, autoflush=False, join_transaction_mode="create_savepoint")
+    try:
+        yield db
+    finally:
+        db.close()
+        savepoint.rollback()
@@ -20,20 +20,20 @@ from app.domain.accounting.enums import (
     JournalStatus,
     SourceModule,
 )
-from app.db.session import SessionLocal
+from app.db.dependencies import get_db
 from app.main import app
 
 client = TestClient(app)
 
 
 @pytest.fixture
-def db() -> Session:
-    """Provide database session for tests."""
-    db = SessionLocal()
+def db(db: Session) -> Session:
+    """The shared rolled-back session, also used by API requests via get_db."""
+    app.dependency_overrides[get_db] = lambda: db
     try:
         yield db
     finally:
-        db.close()
+        app.dependency_overrides.pop(get_db, None)
 
 
 @pytest.fixture
@@ -79,7 +79,7 @@ def sample_chart_of_accounts(db: Session, test_company_id: UUID):
     )
     db.add(cash)
     
-    db.commit()
+    db.flush()
     
     return {
         "revenue": revenue,
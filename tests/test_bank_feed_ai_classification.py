@@ -17,17 +17,6 @@ from app.services.bank_feed.ai_classifier import (
     classify_transaction_rule_based,
     classify_transactions_batch,
 )
-from app.db.session import SessionLocal
-
-
-@pytest.fixture
-def db() -> Session:
-    """Provide database session for tests."""
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
 
 
 @pytest.fixture
@@ -44,8 +33,7 @@ def sample_bank_file(db: Session):
         bank_name="Chase",
     )
     db.add(bank_file)
-    db.commit()
-    db.refresh(bank_file)
+    db.flush()
     return bank_file
 
 
@@ -65,8 +53,7 @@ def test_classify_bank_fee_transaction(db: Session, sample_bank_file):
         },
     )
     db.add(txn)
-    db.commit()
-    db.refresh(txn)
+    db.flush()
     
     result = classify_transaction_rule_based(txn)
     
@@ -92,8 +79,7 @@ def test_classify_credit_card_payment(db: Session, sample_bank_file):
         },
     )
     db.add(txn)
-    db.commit()
-    db.refresh(txn)
+    db.flush()
     
     result = classify_transaction_rule_based(txn)
     
@@ -118,8 +104,7 @@ def test_classify_vendor_payment(db: Session, sample_bank_file):
         },
     )
     db.add(txn)
-    db.commit()
-    db.refresh(txn)
+    db.flush()
     
     result = classify_transaction_rule_based(txn)
     
@@ -144,8 +129,7 @@ def test_classify_transfer_in(db: Session, sample_bank_file):
         },
     )
     db.add(txn)
-    db.commit()
-    db.refresh(txn)
+    db.flush()
     
     result = classify_transaction_rule_based(txn)
     
@@ -188,7 +172,7 @@ def test_classify_transactions_batch(db: Session, sample_bank_file):
     
     for txn in transactions:
         db.add(txn)
-    db.commit()
+    db.flush()
     
     transaction_ids = [txn.id for txn in transactions]
     
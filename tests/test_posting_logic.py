@@ -5,7 +5,8 @@ from datetime import date
 from decimal import Decimal
 from uuid import uuid4, UUID
 
-from sqlalchemy.orm import Session
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session, selectinload
 
 from app.models.accounting import (
     ChartOfAccount,
@@ -31,93 +32,52 @@ from app.domain.accounting.ap_service import (
     post_bill,
     post_payment,
 )
-from app.db.session import SessionLocal
 
+# Amounts used by the posting scenarios
+ZERO = Decimal("0.00")
+AMOUNT_4K = Decimal("4000.00")
+AMOUNT_5K = Decimal("5000.00")
+AMOUNT_6K = Decimal("6000.00")
+AMOUNT_7500 = Decimal("7500.00")
+AMOUNT_10K = Decimal("10000.00")
 
-@pytest.fixture
-def db() -> Session:
-    """Provide database session for tests."""
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
 
-
-@pytest.fixture
+@pytest.fixture(scope="module")
 def test_company_id() -> UUID:
     """Generate a test company ID."""
     return uuid4()
 
 
-@pytest.fixture
-def sample_chart_of_accounts(db: Session, test_company_id: UUID):
+@pytest.fixture(scope="module")
+def sample_chart_of_accounts(module_db: Session, test_company_id: UUID):
     """Create sample chart of accounts for testing."""
-    # Revenue account
-    revenue = ChartOfAccount(
-        id=uuid4(),
-        company_id=test_company_id,
-        code="4000",
-        name="Sales Revenue",
-        account_type=AccountType.REVENUE,
-        is_active=True,
-    )
-    db.add(revenue)
-    
-    # Accounts Receivable
-    ar_account = ChartOfAccount(
-        id=uuid4(),
-        company_id=test_company_id,
-        code="1200",
-        name="Accounts Receivable",
-        account_type=AccountType.ASSET,
-        is_active=True,
-    )
-    db.add(ar_account)
-    
-    # Cash account
-    cash = ChartOfAccount(
-        id=uuid4(),
-        company_id=test_company_id,
-        code="1000",
-        name="Cash",
-        account_type=AccountType.ASSET,
-        is_cash=True,
-        is_active=True,
-    )
-    db.add(cash)
-    
-    # Expense account
-    expense = ChartOfAccount(
-        id=uuid4(),
-        company_id=test_company_id,
-        code="5000",
-        name="Operating Expenses",
-        account_type=AccountType.EXPENSE,
-        is_active=True,
-    )
-    db.add(expense)
-    
-    # Accounts Payable
-    ap_account = ChartOfAccount(
-        id=uuid4(),
-        company_id=test_company_id,
-        code="2000",
-        name="Accounts Payable",
-        account_type=AccountType.LIABILITY,
-        is_active=True,
-    )
-    db.add(ap_account)
-    
-    db.commit()
-    
-    return {
-        "revenue": revenue,
-        "ar": ar_account,
-        "cash": cash,
-        "expense": expense,
-        "ap": ap_account,
+    accounts = {
+        # key: (code, name, account_type, is_cash)
+        "revenue": ("4000", "Sales Revenue", AccountType.REVENUE, False),
+        "ar": ("1200", "Accounts Receivable", AccountType.ASSET, False),
+        "cash": ("1000", "Cash", AccountType.ASSET, True),
+        "expense": ("5000", "Operating Expenses", AccountType.EXPENSE, False),
+        "ap": ("2000", "Accounts Payable", AccountType.LIABILITY, False),
     }
+    # One multi-row INSERT ... RETURNING instead of a flush per object
+    created = module_db.scalars(
+        insert(ChartOfAccount).returning(ChartOfAccount, sort_by_parameter_order=True),
+        [
+            {
+                "id": uuid4(),
+                "company_id": test_company_id,
+                "code": code,
+                "name": name,
+                "account_type": account_type,
+                "is_cash": is_cash,
+                "is_active": True,
+            }
+            for code, name, account_type, is_cash in accounts.values()
+        ],
+    ).all()
+    module_db.commit()
+    
+    return dict(zip(accounts, created))
 
 
 def test_post_ar_invoice(db: Session, test_company_id: UUID, sample_chart_of_accounts):
@@ -131,19 +91,23 @@ def test_post_ar_invoice(db: Session, test_company_id: UUID, sample_chart_of_acc
         due_date=date(2025, 2, 15),
         status=InvoiceStatus.DRAFT,
         currency="USD",
-        total_amount=Decimal("10000.00"),
-        balance_amount=Decimal("10000.00"),
+        total_amount=AMOUNT_10K,
+        balance_amount=AMOUNT_10K,
         contact_id=uuid4(),
     )
     db.add(invoice)
-    db.commit()
-    db.refresh(invoice)
+    db.flush()
     
     # Post the invoice
     journal_entry_id = post_invoice(db, invoice.id)
     
     # Verify journal entry was created
-    je = db.query(JournalEntry).filter(JournalEntry.id == journal_entry_id).first()
+    je = (
+        db.query(JournalEntry)
+        .options(selectinload(JournalEntry.lines))
+        .filter(JournalEntry.id == journal_entry_id)
+        .first()
+    )
     assert je is not None
     assert je.company_id == test_company_id
     assert je.date == invoice.invoice_date
@@ -153,23 +117,24 @@ def test_post_ar_invoice(db: Session, test_company_id: UUID, sample_chart_of_acc
     assert je.posted_at is not None
     
     # Verify journal lines
-    lines = db.query(JournalLine).filter(JournalLine.journal_entry_id == je.id).all()
+    lines = je.lines
     assert len(lines) == 2
+    by_account = {line.account_id: line for line in lines}
     
     # Find AR line (debit)
-    ar_line = next((l for l in lines if l.account_id == sample_chart_of_accounts["ar"].id), None)
+    ar_line = by_account.get(sample_chart_of_accounts["ar"].id)
     assert ar_line is not None
-    assert ar_line.debit == Decimal("10000.00")
-    assert ar_line.credit == Decimal("0.00")
+    assert ar_line.debit == AMOUNT_10K
+    assert ar_line.credit == ZERO
     
     # Find Revenue line (credit)
-    revenue_line = next((l for l in lines if l.account_id == sample_chart_of_accounts["revenue"].id), None)
+    revenue_line = by_account.get(sample_chart_of_accounts["revenue"].id)
     assert revenue_line is not None
-    assert revenue_line.debit == Decimal("0.00")
-    assert revenue_line.credit == Decimal("10000.00")
+    assert revenue_line.debit == ZERO
+    assert revenue_line.credit == AMOUNT_10K
     
     # Verify invoice was updated
-    db.refresh(invoice)
+    db.refresh(invoice, ["journal_entry_id", "status"])
     assert invoice.journal_entry_id == journal_entry_id
     assert invoice.status == InvoiceStatus.SENT
 
@@ -185,13 +150,12 @@ def test_post_ar_receipt(db: Session, test_company_id: UUID, sample_chart_of_acc
         due_date=date(2025, 2, 15),
         status=InvoiceStatus.SENT,
         currency="USD",
-        total_amount=Decimal("10000.00"),
-        balance_amount=Decimal("10000.00"),
+        total_amount=AMOUNT_10K,
+        balance_amount=AMOUNT_10K,
         contact_id=uuid4(),
     )
     db.add(invoice)
-    db.commit()
-    db.refresh(invoice)
+    db.flush()
     
     # Create a receipt linked to the invoice
     receipt = ARReceipt(
@@ -199,47 +163,52 @@ def test_post_ar_receipt(db: Session, test_company_id: UUID, sample_chart_of_acc
         company_id=test_company_id,
         receipt_number="RCP-001",
         receipt_date=date(2025, 1, 20),
-        amount=Decimal("6000.00"),
+        amount=AMOUNT_6K,
         payment_method="Check",
         contact_id=invoice.contact_id,
         invoice_id=invoice.id,
     )
     db.add(receipt)
-    db.commit()
-    db.refresh(receipt)
+    db.flush()
     
     # Post the receipt
     journal_entry_id = post_receipt(db, receipt.id)
     
     # Verify journal entry
-    je = db.query(JournalEntry).filter(JournalEntry.id == journal_entry_id).first()
+    je = (
+        db.query(JournalEntry)
+        .options(selectinload(JournalEntry.lines))
+        .filter(JournalEntry.id == journal_entry_id)
+        .first()
+    )
     assert je is not None
     assert je.source_module == SourceModule.AR
     assert je.source_id == receipt.id
     
     # Verify journal lines
-    lines = db.query(JournalLine).filter(JournalLine.journal_entry_id == je.id).all()
+    lines = je.lines
     assert len(lines) == 2
+    by_account = {line.account_id: line for line in lines}
     
     # Cash line (debit)
-    cash_line = next((l for l in lines if l.account_id == sample_chart_of_accounts["cash"].id), None)
+    cash_line = by_account.get(sample_chart_of_accounts["cash"].id)
     assert cash_line is not None
-    assert cash_line.debit == Decimal("6000.00")
-    assert cash_line.credit == Decimal("0.00")
+    assert cash_line.debit == AMOUNT_6K
+    assert cash_line.credit == ZERO
     
     # AR line (credit)
-    ar_line = next((l for l in lines if l.account_id == sample_chart_of_accounts["ar"].id), None)
+    ar_line = by_account.get(sample_chart_of_accounts["ar"].id)
     assert ar_line is not None
-    assert ar_line.debit == Decimal("0.00")
-    assert ar_line.credit == Decimal("6000.00")
+    assert ar_line.debit == ZERO
+    assert ar_line.credit == AMOUNT_6K
     
     # Verify receipt was updated
-    db.refresh(receipt)
+    db.refresh(receipt, ["journal_entry_id"])
     assert receipt.journal_entry_id == journal_entry_id
     
     # Verify invoice balance and status were updated
-    db.refresh(invoice)
-    assert invoice.balance_amount == Decimal("4000.00")  # 10000 - 6000
+    db.refresh(invoice, ["balance_amount", "status"])
+    assert invoice.balance_amount == AMOUNT_4K  # 10000 - 6000
     assert invoice.status == InvoiceStatus.PARTIALLY_PAID
 
 
@@ -254,19 +223,23 @@ def test_post_ap_bill(db: Session, test_company_id: UUID, sample_chart_of_accoun
         due_date=date(2025, 2, 10),
         status=BillStatus.DRAFT,
         currency="USD",
-        total_amount=Decimal("5000.00"),
-        balance_amount=Decimal("5000.00"),
+        total_amount=AMOUNT_5K,
+        balance_amount=AMOUNT_5K,
         contact_id=uuid4(),
     )
     db.add(bill)
-    db.commit()
-    db.refresh(bill)
+    db.flush()
     
     # Post the bill
     journal_entry_id = post_bill(db, bill.id)
     
     # Verify journal entry
-    je = db.query(JournalEntry).filter(JournalEntry.id == journal_entry_id).first()
+    je = (
+        db.query(JournalEntry)
+        .options(selectinload(JournalEntry.lines))
+        .filter(JournalEntry.id == journal_entry_id)
+        .first()
+    )
     assert je is not None
     assert je.company_id == test_company_id
     assert je.date == bill.bill_date
@@ -275,23 +248,24 @@ def test_post_ap_bill(db: Session, test_company_id: UUID, sample_chart_of_accoun
     assert je.status == JournalStatus.POSTED
     
     # Verify journal lines
-    lines = db.query(JournalLine).filter(JournalLine.journal_entry_id == je.id).all()
+    lines = je.lines
     assert len(lines) == 2
+    by_account = {line.account_id: line for line in lines}
     
     # Expense line (debit)
-    expense_line = next((l for l in lines if l.account_id == sample_chart_of_accounts["expense"].id), None)
+    expense_line = by_account.get(sample_chart_of_accounts["expense"].id)
     assert expense_line is not None
-    assert expense_line.debit == Decimal("5000.00")
-    assert expense_line.credit == Decimal("0.00")
+    assert expense_line.debit == AMOUNT_5K
+    assert expense_line.credit == ZERO
     
     # AP line (credit)
-    ap_line = next((l for l in lines if l.account_id == sample_chart_of_accounts["ap"].id), None)
+    ap_line = by_account.get(sample_chart_of_accounts["ap"].id)
     assert ap_line is not None
-    assert ap_line.debit == Decimal("0.00")
-    assert ap_line.credit == Decimal("5000.00")
+    assert ap_line.debit == ZERO
+    assert ap_line.credit == AMOUNT_5K
     
     # Verify bill was updated
-    db.refresh(bill)
+    db.refresh(bill, ["journal_entry_id", "status"])
     assert bill.journal_entry_id == journal_entry_id
     assert bill.status == BillStatus.APPROVED
 
@@ -307,13 +281,12 @@ def test_post_ap_payment(db: Session, test_company_id: UUID, sample_chart_of_acc
         due_date=date(2025, 2, 10),
         status=BillStatus.APPROVED,
         currency="USD",
-        total_amount=Decimal("5000.00"),
-        balance_amount=Decimal("5000.00"),
+        total_amount=AMOUNT_5K,
+        balance_amount=AMOUNT_5K,
         contact_id=uuid4(),
     )
     db.add(bill)
-    db.commit()
-    db.refresh(bill)
+    db.flush()
     
     # Create a payment linked to the bill
     payment = APPayment(
@@ -321,47 +294,52 @@ def test_post_ap_payment(db: Session, test_company_id: UUID, sample_chart_of_acc
         company_id=test_company_id,
         payment_number="PAY-001",
         payment_date=date(2025, 1, 25),
-        amount=Decimal("5000.00"),
+        amount=AMOUNT_5K,
         payment_method="Wire Transfer",
         contact_id=bill.contact_id,
         bill_id=bill.id,
     )
     db.add(payment)
-    db.commit()
-    db.refresh(payment)
+    db.flush()
     
     # Post the payment
     journal_entry_id = post_payment(db, payment.id)
     
     # Verify journal entry
-    je = db.query(JournalEntry).filter(JournalEntry.id == journal_entry_id).first()
+    je = (
+        db.query(JournalEntry)
+        .options(selectinload(JournalEntry.lines))
+        .filter(JournalEntry.id == journal_entry_id)
+        .first()
+    )
     assert je is not None
     assert je.source_module == SourceModule.AP
     assert je.source_id == payment.id
     
     # Verify journal lines
-    lines = db.query(JournalLine).filter(JournalLine.journal_entry_id == je.id).all()
+    lines = je.lines
     assert len(lines) == 2
+    by_account = {line.account_id: line for line in lines}
     
     # AP line (debit)
-    ap_line = next((l for l in lines if l.account_id == sample_chart_of_accounts["ap"].id), None)
+    ap_line = by_account.get(sample_chart_of_accounts["ap"].id)
     assert ap_line is not None
-    assert ap_line.debit == Decimal("5000.00")
-    assert ap_line.credit == Decimal("0.00")
+    assert ap_line.debit == AMOUNT_5K
+    assert ap_line.credit == ZERO
     
     # Cash line (credit)
-    cash_line = next((l for l in lines if l.account_id == sample_chart_of_accounts["cash"].id), None)
+    cash_line = by_account.get(sample_chart_of_accounts["cash"].id)
     assert cash_line is not None
-    assert cash_line.debit == Decimal("0.00")
-    assert cash_line.credit == Decimal("5000.00")
+    assert cash_line.debit == ZERO
+    assert cash_line.credit == AMOUNT_5K
     
     # Verify payment was updated
-    db.refresh(payment)
+    db.refresh(payment, ["journal_entry_id"])
     assert payment.journal_entry_id == journal_entry_id
     
     # Verify bill balance and status were updated
-    db.refresh(bill)
-    assert bill.balance_amount == Decimal("0.00")  # 5000 - 5000
+    db.refresh(bill, ["balance_amount", "status"])
+    assert bill.balance_amount == ZERO  # 5000 - 5000
     assert bill.status == BillStatus.PAID
 
 
@@ -374,25 +352,21 @@ def test_post_invoice_balance_validation(db: Session, test_company_id: UUID, sam
         invoice_date=date(2025, 1, 15),
         status=InvoiceStatus.DRAFT,
         currency="USD",
-        total_amount=Decimal("7500.00"),
-        balance_amount=Decimal("7500.00"),
+        total_amount=AMOUNT_7500,
+        balance_amount=AMOUNT_7500,
         contact_id=uuid4(),
     )
     db.add(invoice)
-    db.commit()
-    db.refresh(invoice)
+    db.flush()
     
     journal_entry_id = post_invoice(db, invoice.id)
     
     # Verify the journal entry is balanced
-    je = db.query(JournalEntry).filter(JournalEntry.id == journal_entry_id).first()
-    lines = db.query(JournalLine).filter(JournalLine.journal_entry_id == je.id).all()
-    
-    total_debit = sum(line.debit for line in lines)
-    total_credit = sum(line.credit for line in lines)
+    total_debit, total_credit = (
+        db.query(func.sum(JournalLine.debit), func.sum(JournalLine.credit))
+        .filter(JournalLine.journal_entry_id == journal_entry_id)
+        .one()
+    )
     
     assert total_debit == total_credit
-    assert total_debit == Decimal("7500.00")
-
-
-
+    assert total_debit == AMOUNT_7500
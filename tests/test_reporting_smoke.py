@@ -9,6 +9,7 @@ from datetime import date
 from decimal import Decimal
 from uuid import uuid4, UUID
 
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
 from app.models.accounting import (
@@ -26,92 +27,49 @@ from app.services.reporting_service import (
     get_balance_sheet,
     get_cash_flow,
 )
-from app.db.session import SessionLocal
 
 
-@pytest.fixture
-def db() -> Session:
-    """Provide database session for tests."""
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
-@pytest.fixture
+@pytest.fixture(scope="module")
 def test_company_id() -> UUID:
     """Generate a test company ID."""
     return uuid4()
 
 
-@pytest.fixture
-def sample_accounts(db: Session, test_company_id: UUID):
+@pytest.fixture(scope="module")
+def sample_accounts(module_db: Session, test_company_id: UUID):
     """Create sample chart of accounts."""
-    # Revenue account
-    revenue_account = ChartOfAccount(
-        id=uuid4(),
-        company_id=test_company_id,
-        code="4000",
-        name="Sales Revenue",
-        account_type=AccountType.REVENUE,
-        is_active=True,
-    )
-    db.add(revenue_account)
-    
-    # Expense account
-    expense_account = ChartOfAccount(
-        id=uuid4(),
-        company_id=test_company_id,
-        code="5000",
-        name="Operating Expenses",
-        account_type=AccountType.EXPENSE,
-        is_active=True,
-    )
-    db.add(expense_account)
-    
-    # Asset account (cash)
-    cash_account = ChartOfAccount(
-        id=uuid4(),
-        company_id=test_company_id,
-        code="1000",
-        name="Cash",
-        account_type=AccountType.ASSET,
-        is_cash=True,
-        is_active=True,
-    )
-    db.add(cash_account)
-    
-    # Asset account (non-cash)
-    asset_account = ChartOfAccount(
-        id=uuid4(),
-        company_id=test_company_id,
-        code="1100",
-        name="Accounts Receivable",
-        account_type=AccountType.ASSET,
-        is_cash=False,
-        is_active=True,
-    )
-    db.add(asset_account)
-    
-    db.commit()
-    db.refresh(revenue_account)
-    db.refresh(expense_account)
-    db.refresh(cash_account)
-    db.refresh(asset_account)
-    
-    return {
-        "revenue": revenue_account,
-        "expense": expense_account,
-        "cash": cash_account,
-        "asset": asset_account,
+    accounts = {
+        # key: (code, name, account_type, is_cash)
+        "revenue": ("4000", "Sales Revenue", AccountType.REVENUE, False),
+        "expense": ("5000", "Operating Expenses", AccountType.EXPENSE, False),
+        "cash": ("1000", "Cash", AccountType.ASSET, True),
+        "asset": ("1100", "Accounts Receivable", AccountType.ASSET, False),
     }
-
-
-@pytest.fixture
-def sample_journal_entries(db: Session, test_company_id: UUID, sample_accounts):
+    # One multi-row INSERT ... RETURNING instead of a flush per object
+    created = module_db.scalars(
+        insert(ChartOfAccount).returning(ChartOfAccount, sort_by_parameter_order=True),
+        [
+            {
+                "id": uuid4(),
+                "company_id": test_company_id,
+                "code": code,
+                "name": name,
+                "account_type": account_type,
+                "is_cash": is_cash,
+                "is_active": True,
+            }
+            for code, name, account_type, is_cash in accounts.values()
+        ],
+    ).all()
+    module_db.commit()
+    
+    return dict(zip(accounts, created))
+
+
+@pytest.fixture(scope="module")
+def sample_journal_entries(module_db: Session, test_company_id: UUID, sample_accounts):
     """Create sample journal entries."""
-    # Create a posted journal entry for revenue
+    # Posted journal entries for revenue and expense
     entry1 = JournalEntry(
         id=uuid4(),
         company_id=test_company_id,
@@ -120,32 +78,6 @@ def sample_journal_entries(db: Session, test_company_id: UUID, sample_accounts):
         source_module=SourceModule.MANUAL,
         status=JournalStatus.POSTED,
     )
-    db.add(entry1)
-    db.flush()
-    
-    # Revenue line (credit)
-    line1 = JournalLine(
-        id=uuid4(),
-        journal_entry_id=entry1.id,
-        account_id=sample_accounts["revenue"].id,
-        description="Sales",
-        debit=Decimal("0.00"),
-        credit=Decimal("10000.00"),
-    )
-    db.add(line1)
-    
-    # Cash line (debit)
-    line2 = JournalLine(
-        id=uuid4(),
-        journal_entry_id=entry1.id,
-        account_id=sample_accounts["cash"].id,
-        description="Cash received",
-        debit=Decimal("10000.00"),
-        credit=Decimal("0.00"),
-    )
-    db.add(line2)
-    
-    # Create a posted journal entry for expense
     entry2 = JournalEntry(
         id=uuid4(),
         company_id=test_company_id,
@@ -154,32 +86,32 @@ def sample_journal_entries(db: Session, test_company_id: UUID, sample_accounts):
         source_module=SourceModule.MANUAL,
         status=JournalStatus.POSTED,
     )
-    db.add(entry2)
-    db.flush()
-    
-    # Expense line (debit)
-    line3 = JournalLine(
-        id=uuid4(),
-        journal_entry_id=entry2.id,
-        account_id=sample_accounts["expense"].id,
-        description="Operating expense",
-        debit=Decimal("3000.00"),
-        credit=Decimal("0.00"),
+    module_db.add_all([entry1, entry2])
+    module_db.flush()
+    
+    # All four lines in one multi-row INSERT
+    lines = [
+        # (entry, account key, description, debit, credit)
+        (entry1, "revenue", "Sales", "0.00", "10000.00"),
+        (entry1, "cash", "Cash received", "10000.00", "0.00"),
+        (entry2, "expense", "Operating expense", "3000.00", "0.00"),
+        (entry2, "cash", "Cash paid", "0.00", "3000.00"),
+    ]
+    module_db.execute(
+        insert(JournalLine),
+        [
+            {
+                "id": uuid4(),
+                "journal_entry_id": entry.id,
+                "account_id": sample_accounts[account].id,
+                "description": description,
+                "debit": Decimal(debit),
+                "credit": Decimal(credit),
+            }
+            for entry, account, description, debit, credit in lines
+        ],
     )
-    db.add(line3)
-    
-    # Cash line (credit)
-    line4 = JournalLine(
-        id=uuid4(),
-        journal_entry_id=entry2.id,
-        account_id=sample_accounts["cash"].id,
-        description="Cash paid",
-        debit=Decimal("0.00"),
-        credit=Decimal("3000.00"),
-    )
-    db.add(line4)
-    
-    db.commit()
+    module_db.commit()
     
     return {
         "revenue_entry": entry1,
@@ -4,12 +4,16 @@ import pytest
 from app.services.security import FileValidator, ValidationResult
 
 
+@pytest.fixture(scope="session")
+def validator() -> FileValidator:
+    """Shared FileValidator with default limits (it holds no per-file state)."""
+    return FileValidator()
+
+
 class TestFileValidator:
     """Tests for file validation."""
 
-    def test_valid_pdf(self):
-        validator = FileValidator()
-        
+    def test_valid_pdf(self, validator: FileValidator):
         # Valid PDF with magic bytes
         content = b"%PDF-1.4 valid pdf content"
         
@@ -18,9 +22,7 @@ class TestFileValidator:
         assert result.is_valid
         assert result.detected_type == "application/pdf"
 
-    def test_valid_png(self):
-        validator = FileValidator()
-        
+    def test_valid_png(self, validator: FileValidator):
         # Valid PNG with magic bytes
         content = b"\x89PNG\r\n\x1a\nvalid png content"
         
@@ -29,9 +31,7 @@ class TestFileValidator:
         assert result.is_valid
         assert result.detected_type == "image/png"
 
-    def test_reject_executable(self):
-        validator = FileValidator()
-        
+    def test_reject_executable(self, validator: FileValidator):
         # PE executable
         content = b"MZ\x90\x00executable content"
         
@@ -40,9 +40,7 @@ class TestFileValidator:
         assert not result.is_valid
         assert any("executable" in err.lower() for err in result.errors)
 
-    def test_reject_dangerous_extension(self):
-        validator = FileValidator()
-        
+    def test_reject_dangerous_extension(self, validator: FileValidator):
         content = b"some content"
         
         # Test various dangerous extensions
@@ -52,9 +50,7 @@ class TestFileValidator:
             result = validator.validate(content, f"file{ext}", "application/octet-stream")
             assert not result.is_valid
 
-    def test_reject_empty_file(self):
-        validator = FileValidator()
-        
+    def test_reject_empty_file(self, validator: FileValidator):
         result = validator.validate(b"", "empty.pdf", "application/pdf")
         
         assert not result.is_valid
@@ -70,9 +66,7 @@ class TestFileValidator:
         assert not result.is_valid
         assert any("large" in err.lower() for err in result.errors)
 
-    def test_warn_type_mismatch(self):
-        validator = FileValidator()
-        
+    def test_warn_type_mismatch(self, validator: FileValidator):
         # PNG content claimed as PDF
         png_content = b"\x89PNG\r\n\x1a\npng content"
         
@@ -81,9 +75,7 @@ class TestFileValidator:
         # Should warn but still be valid (it's a valid image)
         assert len(result.warnings) > 0
 
-    def test_sanitize_filename(self):
-        validator = FileValidator()
-        
+    def test_sanitize_filename(self, validator: FileValidator):
         # Path traversal attempt
         assert validator.sanitize_filename("../../../etc/passwd") == "passwd"
         
@@ -98,15 +90,11 @@ class TestFileValidator:
         sanitized = validator.sanitize_filename(long_name)
         assert len(sanitized) <= 204  # 150 + ext
 
-    def test_detect_path_traversal(self):
-        validator = FileValidator()
-        
+    def test_detect_path_traversal(self, validator: FileValidator):
         issues = validator._validate_filename("../secret.pdf")
         assert len(issues) > 0
 
-    def test_detect_double_extension(self):
-        validator = FileValidator()
-        
+    def test_detect_double_extension(self, validator: FileValidator):
         issues = validator._validate_filename("invoice.pdf.exe")
         assert len(issues) > 0
 
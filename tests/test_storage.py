@@ -0,0 +1,108 @@
+"""Tests for storage services."""
+
+import asyncio
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import pytest
+from app.services.storage import azure_storage
+from app.services.storage.azure_storage import AzureBlobStorageService, SAS_REUSE_WINDOW
+from app.services.storage.s3_storage import S3StorageService, PRESIGN_MAX_EXPIRATION
+
+
+class TestAzureContainerSas:
+    """Tests for container SAS reuse in get_presigned_url."""
+
+    @pytest.fixture
+    def issued(self, monkeypatch):
+        """Record each signed SAS expiry instead of calling the Azure SDK."""
+        expiries = []
+
+        def fake_sas(account_name, container_name, account_key, expiry):
+            expiries.append(expiry)
+            return f"sas-{len(expiries)}"
+
+        monkeypatch.setattr(azure_storage, "_generate_read_sas", fake_sas)
+        monkeypatch.setattr(AzureBlobStorageService, "_sas_cache", {})
+        return expiries
+
+    @pytest.fixture
+    def service(self) -> AzureBlobStorageService:
+        return AzureBlobStorageService(
+            account_name="account",
+            account_key="key",
+            container_name="documents",
+        )
+
+    def test_reuses_token_for_same_expiration(self, service, issued):
+        first = service._get_container_sas(3600)
+        second = service._get_container_sas(3600)
+
+        assert first == second
+        assert len(issued) == 1
+
+    def test_short_request_after_long_gets_short_token(self, service, issued):
+        long_token = service._get_container_sas(7 * 24 * 3600)
+
+        before = datetime.utcnow()
+        short_token = service._get_container_sas(60)
+
+        assert short_token != long_token
+        assert len(issued) == 2
+        assert issued[1] <= before + timedelta(seconds=60) + SAS_REUSE_WINDOW + timedelta(seconds=1)
+
+
+class FakeS3Client:
+    """Records each presign request instead of signing it."""
+
+    def __init__(self):
+        self.expires_in = []
+
+    def generate_presigned_url(self, operation, Params, ExpiresIn):
+        self.expires_in.append(ExpiresIn)
+        return f"url-{len(self.expires_in)}"
+
+
+class TestS3PresignedUrl:
+    """Tests for presigned URL reuse in get_presigned_url."""
+
+    @pytest.fixture
+    def client(self, monkeypatch) -> FakeS3Client:
+        monkeypatch.setattr(S3StorageService, "_presign_cache", OrderedDict())
+        return FakeS3Client()
+
+    @pytest.fixture
+    def service(self, client) -> S3StorageService:
+        service = S3StorageService(
+            endpoint_url="https://s3.example.com",
+            access_key="access",
+            secret_key="secret",
+            bucket_name="documents",
+            region="us-east-1",
+        )
+        service._client = client
+        return service
+
+    def test_signs_requested_expiration(self, service, client):
+        asyncio.run(service.get_presigned_url("a.pdf", 3600))
+
+        assert client.expires_in == [3600]
+
+    def test_reuses_url_for_same_expiration(self, service, client):
+        first = asyncio.run(service.get_presigned_url("a.pdf", 3600))
+        second = asyncio.run(service.get_presigned_url("a.pdf", 3600))
+
+        assert first == second
+        assert len(client.expires_in) == 1
+
+    def test_url_shorter_than_reuse_window_is_not_reused(self, service, client):
+        first = asyncio.run(service.get_presigned_url("a.pdf", 0))
+        second = asyncio.run(service.get_presigned_url("a.pdf", 0))
+
+        assert first != second
+        assert len(client.expires_in) == 2
+
+    def test_expiration_is_clamped_to_sigv4_maximum(self, service, client):
+        asyncio.run(service.get_presigned_url("a.pdf", 30 * 24 * 3600))
+
+        assert client.expires_in == [PRESIGN_MAX_EXPIRATION]
@@ -0,0 +1,82 @@
+"""Tests for email processing worker tasks."""
+
+import pytest
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from sqlalchemy.orm import Session
+
+from app.models.email_document import EmailMessage, EmailDocument, ProcessingStatus
+from app.services.virus_scanner import ScanResult
+from app.worker import tasks
+
+
+class InfectedScanner:
+    """Scanner that flags every file, so processing stops after the scan."""
+
+    def scan(self, content: bytes, filename: str) -> ScanResult:
+        return ScanResult(is_clean=False, virus_name="Eicar-Test-Signature", scanner="test")
+
+
+@pytest.fixture
+def document(db: Session, monkeypatch) -> EmailDocument:
+    """Pending document, with the worker tasks using the test session."""
+    monkeypatch.setattr(tasks, "get_db", lambda: db)
+    monkeypatch.setattr(tasks, "get_virus_scanner", lambda: InfectedScanner())
+
+    email = EmailMessage(
+        message_id=f"<{uuid4()}@example.com>",
+        from_address="vendor@example.com",
+        received_date=datetime.utcnow(),
+        source_provider="imap",
+    )
+    db.add(email)
+    db.flush()
+
+    document = EmailDocument(
+        email_id=email.id,
+        original_filename="invoice.pdf",
+        content_type="application/pdf",
+        file_size=3,
+        file_hash=uuid4().hex,
+        storage_path="",
+        storage_bucket="documents",
+        processing_status=ProcessingStatus.PENDING,
+    )
+    db.add(document)
+    db.commit()
+    return document
+
+
+def run_task(document: EmailDocument) -> dict:
+    return tasks.process_document_task(
+        document_id=document.id,
+        file_content=b"pdf",
+        filename=document.original_filename,
+        content_type=document.content_type,
+    )
+
+
+class TestProcessDocumentTask:
+    """Tests for duplicate deliveries of process_document_task."""
+
+    def test_second_delivery_is_skipped(self, document):
+        first = run_task(document)
+        second = run_task(document)
+
+        assert first["status"] == "virus_detected"
+        assert second["status"] == "skipped"
+
+    def test_delivery_while_processing_is_skipped(self, db, document):
+        assert tasks.claim_document(db, document.id) is True
+
+        result = run_task(document)
+
+        assert result["status"] == "skipped"
+
+    def test_stale_processing_document_is_reclaimed(self, db, document):
+        document.processing_status = ProcessingStatus.PROCESSING
+        document.updated_at = datetime.utcnow() - tasks.PROCESSING_STALE_AFTER - timedelta(minutes=1)
+        db.commit()
+
+        assert tasks.claim_document(db, document.id) is True